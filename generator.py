@@ -5,21 +5,31 @@ import random
 import sys
 from datetime import datetime
 import dateutil.parser
+import isodate
 import numpy as np
-from ieg.core import DataDriver
+from ieg.checkpoint import DEFAULT_CHECKPOINT_INTERVAL, Checkpointer, load_checkpoint, run_fingerprint
+from ieg.core import DataDriver, StdoutPrinter
+from ieg.corpus import Corpus, replay, write_corpus
+from ieg.metrics import Metrics
+from ieg.parallel import format_ring_stats, run_partitions, run_real_time
+from ieg.profiler import Profiler
+from ieg.ring import DEFAULT_RING_SIZE
 
 logger = logging.getLogger('ieg')
 
 DEFAULT_CONCURRENCY = 100
+MAX_CONCURRENCY = 10_000_000
+DEFAULT_COLUMN_BLOCK_SIZE = 4096
+DEFAULT_BATCH_SIZE = 1000
 
 def validate_concurrency(value):
     try:
         ivalue = int(value)
-        if ivalue < 1 or ivalue > 100000:
-            raise argparse.ArgumentTypeError("Concurrency must be an integer between 1 and 100000.")
+        if ivalue < 1 or ivalue > MAX_CONCURRENCY:
+            raise argparse.ArgumentTypeError(f"Concurrency must be an integer between 1 and {MAX_CONCURRENCY}.")
         return ivalue
     except ValueError:
-        raise argparse.ArgumentTypeError("Concurrency must be an integer between 1 and 1000.")
+        raise argparse.ArgumentTypeError(f"Concurrency must be an integer between 1 and {MAX_CONCURRENCY}.")
 
 def main(argv=None):
     logging.basicConfig(
@@ -31,7 +41,7 @@ def main(argv=None):
     logger.info("Starting synthetic event data generator")
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Generates synthetic event data.')
-    parser.add_argument('-c', dest='config_file', required=True, help='Generator configuration file')
+    parser.add_argument('-c', dest='config_file', help='Generator configuration file (not needed with --replay)')
 
     parser.add_argument('-t', '--template', dest='template_name', default=None,
                         help='Named template from the generator config\'s "templates" block.')
@@ -52,7 +62,8 @@ def main(argv=None):
         type=validate_concurrency,
         nargs='?',
         default=DEFAULT_CONCURRENCY,
-        help='Max entities concurrently generating events (1-1000)'
+        help=f'Max entities concurrently generating events (1-{MAX_CONCURRENCY:,}). Above a few thousand, '
+             'use simulated time with a config on the closed-form fast path.'
     )
 
     parser.add_argument(
@@ -62,6 +73,15 @@ def main(argv=None):
         help='Schedule file (JSON) for modulating max_entities over time. Defaults to full capacity if not specified.'
     )
 
+    parser.add_argument(
+        '--memory-budget',
+        dest='memory_budget',
+        type=float,
+        default=None,
+        help='Simulated time, closed-form fast path: megabytes of Actor state to allow. Lowers -m to the '
+             'number of Actors that fit, using the estimated bytes per Actor.'
+    )
+
     parser.add_argument(
         '--debug',
         action='store_true',
@@ -77,6 +97,176 @@ def main(argv=None):
         help='Random seed for deterministic data generation. Use with -s (simulated time) for fully reproducible output.'
     )
 
+    parser.add_argument(
+        '--columnar',
+        dest='column_block_size',
+        type=int,
+        nargs='?',
+        const=DEFAULT_COLUMN_BLOCK_SIZE,
+        default=0,
+        help='Generate field values for eligible emitters in NumPy columns of N records at a time '
+             f'(default N: {DEFAULT_COLUMN_BLOCK_SIZE}). Eligible emitters use only independent field generators.'
+    )
+
+    parser.add_argument(
+        '--batch',
+        dest='batch_size',
+        type=int,
+        nargs='?',
+        const=DEFAULT_BATCH_SIZE,
+        default=0,
+        help='Render and write records N at a time, as one buffer per batch '
+             f'(default N: {DEFAULT_BATCH_SIZE}). Output is unchanged, but arrives in bursts.'
+    )
+
+    parser.add_argument(
+        '--processes',
+        dest='processes',
+        type=int,
+        default=1,
+        help='Real-time mode: generate in N processes, each with its share of -m, -n and the Actor arrivals, '
+             'and write their output from this one through a shared-memory ring buffer. Default: 1.'
+    )
+
+    parser.add_argument(
+        '--ring-size',
+        dest='ring_size',
+        type=float,
+        default=DEFAULT_RING_SIZE / (1024 * 1024),
+        help='With --processes: ring buffer size in megabytes. Producers wait while it is full. '
+             f'Default: {DEFAULT_RING_SIZE // (1024 * 1024)}.'
+    )
+
+    parser.add_argument(
+        '--partitions',
+        dest='partitions',
+        type=int,
+        default=None,
+        help='Simulated-time mode: split the -r backfill into N windows of equal length and generate them '
+             'concurrently, each into its own file in --output-dir. Each window but the first opens with '
+             'Actors already in flight. With --processes, at most that many windows at once (default: one per CPU).'
+    )
+
+    parser.add_argument(
+        '--output-dir',
+        dest='output_dir',
+        default=None,
+        help='With --partitions: directory for the partition files, part-N.jsonl (part-N.txt with -t).'
+    )
+
+    parser.add_argument(
+        '--warmup',
+        dest='warmup',
+        default=None,
+        help='With --partitions or --corpus: ISO 8601 duration simulated before the window (each but the first) '
+             'or the corpus opens, to bring its Actors to steady state. Default: 10 mean Actor lifetimes, '
+             'from the state graph.'
+    )
+
+    parser.add_argument(
+        '--corpus',
+        dest='corpus',
+        default=None,
+        help='Simulated-time mode: write the -r or -n records to this corpus file, with their timestamps '
+             'indexed, instead of to stdout, for --replay.'
+    )
+
+    parser.add_argument(
+        '--replay',
+        dest='replay',
+        default=None,
+        help='Write the records of this corpus file (see --corpus) in real time, with their timestamps '
+             'rewritten, looping until -n records or -r have passed (default: forever). Needs no -c.'
+    )
+
+    parser.add_argument(
+        '--speed',
+        dest='speed',
+        type=float,
+        default=1.0,
+        help='With --replay: replay this many times faster than the corpus was generated. Default: 1.'
+    )
+
+    parser.add_argument(
+        '--checkpoint',
+        dest='checkpoint',
+        default=None,
+        help='Simulated-time mode: save the state of the run to this file every --checkpoint-interval seconds, '
+             'replacing the previous checkpoint. Removed when the run completes. Needs the closed-form fast path.'
+    )
+
+    parser.add_argument(
+        '--checkpoint-interval',
+        dest='checkpoint_interval',
+        type=float,
+        default=DEFAULT_CHECKPOINT_INTERVAL,
+        help=f'Seconds of wall time between checkpoints. Default: {DEFAULT_CHECKPOINT_INTERVAL:g}.'
+    )
+
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        default=False,
+        help='Continue the run saved in --checkpoint, with the same command line, writing to the same output '
+             'opened for appending (>>). The output is identical to an uninterrupted run.'
+    )
+
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        default=False,
+        help='Write a timing breakdown (per stage, per dimension, per state) to stderr at the end of the run.'
+    )
+
+    parser.add_argument(
+        '--profile-interval',
+        dest='profile_interval',
+        type=float,
+        default=None,
+        help='Also write the --profile breakdown every N seconds while running. Implies --profile.'
+    )
+
+    parser.add_argument(
+        '--profile-dump',
+        dest='profile_dump',
+        default=None,
+        help='Run every generator thread under cProfile and write the merged statistics to this file. Implies --profile.'
+    )
+
+    parser.add_argument(
+        '--metrics-port',
+        dest='metrics_port',
+        type=int,
+        default=None,
+        help='Serve live metrics in Prometheus text format at http://127.0.0.1:PORT/metrics.'
+    )
+
+    parser.add_argument(
+        '--status-interval',
+        dest='status_interval',
+        type=float,
+        default=None,
+        help='Write a JSON status line with live metrics to stderr every N seconds.'
+    )
+
+    parser.add_argument(
+        '--lag-policy',
+        dest='lag_policy',
+        choices=['none', 'catchup', 'drop', 'shed'],
+        default='none',
+        help='Real-time mode: what to do when Actors fall behind schedule. none: only report the lag; '
+             'catchup: skip sleeps until back on schedule; drop: catch up and discard records later than '
+             '--max-lag; shed: catch up and end Actors that fall more than --max-lag behind. Default: none.'
+    )
+
+    parser.add_argument(
+        '--max-lag',
+        dest='max_lag',
+        type=float,
+        default=1.0,
+        help='Seconds behind schedule beyond which --lag-policy drop or shed acts. Default: 1.0.'
+    )
+
     parser.add_argument(
         '--validate',
         action='store_true',
@@ -84,7 +274,62 @@ def main(argv=None):
         help='Validate the configuration file and exit without generating data.'
     )
 
+    parser.add_argument(
+        '--predict',
+        action='store_true',
+        default=False,
+        help='Validate the configuration, then print its expected Actor lifetime, records per Actor, -m ceiling, '
+             'events per second and output bytes per hour for the given -m, --schedule and -t, and exit. '
+             'Computed analytically from the state graph; takes milliseconds.'
+    )
+
     args = parser.parse_args(argv)
+    if args.processes < 1:
+        parser.error('--processes must be at least 1')
+    if args.partitions is not None:
+        if args.partitions < 1:
+            parser.error('--partitions must be at least 1')
+        if not args.start_time or not args.time:
+            parser.error('--partitions splits a simulated-time backfill; it needs -s and -r')
+        if not args.output_dir:
+            parser.error('--partitions needs --output-dir')
+    elif args.output_dir:
+        parser.error('--output-dir applies to --partitions only')
+    elif args.warmup and not args.corpus:
+        parser.error('--warmup applies to --partitions and --corpus only')
+    if args.corpus:
+        if not args.start_time or not (args.time or args.n_recs):
+            parser.error('--corpus is written in simulated time; it needs -s and -r or -n')
+        if args.processes > 1 or args.partitions is not None or args.checkpoint:
+            parser.error('--corpus may not be used with --processes, --partitions or --checkpoint')
+    if args.replay:
+        if args.corpus or args.start_time or args.processes > 1 or args.partitions is not None or args.checkpoint:
+            parser.error('--replay writes a corpus in real time; it may not be used with -s, --corpus, '
+                         '--processes, --partitions or --checkpoint')
+        if args.speed <= 0:
+            parser.error('--speed must be positive')
+    elif not args.config_file:
+        parser.error('the following arguments are required: -c')
+    elif args.speed != 1.0:
+        parser.error('--speed applies to --replay only')
+    if args.checkpoint:
+        if not args.start_time:
+            parser.error('--checkpoint applies to simulated time; it needs -s')
+        if args.processes > 1 or args.partitions is not None:
+            parser.error('--checkpoint may not be used with --processes or --partitions')
+        if args.profile or args.profile_interval or args.profile_dump:
+            parser.error('--checkpoint may not be used with --profile')
+        if args.checkpoint_interval <= 0:
+            parser.error('--checkpoint-interval must be positive')
+    elif args.resume:
+        parser.error('--resume needs --checkpoint')
+    if args.processes > 1 or args.partitions is not None:
+        if args.start_time and args.partitions is None:
+            parser.error('--processes applies to real time, or to -s with --partitions; it may not be used with -s alone')
+        if args.profile or args.profile_interval or args.profile_dump or args.metrics_port is not None \
+                or args.status_interval:
+            parser.error('--profile, --metrics-port and --status-interval apply to a single process; '
+                         'they may not be used with --processes or --partitions')
 
     # Configure logging level based on --debug flag
     if args.debug:
@@ -110,6 +355,21 @@ def main(argv=None):
     total_recs = int(args.n_recs) if args.n_recs else None
 
     try:
+        if args.replay:
+            corpus = Corpus(args.replay)
+            try:
+                seconds = isodate.parse_duration(runtime).total_seconds() if runtime else None
+            except Exception as e:
+                raise ValueError(f"Error parsing runtime '{runtime}': {e}")
+            try:
+                stats = replay(corpus, StdoutPrinter(), speed=args.speed, total_recs=total_recs, runtime=seconds)
+            finally:
+                corpus.close()
+            logger.info("Replayed %d records of %s (%d complete loops) at %gx; largest lag %.3fs",
+                        stats['records'], args.replay, stats['loops'], args.speed, stats['max_lag'])
+            logger.info("Synthetic event data generation completed")
+            return
+
         # Load configuration file
         with open(args.config_file, 'r') as f:
             try:
@@ -118,12 +378,13 @@ def main(argv=None):
                 raise ValueError(f"Error parsing config file '{args.config_file}': {e}")
 
         # --validate: run pre-flight checks and exit
-        if args.validate:
+        if args.validate or args.predict:
             from ieg.validate import validate_config
             if not validate_config(config, template_name=args.template_name):
                 logger.critical("Config '%s' is invalid — see errors above.", args.config_file)
                 sys.exit(1)
-            sys.exit(0)
+            if args.validate:
+                sys.exit(0)
 
         # Load schedule file
         schedule_config = None
@@ -134,20 +395,140 @@ def main(argv=None):
                 except json.JSONDecodeError as e:
                     raise ValueError(f"Error parsing schedule file '{args.schedule_file}': {e}")
 
-        # Start a new data driver
-        driver = DataDriver(
-            name='cli',
-            config=config,
-            runtime=runtime,
-            total_recs=total_recs,
-            time_type=time_type,
-            start_time=start_time,
-            max_entities=max_entities,
-            schedule_config=schedule_config,
-            template_name=args.template_name
-        )
+        # --predict: analytical throughput estimate, then exit
+        if args.predict:
+            from ieg.predict import format_prediction, predict
+            prediction = predict(config, schedule=schedule_config, max_entities=max_entities,
+                                 template=args.template_name)
+            print(f"Prediction for {args.config_file}"
+                  f"{' with schedule ' + args.schedule_file if args.schedule_file else ''}:")
+            for line in format_prediction(prediction):
+                print('  ' + line)
+            sys.exit(0)
+
+        warmup = None
+        if args.warmup:
+            try:
+                warmup = isodate.parse_duration(args.warmup).total_seconds()
+            except Exception as e:
+                raise ValueError(f"Error parsing --warmup '{args.warmup}': {e}")
+
+        if args.corpus:
+            write_corpus(
+                args.corpus,
+                config,
+                start_time,
+                runtime=runtime,
+                total_recs=total_recs,
+                warmup=warmup,
+                max_entities=max_entities,
+                schedule_config=schedule_config,
+                template_name=args.template_name,
+                column_block_size=args.column_block_size,
+                config_file=args.config_file,
+                memory_budget=args.memory_budget * 1024 * 1024 if args.memory_budget is not None else None
+            )
+            logger.info("Synthetic event data generation completed")
+            return
+
+        if args.partitions is not None:
+            parts = run_partitions(
+                args.partitions,
+                config,
+                start_time,
+                runtime,
+                args.output_dir,
+                processes=args.processes if args.processes > 1 else None,
+                seed=args.seed,
+                warmup=warmup,
+                max_entities=max_entities,
+                schedule_config=schedule_config,
+                template_name=args.template_name,
+                column_block_size=args.column_block_size,
+                config_file=args.config_file,
+                batch_size=args.batch_size,
+                memory_budget=args.memory_budget * 1024 * 1024 if args.memory_budget is not None else None
+            )
+            logger.info("Wrote %d records in %d partitions to %s",
+                        sum(records for _, records in parts), len(parts), args.output_dir)
+            logger.info("Synthetic event data generation completed")
+            return
+
+        if args.processes > 1:
+            stats = run_real_time(
+                args.processes,
+                config,
+                max_entities,
+                total_recs=total_recs,
+                runtime=runtime,
+                seed=args.seed,
+                ring_size=int(args.ring_size * 1024 * 1024),
+                schedule_config=schedule_config,
+                template_name=args.template_name,
+                column_block_size=args.column_block_size,
+                config_file=args.config_file,
+                lag_policy=args.lag_policy,
+                max_lag=args.max_lag,
+                batch_size=args.batch_size
+            )
+            logger.info("Ring buffer: %s", format_ring_stats(stats))
+            logger.info("Synthetic event data generation completed")
+            return
+
+        profiler = None
+        if args.profile or args.profile_interval or args.profile_dump:
+            profiler = Profiler(dump_path=args.profile_dump)
+
+        checkpointer = None
+        if args.checkpoint:
+            fingerprint = run_fingerprint(
+                config=config, schedule=schedule_config, template=args.template_name, start=args.start_time,
+                runtime=runtime, records=total_recs, m=max_entities, columnar=args.column_block_size,
+                memory_budget=args.memory_budget, seed=args.seed
+            )
+            checkpointer = Checkpointer(args.checkpoint, args.checkpoint_interval, fingerprint)
+
+        if args.resume:
+            driver, offset = load_checkpoint(args.checkpoint, fingerprint)
+            driver.checkpointer = checkpointer
+            if offset is None or not driver.target_printer.truncate(offset):
+                logger.warning("Output is not a file: records written after the checkpoint and before the "
+                               "run stopped will be written again")
+        else:
+            # Start a new data driver
+            driver = DataDriver(
+                name='cli',
+                config=config,
+                runtime=runtime,
+                total_recs=total_recs,
+                time_type=time_type,
+                start_time=start_time,
+                max_entities=max_entities,
+                schedule_config=schedule_config,
+                template_name=args.template_name,
+                column_block_size=args.column_block_size,
+                profiler=profiler,
+                config_file=args.config_file,
+                lag_policy=args.lag_policy,
+                max_lag=args.max_lag,
+                batch_size=args.batch_size,
+                memory_budget=args.memory_budget * 1024 * 1024 if args.memory_budget is not None else None,
+                checkpointer=checkpointer
+            )
+        if args.metrics_port is not None or args.status_interval:
+            metrics = Metrics(driver)
+            if args.metrics_port is not None:
+                metrics.serve_prometheus(args.metrics_port)
+            if args.status_interval:
+                metrics.start_status_line(args.status_interval)
         logger.info("Starting synthetic event data generator at %s", datetime.now().isoformat())
+        if profiler is not None and args.profile_interval:
+            profiler.start_periodic(args.profile_interval, driver.sim_control.get_record_count)
         driver.simulate()
+        if profiler is not None:
+            profiler.finish(driver.sim_control.get_record_count())
+        if checkpointer is not None:
+            checkpointer.remove()
 
     except FileNotFoundError as e:
         logger.error("File error: %s", e)
@@ -8,4 +8,5 @@ All rights reserved. Unauthorized use, distribution, or modification is prohibit
 """
 
 __author__ = "Imply Data, Inc."
-__license__ = "Apache License 2.0"
\ No newline at end of file
+__license__ = "Apache License 2.0"
+from ieg.api import generate  # noqa: E402,F401
@@ -0,0 +1,209 @@
+"""In-process Python API: generate records straight into the calling program.
+
+    import ieg
+    for record in ieg.generate('presets/configs/ecommerce.json', seed=7, start='2024-01-01', n=1000):
+        ...
+
+generate() returns a generator. Nothing is produced until it is iterated, and the
+simulation only advances as fast as the caller consumes records, so a slow
+consumer applies backpressure instead of filling memory.
+
+In simulated time (a start time is given), configs that take the closed-form fast
+path (see ieg/lifecycle.py) run entirely in the calling thread. Other configs, and
+real time, run the usual worker threads and pass records through a bounded queue;
+a full queue blocks the workers, which pauses simulated time.
+
+The RNGs are the process-wide random and numpy.random generators, as for the
+command line: with the same seed, a generator run produces the same records as
+generator.py --seed, as long as nothing else draws from them while it runs.
+"""
+
+import json
+import logging
+import queue
+import random
+import threading
+from datetime import datetime
+
+import dateutil.parser
+import numpy as np
+
+from ieg.core import DataDriver
+
+logger = logging.getLogger('ieg')
+
+OUTPUTS = ('dict', 'text', 'bytes', 'arrow')
+DEFAULT_MAX_ENTITIES = 100
+DEFAULT_ARROW_BATCH_SIZE = 1024
+DEFAULT_BYTES_BATCH_SIZE = 1000
+QUEUE_SIZE = 1024  # records buffered between worker threads and the caller
+JOIN_TIMEOUT = 5.0  # seconds to wait for an abandoned threaded run to wind down
+
+
+def _load_json(value, what):
+    """Return value if it is already a dict, else load it as a JSON file path."""
+    if value is None or isinstance(value, dict):
+        return value
+    with open(value, 'r') as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Error parsing {what} file '{value}': {e}")
+
+
+class _QueuePrinter:
+    """Output target that hands records from worker threads to the caller's thread."""
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize)
+        self.closed = False
+
+    def print(self, record):
+        # Block while the caller is behind, but give up once it has stopped reading
+        while not self.closed:
+            try:
+                self.queue.put(record, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+
+def _threaded_records(driver):
+    """Run driver.simulate() on a background thread and yield what it writes."""
+    printer = _QueuePrinter(QUEUE_SIZE)
+    driver.target_printer = printer
+    done = object()
+    finished = threading.Event()
+
+    def run():
+        try:
+            driver.simulate()
+        finally:
+            finished.set()
+            printer.print(done)
+    thread = threading.Thread(target=run, name='Generate', daemon=True)
+    thread.start()
+    try:
+        while True:
+            record = printer.queue.get()
+            if record is done:
+                return
+            yield record
+    finally:
+        if not finished.is_set():
+            # The caller stopped early: end the run and wake every paused thread so
+            # that none is left holding the clock or drawing from the RNGs
+            printer.closed = True
+            driver.terminate()
+            driver.global_clock.release_all()
+            thread.join(JOIN_TIMEOUT)
+        # Also after a complete run: simulate() returns while Actors may still be finishing
+        driver.stop_pool()
+
+
+def _batches(items, size):
+    """Group items into lists of up to size."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _arrow_batches(records, fields, size):
+    """Convert record dicts to pyarrow RecordBatches with one column per field."""
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("output='arrow' requires pyarrow (pip install pyarrow)") from e
+    for batch in _batches(records, size):
+        # Missing fields, and fields of emitters other than the record's own, are null
+        yield pa.RecordBatch.from_pydict({name: [record.get(name) for record in batch] for name in fields})
+
+
+def generate(config, seed=None, start=None, n=None, duration=None, max_entities=DEFAULT_MAX_ENTITIES,
+             output='dict', batch_size=None, template=None, schedule=None, column_block_size=0):
+    """Generate records in-process and return them as a generator.
+
+    config       generator config, as a dict or a path to a JSON file
+    seed         seeds random and numpy.random before the config is loaded
+    start        simulated start time (datetime or ISO 8601 string); None runs in real time
+    n            stop after this many records
+    duration     stop after this much clock time (ISO 8601 duration, e.g. 'PT1H')
+    max_entities maximum concurrent Actors, as -m
+    output       'dict' for record dicts, 'text' for rendered strings (JSON, or the
+                 template's output), 'bytes' for UTF-8 buffers of rendered lines, one
+                 per batch (see DataDriver.render_batch), 'arrow' for
+                 pyarrow.RecordBatch objects
+    batch_size   yield lists of this many records instead of single records; for
+                 'bytes' and 'arrow', the records per buffer or RecordBatch
+                 (default 1000 and 1024)
+    template     named template from the config, for output='text' or 'bytes'
+    schedule     schedule config, as a dict or a path to a JSON file
+    column_block_size  as --columnar
+
+    With neither n nor duration the generator never ends; stop iterating, or call
+    close() on it, when done. For output='text' and 'bytes', a template's header is
+    the first item. Dict records hold datetimes as ISO 8601 strings, as in JSON output.
+    """
+    if output not in OUTPUTS:
+        raise ValueError(f"Unknown output '{output}'. Choose from: {', '.join(OUTPUTS)}")
+    if template is not None and output not in ('text', 'bytes'):
+        raise ValueError("template is only used with output='text' or 'bytes'")
+    if batch_size is not None and batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+    if n is not None and duration is not None:
+        raise ValueError("n and duration may not be used together")
+    config = _load_json(config, 'config')
+    schedule = _load_json(schedule, 'schedule')
+    if isinstance(start, str):
+        start = dateutil.parser.isoparse(start)
+
+    def records():
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+        driver = DataDriver(
+            name='api',
+            config=config,
+            runtime=duration,
+            total_recs=n,
+            time_type='SIM' if start is not None else 'REAL',
+            start_time=start if start is not None else datetime.now(),
+            max_entities=max_entities,
+            schedule_config=schedule,
+            template_name=template,
+            column_block_size=column_block_size,
+        )
+        if driver.header and output == 'text':
+            yield driver.header
+        elif driver.header and output == 'bytes':
+            yield (driver.header + '\n').encode('utf-8')
+        driver.header = None
+        if output != 'text':
+            # Hand over the record dicts themselves
+            driver.render_record = lambda record: record
+        if driver.lifecycle is not None:
+            render = driver.render_record
+            stream = (render(record) for record in driver.closed_form_records())
+        else:
+            stream = _threaded_records(driver)
+        if output == 'bytes':
+            for batch in _batches(stream, batch_size or DEFAULT_BYTES_BATCH_SIZE):
+                yield driver.render_batch(batch)
+        else:
+            yield from stream
+
+    if output == 'arrow':
+        fields = []
+        for emitter in config.get('emitters', []):
+            for d in emitter.get('dimensions', []):
+                if d.get('name') not in fields:
+                    fields.append(d.get('name'))
+        return _arrow_batches(records(), fields, batch_size or DEFAULT_ARROW_BATCH_SIZE)
+    if batch_size is not None and output != 'bytes':
+        return _batches(records(), batch_size)
+    return records()
@@ -0,0 +1,131 @@
+"""Checkpoints of a simulated-time run, for --checkpoint and --resume.
+
+A Checkpointer saves the whole state of a closed-form run every so often: the
+simulated clock, every in-flight Actor's activity and variables (the ActorTable),
+the record and end-time queues, the spawner's arrival stream, every dimension's
+and distribution's sampling state, including the blocks of values already drawn
+ahead, the record and Actor counters, the random and NumPy generators' states,
+and how many bytes of output had been written. The DataDriver is pickled as a
+whole; classes that hold locks or compiled code drop them in __getstate__ and
+rebuild them on load.
+
+A checkpoint is taken only between passes of the spawner loop (see
+DataDriver.closed_form_records), after every record before it has been written,
+so a run restored with load_checkpoint() continues with exactly the records the
+original run would have written next. Threaded runs keep part of their state on
+thread stacks, which cannot be saved, so they do not support checkpoints.
+
+Each checkpoint replaces the previous one: it is written to a temporary file,
+synced and renamed over the old one, so the path always holds a complete
+checkpoint. Its size grows with the number of Actors in flight, not with the
+records written. Checkpoints are pickles: only resume from ones you wrote.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import random
+import time
+
+import numpy as np
+
+logger = logging.getLogger('ieg')
+
+# Format of a checkpoint; a checkpoint of another version is refused
+CHECKPOINT_VERSION = 1
+# Default seconds of wall time between checkpoints
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+
+
+def run_fingerprint(**options):
+    """Return a digest of the options that determine a run's output.
+
+    A checkpoint records the fingerprint of the run that took it, and
+    load_checkpoint() refuses to resume a run with a different one.
+    """
+    return hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class Checkpointer:
+    """Saves a DataDriver's state to path every interval seconds of wall time.
+
+    Pass it to DataDriver(checkpointer=...), which asks is_due() between passes of
+    its spawner loop and calls save() when it is.
+    """
+
+    def __init__(self, path, interval=DEFAULT_CHECKPOINT_INTERVAL, fingerprint=None):
+        if interval <= 0:
+            raise ValueError(f"Checkpoint interval must be positive, got {interval}")
+        self.path = path
+        self.interval = interval
+        self.fingerprint = fingerprint
+        self.due = time.monotonic() + interval
+        self.saved = 0
+
+    def __str__(self):
+        return 'Checkpointer(path='+self.path+', interval='+str(self.interval)+')'
+
+    def is_due(self):
+        return time.monotonic() >= self.due
+
+    def save(self, driver, offset):
+        """Write driver's state, the generators' states and the output offset to path, atomically.
+
+        offset is the number of bytes written to the output, or None if it is not
+        a file.
+        """
+        started = time.perf_counter()
+        checkpoint = {
+            'version': CHECKPOINT_VERSION,
+            'fingerprint': self.fingerprint,
+            'offset': offset,
+            'random': random.getstate(),
+            'numpy': np.random.get_state(),
+            'driver': driver,
+        }
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        os.replace(temp_path, self.path)
+        # Make the rename itself durable
+        directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+        self.saved += 1
+        self.due = time.monotonic() + self.interval
+        logger.info("Checkpoint at %s: %d records, %d Actors in flight, %d bytes, %.2fs",
+                    driver.global_clock.now().isoformat(), driver.sim_control.get_record_count(),
+                    driver.sim_control.get_entity_count(), size, time.perf_counter() - started)
+
+    def remove(self):
+        """Delete the checkpoint, once the run it belongs to has completed."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def load_checkpoint(path, fingerprint=None):
+    """Restore a run from a checkpoint. Returns (driver, offset), as passed to Checkpointer.save().
+
+    The random and NumPy generators are set to their states at the checkpoint. With
+    a fingerprint, the checkpoint must come from a run with the same one.
+    """
+    with open(path, 'rb') as f:
+        checkpoint = pickle.load(f)
+    if not isinstance(checkpoint, dict) or checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"'{path}' is not a version {CHECKPOINT_VERSION} checkpoint")
+    if fingerprint is not None and checkpoint['fingerprint'] != fingerprint:
+        raise ValueError(f"Checkpoint '{path}' was taken by a run with a different config or options; "
+                         "resume with the same command line")
+    random.setstate(checkpoint['random'])
+    np.random.set_state(checkpoint['numpy'])
+    driver = checkpoint['driver']
+    logger.info("Resuming from checkpoint at %s: %d records written",
+                driver.global_clock.now().isoformat(), driver.sim_control.get_record_count())
+    return driver, checkpoint['offset']
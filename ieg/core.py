@@ -2,26 +2,37 @@
 
 Clock manages simulated and real-time scheduling across worker threads.
 DataDriver is the top-level driver: it parses a generator config, builds the
-state machine, spawns worker threads, and writes rendered records to stdout.
+state machine, runs Actors on a pool of worker threads, and writes rendered
+records to stdout.
+In simulated time, configs whose Actors never depend on the clock skip the worker
+threads entirely and step every Actor from a compact table (see ieg/lifecycle.py).
 """
 
+import heapq
 import json
+import keyword
 import logging
 import os
+import re
+import stat
 import sys
 import threading
 import time
+from collections import deque
 from datetime import datetime, timedelta
 
 
 from sortedcontainers import SortedList
 
-from ieg.dimensions import DimensionTimestampClock, DimensionVariable, get_dimensions, get_variables
-from ieg.distributions import parse_distribution, parse_schedule
-from ieg.states import Controller, State, Transition
+from ieg.dimensions import DimensionTimestampClock, get_dimensions, get_variables
+from ieg.distributions import ArrivalProcess, parse_distribution, parse_schedule
+from ieg.emitters import Emitter
+from ieg.lifecycle import ClosedFormLifecycle
+from ieg.rng import use_thread_generators
+from ieg.states import Actor, ActorTable, Controller, State, Transition
 from ieg.validate import validate_config
 
-from jinja2 import Environment, Undefined, UndefinedError
+from jinja2 import Environment, TemplateSyntaxError, Undefined, UndefinedError
 
 logger = logging.getLogger('ieg')
 
@@ -46,8 +57,160 @@ class _StrictEnv:
 _jinja_env = Environment(undefined=Undefined)
 _jinja_env.globals['env'] = _StrictEnv()
 
+# Jinja2 strips one trailing newline from a template's source (keep_trailing_newline=False)
+_trailing_newline = re.compile(r'(\r\n|\r|\n)\Z')
+
+
+def _batch_template(body, fields):
+    """Compile a template body into one that renders a whole list of records.
+
+    The body is rendered once per item of 'records', with each field bound by name
+    as if the record had been passed to render() on its own, and a newline after
+    each record. Returns None if the body cannot be embedded in a loop.
+    """
+    names = [f for f in fields if f.isidentifier() and not keyword.iskeyword(f)
+             and f not in ('true', 'false', 'none', 'loop')]
+    body = _trailing_newline.sub('', body)
+    if names:
+        binds = ', '.join(name + '=_ieg_record[' + repr(name) + ']' for name in names)
+        body = '{% with ' + binds + ' %}' + body + '{% endwith %}'
+    try:
+        return _jinja_env.from_string('{% for _ieg_record in records %}' + body + '\n{% endfor %}')
+    except TemplateSyntaxError:
+        return None
+
+
+class StdoutPrinter:
+    """The output target: writes rendered records, and encoded batches of them, to stdout.
+
+    Writers on several threads take turns under the lock. With --processes this is
+    the consumer end of the shared-memory ring (see ieg/ring.py): the writer process
+    hands it each message drained from the ring.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def print(self, record):
+        with self.lock:
+            sys.stdout.write(str(record) + '\n')
+            sys.stdout.flush()
+
+    def write(self, data):
+        # A batch of rendered records, already encoded
+        with self.lock:
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+
+    def tell(self):
+        """Return how many bytes stdout holds, or None if it is not a regular file."""
+        with self.lock:
+            sys.stdout.flush()
+            st = os.fstat(sys.stdout.fileno())
+        return st.st_size if stat.S_ISREG(st.st_mode) else None
+
+    def truncate(self, offset):
+        """Cut stdout back to offset bytes and write on from there.
+
+        Used on --resume, so that records written after the checkpoint was taken
+        are replaced rather than repeated. Returns False if stdout is not a regular
+        file, which cannot be cut; raises ValueError if it holds fewer than offset bytes.
+        """
+        with self.lock:
+            sys.stdout.flush()
+            fd = sys.stdout.fileno()
+            st = os.fstat(fd)
+            if not stat.S_ISREG(st.st_mode):
+                return False
+            if st.st_size < offset:
+                raise ValueError(f"The output holds {st.st_size} bytes, but the checkpoint was taken after "
+                                 f"{offset}; resume with the output opened for appending (>>)")
+            os.ftruncate(fd, offset)
+            os.lseek(fd, offset, os.SEEK_SET)
+        return True
+
+class FilePrinter:
+    """An output target that writes rendered records, and encoded batches of them, to a file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.lock = threading.Lock()
+
+    def __str__(self):
+        return 'FilePrinter(path='+self.path+')'
+
+    def print(self, record):
+        with self.lock:
+            self.file.write((str(record) + '\n').encode('utf-8'))
+
+    def write(self, data):
+        # A batch of rendered records, already encoded
+        with self.lock:
+            self.file.write(data)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+class BatchWriter:
+    """Collects records from any thread and writes them as one rendered buffer per batch.
+
+    render_batch turns a list of records into bytes; write receives each buffer.
+    flush() writes a final partial batch.
+    """
+
+    def __init__(self, render_batch, write, batch_size):
+        self.render_batch = render_batch
+        self.write = write
+        self.batch_size = batch_size
+        self.records = []
+        self.lock = threading.Lock()  # guards records
+        self.write_lock = threading.Lock()  # held while a batch renders and is written
+
+    def __str__(self):
+        return 'BatchWriter(batch_size='+str(self.batch_size)+', pending='+str(len(self.records))+')'
+
+    def add(self, record):
+        """Queue a record, writing the batch once it is full.
+
+        A full batch is taken off the queue under the lock but rendered outside
+        it, so other threads keep queueing while it renders. write_lock is taken
+        before the queue is let go, so batches are written in the order they
+        filled and flush() waits for a batch still rendering.
+        """
+        with self.lock:
+            records = self.records
+            records.append(record)
+            if len(records) < self.batch_size:
+                return
+            self.records = []
+            self.write_lock.acquire()
+        try:
+            self.write(self.render_batch(records))
+        finally:
+            self.write_lock.release()
+
+    def pending(self):
+        """Return the number of queued records not yet in a written batch."""
+        with self.lock:
+            return len(self.records)
+
+    def flush(self):
+        """Write any queued records, after any batch still being written."""
+        with self.lock:
+            records = self.records
+            self.records = []
+            self.write_lock.acquire()
+        try:
+            if records:
+                self.write(self.render_batch(records))
+        finally:
+            self.write_lock.release()
+
 class FutureEvent:
     """A future event in the simulation clock, used to manage simulated time ordering."""
+    __slots__ = ('t', 'name', 'event')
 
     def __init__(self, t):
         self.t = t
@@ -71,9 +234,12 @@ class FutureEvent:
         return 'FutureEvent('+self.name+', '+str(self.t)+')'
 
     def pause(self):
-        """Block the current thread until this event is resumed."""
+        """Block the current thread until this event is resumed.
+
+        The event is cleared when it is scheduled (Clock.thread_event), not here,
+        so a resume() that lands before pause() is not lost.
+        """
         logger.debug("%s pausing", self.name)
-        self.event.clear()
         self.event.wait()
 
     def resume(self):
@@ -89,18 +255,50 @@ class Clock:
     with the earliest scheduled time is allowed to run. This produces deterministic,
     serialised output when combined with --seed.
 
-    In real-time mode, sleep() delegates to time.sleep() with no coordination.
-    """
+    In real-time mode, sleep() delegates to time.sleep() with no coordination. Each
+    thread also keeps its own schedule: the monotonic time its next wake-up is due,
+    advanced by every sleep. How far a thread wakes behind its schedule is its lag.
+    With catch_up set, sleeps aim for the scheduled time rather than a full delta,
+    so a thread that has fallen behind skips sleeping until it is back on time.
 
-    future_events = SortedList()
-    active_threads = 0
-    lock = threading.Lock()
-    sleep_lock = threading.Lock()
+    A thread can also block in wait_for_signal() until another thread ends; the
+    spawner uses this to wake the moment an Actor frees a concurrency slot.
+    """
 
     def __init__(self, time_type, start_time = datetime.now()):
         self.sim_time = start_time
         self.start_time = start_time
         self.time_type = time_type
+        self.lock = threading.Lock()  # guards active_threads, future_events and waiter
+        self.active_threads = 0  # simulated time: threads registered and not paused
+        self.future_events = SortedList()  # FutureEvents of sleeping threads, earliest first
+        self.waiter = None  # FutureEvent of a thread blocked in wait_for_signal (simulated time)
+        self.local = threading.local()  # each thread's reusable FutureEvent
+        self.signal_condition = threading.Condition()
+        self.signalled = False  # real time
+        self.catch_up = False  # real time: sleep until the scheduled time rather than for delta
+        self.lateness = 0.0  # real time: lag of the most recent wake-up, in seconds
+        self.max_lateness = 0.0  # real time: largest lag since reset_max_lag()
+        self.lateness_lock = threading.Lock()  # real time: guards max_lateness
+
+    def __getstate__(self):
+        # For a checkpoint (see ieg/checkpoint.py), taken while the one closed-form
+        # thread runs. Threads do not survive into the restored run, so neither does
+        # anything that tracks them; the locks are recreated on load.
+        state = self.__dict__.copy()
+        for name in ('lock', 'local', 'signal_condition', 'lateness_lock'):
+            del state[name]
+        state['active_threads'] = 0
+        state['future_events'] = SortedList()
+        state['waiter'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.signal_condition = threading.Condition()
+        self.lateness_lock = threading.Lock()
 
     def __str__(self):
         s = 'Clock(time='+str(self.sim_time)
@@ -133,13 +331,27 @@ class Clock:
             self.lock.release()
 
     def end_thread(self):
-        """Unregister a thread and resume the next pending event if any."""
+        """Unregister a thread and hand over to the next thread due to run.
+
+        A thread blocked in wait_for_signal() is woken first, at the current time;
+        otherwise the next pending event is resumed.
+        """
         if self.time_type != 'REAL':
             self.lock.acquire()
             self.active_threads -= 1
-            if len(self.future_events) > 0:
+            if self.waiter is not None:
+                waiter = self.waiter
+                self.waiter = None
+                self._discard_event(waiter)
+                waiter.t = self.sim_time
+                waiter.resume()
+            elif len(self.future_events) > 0:
                 self.remove_event().resume()
             self.lock.release()
+        else:
+            with self.signal_condition:
+                self.signalled = True
+                self.signal_condition.notify()
 
     def release_all(self):
         """Resume all pending future events."""
@@ -150,9 +362,24 @@ class Clock:
                 e.resume()
             self.lock.release()
 
+    def thread_event(self, t):
+        """Return the calling thread's FutureEvent, cleared and set to time t.
+
+        A thread only ever waits on one event at a time, so each thread reuses a
+        single FutureEvent (and its threading.Event) for every sleep.
+        """
+        this_event = getattr(self.local, 'event', None)
+        if this_event is None:
+            this_event = FutureEvent(t)
+            self.local.event = this_event
+        else:
+            this_event.t = t
+            this_event.event.clear()
+        return this_event
+
     def add_event(self, future_t):
-        """Schedule a new future event at the given time and return it."""
-        this_event = FutureEvent(future_t)
+        """Schedule the calling thread's event at the given time and return it."""
+        this_event = self.thread_event(future_t)
         self.future_events.add(this_event)
         logger.debug("add_event (after) %s - %s", threading.current_thread().name, self)
         return this_event
@@ -160,9 +387,14 @@ class Clock:
     def remove_event(self):
         """Remove and return the earliest future event."""
         logger.debug("remove_event (before) %s - %s", threading.current_thread().name, self)
-        next_event = self.future_events[0]
-        self.future_events.remove(next_event)
-        return next_event
+        return self.future_events.pop(0)
+
+    def _discard_event(self, event):
+        # FutureEvents compare by time only, so find this exact object among equals
+        for i in range(self.future_events.bisect_left(event), self.future_events.bisect_right(event)):
+            if self.future_events[i] is event:
+                del self.future_events[i]
+                return
 
     def pause(self, event):
         """Pause the current thread on the given event, releasing the lock while waiting."""
@@ -184,8 +416,11 @@ class Clock:
             t = datetime.now()
         return t
 
-    def sleep(self, delta):
-        """Sleep for delta seconds. In simulated mode, advances sim time instead of waiting."""
+    def sleep(self, delta, interrupt=None):
+        """Sleep for delta seconds. In simulated mode, advances sim time instead of waiting.
+
+        In real time, a set interrupt (a threading.Event) ends the sleep early.
+        """
         if delta <= 0:
             return
         if self.time_type != 'REAL': # Simulated time
@@ -195,7 +430,7 @@ class Clock:
             logger.debug("%s active threads %d", threading.current_thread().name, self.active_threads)
             if self.active_threads == 1:
                 next_event = self.remove_event()
-                if str(this_event) != str(next_event):
+                if next_event is not this_event:
                     self.resume(next_event)
                     logger.debug("%s start pause if", threading.current_thread().name)
                     self.pause(this_event)
@@ -211,14 +446,96 @@ class Clock:
                 self.time_type = 'REAL'
                 self.sim_time = datetime.now()
         else: # Real time
-            time.sleep(delta)
+            now = time.monotonic()
+            due = getattr(self.local, 'due', None)
+            due = (now if due is None else due) + delta
+            self.local.due = due
+            wait = due - now if self.catch_up else delta
+            if wait > 0:
+                if interrupt is None:
+                    time.sleep(wait)
+                elif interrupt.wait(wait):
+                    return
+            lateness = max(0.0, time.monotonic() - due)
+            self.lateness = lateness
+            if lateness > self.max_lateness:
+                with self.lateness_lock:
+                    if lateness > self.max_lateness:
+                        self.max_lateness = lateness
+
+    def reset_schedule(self):
+        """Start the calling thread's real-time schedule afresh from now."""
+        self.local.due = None
+
+    def thread_lag(self):
+        """Return how far the calling thread is behind its real-time schedule, in seconds."""
+        due = getattr(self.local, 'due', None)
+        return 0.0 if due is None else max(0.0, time.monotonic() - due)
+
+    def lag(self):
+        """Return the lag of the most recent real-time wake-up, in seconds."""
+        return self.lateness
+
+    def reset_max_lag(self):
+        """Return the largest real-time lag since the previous call, and start a new interval."""
+        with self.lateness_lock:
+            max_lateness = self.max_lateness
+            self.max_lateness = 0.0
+        return max_lateness
+
+    def wait_for_signal(self, timeout=None):
+        """Block until another thread calls end_thread(), or until timeout seconds
+        of clock time have passed (None waits indefinitely).
+
+        In simulated mode the waiting thread resumes at the simulated time the
+        other thread ended, before any later event runs. Only one thread may wait
+        at a time.
+        """
+        if self.time_type != 'REAL':
+            self.lock.acquire()
+            if timeout is not None:
+                this_event = self.add_event(self.sim_time + timedelta(seconds=max(0.0, timeout)))
+            else:
+                this_event = self.thread_event(self.sim_time)
+            self.waiter = this_event
+            if self.active_threads == 1 and len(self.future_events) > 0:
+                next_event = self.remove_event()
+                if next_event is not this_event:
+                    self.resume(next_event)
+                    self.pause(this_event)
+            else:
+                self.pause(this_event)
+            self.waiter = None
+            self.sim_time = this_event.get_time()
+            self.lock.release()
+        else:
+            with self.signal_condition:
+                if not self.signalled:
+                    self.signal_condition.wait(timeout)
+                self.signalled = False
+
+# Real-time lag policies, set with DataDriver(lag_policy=...):
+#   none     sleep the full delay every time; lag is only reported
+#   catchup  sleep until each step's scheduled time, skipping sleeps while behind
+#   drop     catch up, and do not emit records more than max_lag seconds late
+#   shed     catch up, and end any Actor that gets more than max_lag seconds behind
+LAG_POLICIES = ('none', 'catchup', 'drop', 'shed')
+
+# Closed-form runs preallocate ActorTable slots for at most this many Actors; the
+# table grows past it on demand
+ACTOR_TABLE_PREALLOCATE = 100_000
+# Bytes per Actor, and with a memory budget the Actor capacity, are re-estimated every this many spawns
+ACTOR_CAPACITY_INTERVAL = 1024
+# Yielded by closed_form_records, in place of a record, when a checkpoint is due (see ieg/checkpoint.py)
+CHECKPOINT = object()
 
 class DataDriver:
     """Main driver class for generating data. Handles configuration, state machine, and output targets."""
 
-    def __init__(self, name, config, runtime, total_recs, time_type, start_time, max_entities, schedule_config=None, template_name=None):
+    def __init__(self, name, config, runtime, total_recs, time_type, start_time, max_entities, schedule_config=None, template_name=None, column_block_size=0, profiler=None, config_file=None, lag_policy='none', max_lag=1.0, batch_size=0, memory_budget=None, emit_window=None, checkpointer=None, arrival_phase=0.0):
         self.name = name
         self.config = config
+        self.config_file = config_file
 
         if not validate_config(config, template_name=template_name):
             raise ValueError("Configuration is invalid — see log output for details.")
@@ -229,8 +546,11 @@ class DataDriver:
         self.start_time = start_time
         self.max_entities = max_entities
         self.status_msg = 'Creating...'
+        self.profiler = profiler
         self.header = None
         self.jinja_template = None
+        self.template_body = None
+        self.jinja_batch_template = None  # compiled on first use by render_batch
 
         if template_name is not None:
             templates = config.get('templates', {})
@@ -239,6 +559,7 @@ class DataDriver:
                 raise ValueError(f"Template '{template_name}' not found in config. Available: {available}")
             tmpl = templates[template_name]
             self.jinja_template = _jinja_env.from_string(tmpl['body'])
+            self.template_body = tmpl['body']
             if self.header is None and 'header' in tmpl:
                 self.header = tmpl['header']
 
@@ -247,32 +568,48 @@ class DataDriver:
         #
 
         self.global_clock = Clock(time_type, start_time)
+
+        # What to do when real-time Actors fall behind their schedule (see LAG_POLICIES)
+        if lag_policy not in LAG_POLICIES:
+            raise ValueError(f"Unknown lag policy '{lag_policy}'. Choose from: {', '.join(LAG_POLICIES)}")
+        self.lag_policy = lag_policy
+        self.max_lag = None  # lag in seconds beyond which events are dropped or Actors shed
+        self.dropped_events = 0
+        self.shed_actors = 0
+        if time_type == 'REAL' and lag_policy != 'none':
+            self.global_clock.catch_up = True
+            if lag_policy in ('drop', 'shed'):
+                self.max_lag = max_lag
         self.sim_control = Controller(total_recs, runtime, self.global_clock)
         self.schedule = parse_schedule(schedule_config, self.global_clock) if schedule_config else None
 
         # Always write to stdout
-        stdout_lock = threading.Lock()
-        class _StdoutPrinter:
-            def print(self, record):
-                with stdout_lock:
-                    sys.stdout.write(str(record) + '\n')
-                    sys.stdout.flush()
-        self.target_printer = _StdoutPrinter()
+        self.target_printer = StdoutPrinter()
 
         # Remove type validation and default to generator
         self.type = 'generator'
 
-        # Set up emitters list
+        state_desc = self.config.get('states')
+        if not state_desc or not isinstance(state_desc, list) or len(state_desc) == 0:
+            raise RuntimeError("The generator configuration has no states defined.")
+
+        # Set up emitters list. For JSON output, emitters format datetimes as they
+        # build each record, including variables set from clock or timestamp fields.
+        datetime_variables = {v['name'] for s in state_desc for v in s.get('variables', [])
+                              if str(v.get('type', '')).lower() in ('clock', 'timestamp')}
         self.emitters = {}
         for emitter in self.config['emitters']:
             name = emitter['name']
             dimensions = get_dimensions(emitter['dimensions'], self.global_clock)
-            self.emitters[name] = dimensions
+            self.emitters[name] = Emitter(name, dimensions, isoformat=self.jinja_template is None,
+                                          datetime_variables=datetime_variables,
+                                          column_block_size=column_block_size,
+                                          profiler=profiler)
+        if column_block_size > 0:
+            columnar = [name for name, emitter in self.emitters.items() if emitter.columns is not None]
+            logger.info("Columnar generation for emitters: %s", ', '.join(columnar) if columnar else 'none eligible')
 
         # Set up the state machine
-        state_desc = self.config.get('states')
-        if not state_desc or not isinstance(state_desc, list) or len(state_desc) == 0:
-            raise RuntimeError("The generator configuration has no states defined.")
         self.initial_state = None
         self.states = {}
         for state in state_desc:
@@ -283,9 +620,9 @@ class DataDriver:
             # Make emitter optional - handle both missing field and explicit null
             emitter_name = state.get('emitter')  # Returns None if not present
             if emitter_name is not None:
-                dimensions = self.emitters[emitter_name]
+                emitter = self.emitters[emitter_name]
             else:
-                dimensions = None  # No emitter = no record emission
+                emitter = None  # No emitter = no record emission
             if 'variables' not in state.keys():
                 variables = []
             else:
@@ -309,7 +646,7 @@ class DataDriver:
             else:
                 delay = parse_distribution(_zero, clock=self.global_clock)
                 transitions = Transition.parse_transitions(state.get('transitions', []))
-            this_state = State(name, state_type, dimensions, delay, transitions, variables)
+            this_state = State(name, state_type, emitter, delay, transitions, variables)
             self.states[name] = this_state
             if state_type == 'event:start:timer':
                 self.initial_state = this_state
@@ -321,37 +658,191 @@ class DataDriver:
         timer_desc = next(s for s in state_desc if s.get('type') == 'event:start:timer')
         self.rate_delay = parse_distribution(timer_desc['cardinality_distribution'], clock=self.global_clock)
 
+        # In simulated time, clock-independent state graphs are stepped one activity
+        # at a time from an ActorTable instead of running a worker thread per Actor.
+        self.idle_actors = deque()  # pooled Actors whose threads are waiting for a lifecycle
+        self.pool_size = 0
+        self.pool_stopped = False
+        self.lifecycle = None
+        self.actor_table = None
+        self.pending_records = []  # heap of (t, seq, slot): each in-flight Actor's next record
+        self.pending_seq = 0
+        self.end_times = []  # heap of end times of Actors whose last record is out
+        self.horizon = None
+        self.arrivals = None  # ArrivalProcess of the closed-form spawner, set up by closed_form_records
+        self.spawned = 0
+        self.memory_budget = memory_budget  # bytes of Actor state allowed, or None
+        self.actor_capacity = None  # most Actors that fit in memory_budget, re-estimated as the run goes
+        self.actor_bytes = None  # estimated bytes per in-flight Actor (closed-form path only)
+        if time_type == 'SIM' and ClosedFormLifecycle.is_eligible(self.states, self.initial_state):
+            self.lifecycle = ClosedFormLifecycle(self.states, self.initial_state)
+            variable_names = {d.name for state in self.states.values() for d in state.variables}
+            self.actor_table = ActorTable(sorted(variable_names), min(max_entities, ACTOR_TABLE_PREALLOCATE))
+            self.set_actor_variables = self.actor_table.set_variables
+            for emitter in self.emitters.values():
+                emitter.bind_table(self.actor_table)
+            logger.info("Using closed-form lifecycle fast path")
+        elif memory_budget is not None:
+            logger.warning("--memory-budget only applies to the closed-form fast path; ignoring it")
+
+        # Saves the run's state every so often; a run restored from one has resumed set
+        if checkpointer is not None and self.lifecycle is None:
+            raise ValueError("Checkpoints need the closed-form fast path (-s, with no gmm_temporal "
+                             "intermediate timers); this config runs on worker threads")
+        self.checkpointer = checkpointer
+        self.resumed = False
+
+        # (from, until) clock times: records stamped outside [from, until) are generated
+        # for their effect on the Actors but not emitted or counted. A partition of a
+        # backfill starts its clock early so that it opens with Actors already in flight.
+        self.emit_window = emit_window
+
+        # Fraction of a gap the first arrival is held back by, so that the thinned
+        # spawners of a --processes run take turns instead of spawning together
+        self.arrival_phase = arrival_phase
+
+        # With batch_size > 0, records are rendered and written batch_size at a time
+        self.batch_size = batch_size
+        self.batch_writer = None  # BatchWriter shared by worker threads, set up by simulate()
+        self.output_batch = []  # closed-form records waiting for their batch to fill
+        self.json_encode = json.JSONEncoder().encode  # what json.dumps uses with default arguments
+
+        if profiler is not None:
+            self.instrument(profiler)
+
+    def __getstate__(self):
+        # For a checkpoint (see ieg/checkpoint.py): the output, the compiled
+        # templates and the checkpointer itself belong to the process, not the run
+        state = self.__dict__.copy()
+        for name in ('target_printer', 'batch_writer', 'output_batch', 'profiler', 'checkpointer', 'jinja_template',
+                     'jinja_batch_template'):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.target_printer = StdoutPrinter()
+        self.batch_writer = None
+        self.output_batch = []
+        self.profiler = None
+        self.checkpointer = None
+        self.jinja_template = _jinja_env.from_string(self.template_body) if self.template_body is not None else None
+        self.jinja_batch_template = None
+        self.resumed = True
+
+    def instrument(self, profiler):
+        """Wrap each pipeline stage with the profiler's timers (see ieg/profiler.py)."""
+        self.set_variable_values = profiler.timed('sampling', self.set_variable_values)
+        self.render_record = profiler.timed('render_record', self.render_record)
+        self.render_batch = profiler.timed('render_record', self.render_batch)
+        self.global_clock.sleep = profiler.timed('Clock.sleep', self.global_clock.sleep)
+        self.target_printer.print = profiler.timed('stdout', self.target_printer.print)
+        self.target_printer.write = profiler.timed('stdout', self.target_printer.write)
+        for emitter in self.emitters.values():
+            emitter.build = profiler.timed('create_record', emitter.build)
+            if emitter.build_slot is not None:
+                emitter.build_slot = profiler.timed('create_record', emitter.build_slot)
+        if self.lifecycle is not None:
+            self.set_actor_variables = profiler.timed('sampling', self.set_actor_variables)
+            self.lifecycle.walk = profiler.timed('plan', self.lifecycle.walk)
+            self.lifecycle.on_visit = profiler.count_visit
+
 
     def render_record(self, record):
-        """Render a record as a Jinja2 template string, or plain JSON if no template is active."""
+        """Render a record as a Jinja2 template string, or plain JSON if no template is active.
+
+        Without a template, emitters are built with isoformat=True, so records arrive
+        with their datetimes already formatted.
+        """
         if self.jinja_template is not None:
             return self.jinja_template.render(**record)
-        for key, value in record.items():
-            if isinstance(value, datetime):
-                record[key] = value.isoformat()
         return json.dumps(record)
 
-    def create_record(self, dimensions, variables):
-        """Build a record dict from dimensions and variable values."""
-        record = {}
-        for element in dimensions:
-            if isinstance(element, DimensionVariable):
-                record[element.name] = variables[element.variable_name]
+    def render_batch(self, records, buffer=None):
+        """Render a list of records, one per line, as a single UTF-8 buffer.
+
+        Produces the same bytes as render_record() on each record followed by a
+        newline, but renders the whole list in one call and encodes it once.
+        Returns the bytes, or, if buffer (a bytearray or io.BytesIO) is given,
+        appends to it and returns it.
+        """
+        if self.jinja_template is None:
+            text = '\n'.join(map(self.json_encode, records)) + '\n'
+        else:
+            if self.jinja_batch_template is None:
+                fields = []
+                for emitter in self.emitters.values():
+                    fields.extend(f for f in emitter.fields if f not in fields)
+                self.jinja_batch_template = _batch_template(self.template_body, fields) or False
+            if self.jinja_batch_template:
+                text = self.jinja_batch_template.render(records=records)
             else:
-                if isinstance(element, DimensionTimestampClock) or not element.is_missing():
-                    record[element.name] = element.get_stochastic_value()
-        return record
+                text = ''.join(self.jinja_template.render(**record) + '\n' for record in records)
+        data = text.encode('utf-8')
+        if buffer is None:
+            return data
+        if isinstance(buffer, bytearray):
+            buffer += data
+        else:
+            buffer.write(data)
+        return buffer
 
-    def set_variable_values(self, variables, dimensions):
+    def set_variable_values(self, variables, dimensions, now=None):
         """Sample stochastic values from dimensions and store them in the variables dict."""
         for d in dimensions:
-            variables[d.name] = d.get_stochastic_value()
-
-    def worker_thread(self):
-        """Process the state machine, generating records and sending them to the output target."""
+            if now is not None and isinstance(d, DimensionTimestampClock):
+                variables[d.name] = d.get_value_at(now)
+            else:
+                variables[d.name] = d.get_stochastic_value()
+
+    def worker_thread(self, actor):
+        """Run Actor lifecycles one after another on this pooled thread.
+
+        The thread blocks on actor.wakeup between lifecycles. start_actor() resets
+        the Actor and registers the thread with the clock before waking it, and
+        stop_pool() wakes it to return.
+        """
+        if self.time_type == 'REAL':
+            # Real-time threads run side by side, so each draws from generators of its own
+            use_thread_generators()
+        # Checked after the Actor is back in idle_actors, so stop_pool() either
+        # finds it there or has already set pool_stopped
+        while not self.pool_stopped:
+            actor.wakeup.wait()
+            actor.wakeup.clear()
+            if self.pool_stopped:
+                return
+            self.run_lifecycle(actor)
+            # Free the slot and return to the pool before handing over, so a
+            # waiting spawner can reuse this thread straight away
+            self.sim_control.remove_entity()
+            self.idle_actors.append(actor)
+            self.global_clock.end_thread()
+
+    def start_actor(self):
+        """Start a new Actor lifecycle on an idle pooled thread, growing the pool if none is free."""
+        try:
+            actor = self.idle_actors.pop()
+        except IndexError:
+            actor = Actor('W'+str(self.pool_size))
+            self.pool_size += 1
+            target = self.worker_thread if self.profiler is None else self.profiler.thread_target(self.worker_thread)
+            threading.Thread(target=target, args=(actor,), name=actor.name, daemon=True).start()
+        actor.reset(self.initial_state)
         self.global_clock.activate_thread()
-        current_state = self.initial_state
-        variables = {}
+        actor.wakeup.set()
+
+    def stop_pool(self):
+        """End the pooled worker threads: idle ones now, busy ones when their lifecycle ends."""
+        self.pool_stopped = True
+        for actor in list(self.idle_actors):
+            actor.wakeup.set()
+
+    def run_lifecycle(self, actor):
+        """Process the state machine for one Actor, generating records and sending them to the output target."""
+        current_state = actor.state
+        variables = actor.variables
+        self.global_clock.reset_schedule()
         while True:
             if current_state is None:
                 raise RuntimeError("Unexpected error: current state of the state machine is None.")
@@ -361,14 +852,27 @@ class DataDriver:
             delta = float(current_state.delay.get_sample())
             self.global_clock.sleep(delta)
             self.status_msg=f"Running, Sim Clock: {self.global_clock.now()}"
+            if self.profiler is not None:
+                self.profiler.count_visit(current_state.name)
             # Set variables (activities only; evaluated before emission)
             self.set_variable_values(variables, current_state.variables)
-            # Only emit record if state has dimensions (emitter was specified)
-            if current_state.dimensions is not None:
-                record = self.create_record(current_state.dimensions, variables)
-                formatted_record = self.render_record(record)
-                self.target_printer.print(formatted_record)
-                self.sim_control.inc_rec_count()
+            late = self.max_lag is not None and self.global_clock.thread_lag() > self.max_lag
+            if late and self.lag_policy == 'shed':
+                with self.sim_control.lock:
+                    self.shed_actors += 1
+                logger.debug("Thread %s shed %.3fs behind schedule", threading.current_thread().name, self.global_clock.thread_lag())
+                break
+            # Only emit record if an emitter was specified
+            if late and current_state.emitter is not None:
+                with self.sim_control.lock:
+                    self.dropped_events += 1
+            elif current_state.emitter is not None and self.in_emit_window() and self.sim_control.reserve_record():
+                record = current_state.emitter.create_record(variables)
+                if self.batch_writer is not None:
+                    self.batch_writer.add(record)
+                else:
+                    formatted_record = self.render_record(record)
+                    self.target_printer.print(formatted_record)
             if self.sim_control.is_done():
                 break
             next_state_name = current_state.get_next_state_name()
@@ -379,53 +883,271 @@ class DataDriver:
                 logger.debug("Thread %s reached event:end", threading.current_thread().name)
                 break
             current_state = next_state
+            actor.state = current_state
 
-        self.global_clock.end_thread()
-        self.sim_control.remove_entity()
+    def in_emit_window(self):
+        """Return True if a record stamped with the current clock time is to be emitted."""
+        if self.emit_window is None:
+            return True
+        return self.emit_window[0] <= self.global_clock.now() < self.emit_window[1]
 
     def spawning_thread(self):
-        """Spawn worker threads at the rate set by the event:start:timer's cardinality_distribution."""
+        """Start Actors at the rate set by the event:start:timer's cardinality_distribution."""
         self.global_clock.activate_thread()
+        if self.time_type == 'REAL':
+            use_thread_generators()
+        arrivals = ArrivalProcess(self.rate_delay, self.global_clock.get_start_time())
+        if self.arrival_phase:
+            self.spawner_sleep(arrivals.next_gap() * self.arrival_phase)
 
         # Spawn the workers in a separate thread so we can stop the whole thing in the middle of spawning if necessary
         while not self.sim_control.is_done():
             multiplier = self.schedule.get_multiplier() if self.schedule else 1.0
             effective_max = max(1, int(self.max_entities * multiplier))
             if self.sim_control.get_entity_count() < effective_max:
-                thread_name = 'W'+str(self.sim_control.get_entity_count())
                 self.sim_control.add_entity()
-                t = threading.Thread(target=self.worker_thread, name=thread_name, daemon=True)
-                t.start()
+                # Draw the gap before the Actor starts, so that in simulated time
+                # the spawner never runs alongside it.
+                gap = arrivals.next_gap()
+                self.start_actor()
                 # add a sleep event before spawning the next
-                self.global_clock.sleep(float(self.rate_delay.get_sample()))
+                self.spawner_sleep(gap)
             else:
-                self.global_clock.sleep(5.0)
+                # At capacity: sleep until an Actor ends rather than polling
+                self.global_clock.wait_for_signal(self.capacity_wait_timeout())
+                arrivals.restart(self.global_clock.get_duration())
+                self.global_clock.reset_schedule()
 
         # shut off clock simulator
         self.global_clock.end_thread()
 
+    def spawner_sleep(self, gap):
+        """Sleep the spawner for gap seconds, or in real time until the run ends if that is sooner.
+
+        A gap can be long (--processes N spawns N times less often in each process),
+        and the spawner only checks is_done() between sleeps.
+        """
+        clock = self.global_clock
+        if clock.time_type != 'REAL':
+            clock.sleep(gap)
+            return
+        if self.sim_control.t is not None:
+            gap = min(gap, max(0.0, self.sim_control.t - self.sim_control.get_duration()))
+        clock.sleep(gap, interrupt=self.sim_control.thread_end_event)
+
+    def capacity_wait_timeout(self):
+        """How long the spawner may wait at capacity before re-checking on its own:
+        until the end of a -r run, and no more than 5s when a schedule can raise the cap."""
+        timeout = None
+        if self.sim_control.t is not None:
+            timeout = max(0.0, self.sim_control.t - self.sim_control.get_duration())
+        if self.schedule is not None:
+            timeout = 5.0 if timeout is None else min(timeout, 5.0)
+        return timeout
+
+    def advance_actor(self, slot, t, state):
+        """Move a closed-form Actor to its next record, or end it.
+
+        state is the Actor's next activity, reached at t, or None if its lifecycle
+        ended at t. Activities without an emitter set their variables and are
+        passed through; the first one with an emitter queues the Actor's next record.
+        """
+        table = self.actor_table
+        while state is not None:
+            if state.variables:
+                self.set_actor_variables(slot, state.variables, t)
+            if state.emitter is not None:
+                table.states[slot] = state
+                heapq.heappush(self.pending_records, (t, self.pending_seq, slot))
+                self.pending_seq += 1
+                return
+            t, state = self.lifecycle.next_step(state, t, self.horizon)
+        table.release(slot)
+        # The Actor keeps its concurrency slot until its lifecycle's end time
+        heapq.heappush(self.end_times, t)
+
+    def pending_records_due(self, now):
+        """Yield every queued record due at or before now, in timestamp order.
+
+        Each record is counted when the consumer asks for the next one, after it has
+        been written, so a run with a record limit stops without building an extra
+        one. The Actor then steps on to its next record, which may also be due.
+        Only the record limit and terminate() stop this early: records queued before
+        the end of a -r run are still due once the clock has passed it.
+        """
+        pending = self.pending_records
+        table = self.actor_table
+        next_step = self.lifecycle.next_step
+        emit_from, emit_to = self.emit_window if self.emit_window is not None else (None, None)
+        while pending and pending[0][0] <= now and not self.sim_control.is_stopped():
+            t, _, slot = heapq.heappop(pending)
+            state = table.states[slot]
+            if (emit_from is None or t >= emit_from) and (emit_to is None or t < emit_to):
+                yield state.emitter.build_slot(slot, t)
+                self.sim_control.inc_rec_count()
+            self.advance_actor(slot, *next_step(state, t, self.horizon))
+
+    def update_actor_capacity(self):
+        """Re-estimate the bytes per Actor and, with a memory budget, how many Actors fit in it."""
+        if self.actor_table.in_use:
+            self.actor_bytes = self.actor_table.bytes_per_actor(self.pending_records[0] if self.pending_records else None)
+        if self.memory_budget is None or self.actor_bytes is None:
+            return
+        capacity = max(1, int(self.memory_budget // self.actor_bytes))
+        if capacity < self.max_entities and (self.actor_capacity is None or self.actor_capacity >= self.max_entities):
+            logger.warning("Memory budget of %d bytes holds about %d Actors at %d bytes each; limiting -m %d to %d",
+                           self.memory_budget, capacity, self.actor_bytes, self.max_entities, capacity)
+        self.actor_capacity = capacity
+
+    def closed_form_records(self):
+        """Spawn closed-form Actors and yield their records in timestamp order.
+
+        Runs entirely in the calling thread; the simulation advances only as records
+        are consumed. closed_form_thread writes them to the output, and ieg.generate
+        hands them to library callers. Each Actor holds a concurrency slot until its
+        lifecycle's end time, but only a slot in the ActorTable and one queued record
+        while it has records left to emit.
+        """
+        self.global_clock.activate_thread()
+        try:
+            # A run restored from a checkpoint carries on with its own
+            if self.arrivals is None:
+                if self.sim_control.t is not None:
+                    self.horizon = self.global_clock.get_start_time() + timedelta(seconds=self.sim_control.t)
+                self.arrivals = ArrivalProcess(self.rate_delay, self.global_clock.get_start_time())
+            end_times = self.end_times
+            pending = self.pending_records
+            arrivals = self.arrivals
+            checkpointer = self.checkpointer
+
+            while not self.sim_control.is_done():
+                # Everything the loop carries from one pass to the next is on self here
+                if checkpointer is not None and checkpointer.is_due():
+                    yield CHECKPOINT
+                now = self.global_clock.now()
+                while end_times and end_times[0] <= now:
+                    heapq.heappop(end_times)
+                    self.sim_control.remove_entity()
+                multiplier = self.schedule.get_multiplier() if self.schedule else 1.0
+                effective_max = max(1, int(self.max_entities * multiplier))
+                if self.actor_capacity is not None:
+                    effective_max = min(effective_max, self.actor_capacity)
+                if self.sim_control.get_entity_count() < effective_max:
+                    self.sim_control.add_entity()
+                    self.spawned += 1
+                    self.advance_actor(self.actor_table.acquire(), *self.lifecycle.first_step(now, self.horizon))
+                    if self.spawned % ACTOR_CAPACITY_INTERVAL == 1:
+                        self.update_actor_capacity()
+                    yield from self.pending_records_due(now)
+                    self.global_clock.sleep(arrivals.next_gap())
+                else:
+                    # Capacity frees up when an Actor ends. Actors learn their end time
+                    # as they step, so until one is known, emit records ahead of the
+                    # clock: nothing can spawn before that end, so they are still in
+                    # timestamp order. Keep re-checking at least every 5s in case the
+                    # schedule raises the cap.
+                    while not end_times and pending and not self.sim_control.is_done():
+                        yield from self.pending_records_due(pending[0][0])
+                    if end_times:
+                        self.global_clock.sleep(min(5.0, (end_times[0] - now).total_seconds()))
+                    arrivals.restart(self.global_clock.get_duration())
+                self.status_msg = f"Running, Sim Clock: {self.global_clock.now()}"
+                yield from self.pending_records_due(self.global_clock.now())
+            # The clock stops at the first sleep past the end of a -r run, which
+            # can be well before the last records queued ahead of the end
+            if self.horizon is not None:
+                yield from self.pending_records_due(self.horizon)
+        finally:
+            self.global_clock.end_thread()
+            if self.actor_bytes is not None:
+                logger.info("Actor state: peak %d Actors in flight, about %d bytes each",
+                            self.actor_table.peak, self.actor_bytes)
+
+    def closed_form_thread(self):
+        """Write the closed-form records to the output target.
+
+        Replaces spawning_thread and the worker threads when self.lifecycle is set.
+        """
+        records = self.closed_form_records()
+        if self.checkpointer is not None:
+            self.write_checkpointed(records)
+            return
+        if self.batch_size > 0:
+            # Single writer: no need for a BatchWriter's lock
+            batch = self.output_batch
+            for record in records:
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    self.target_printer.write(self.render_batch(batch))
+                    batch.clear()
+            if batch:
+                self.target_printer.write(self.render_batch(batch))
+                batch.clear()
+            return
+        for record in records:
+            self.target_printer.print(self.render_record(record))
+
+    def write_checkpointed(self, records):
+        """Write records as closed_form_thread does, saving a checkpoint wherever one is yielded.
+
+        Everything before the checkpoint is written out first, so that the
+        checkpoint's output offset and state describe the same point in the run.
+        """
+        batch = self.output_batch
+        for record in records:
+            if record is CHECKPOINT:
+                if batch:
+                    self.target_printer.write(self.render_batch(batch))
+                    batch.clear()
+                self.checkpointer.save(self, self.target_printer.tell())
+            elif self.batch_size > 0:
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    self.target_printer.write(self.render_batch(batch))
+                    batch.clear()
+            else:
+                self.target_printer.print(self.render_record(record))
+        if batch:
+            self.target_printer.write(self.render_batch(batch))
+            batch.clear()
+
+    def unwritten_records(self):
+        """Return the number of records generated but not yet written: those waiting for a --batch to fill."""
+        if self.batch_writer is not None:
+            return self.batch_writer.pending()
+        return len(self.output_batch)
+
     def get_new_time_for_record(self):
         """Return the current clock time formatted as a string."""
         return self.global_clock.now().strftime('%Y-%m-%d %H:%M:%S.%f')
 
     def simulate(self):
         """Start the simulation, spawning workers and running until completion."""
-        if self.header:
+        if self.header and not self.resumed:
             self.target_printer.print(self.header)
         self.status_msg = f'Starting {self.type} job.'
         thread_name = 'Spawning'
-        thrd = threading.Thread(target=self.spawning_thread, args=(), name=thread_name, daemon=True)
+        target = self.closed_form_thread if self.lifecycle is not None else self.spawning_thread
+        if self.batch_size > 0 and self.lifecycle is None:
+            self.batch_writer = BatchWriter(self.render_batch, self.target_printer.write, self.batch_size)
+        if self.profiler is not None:
+            target = self.profiler.thread_target(target)
+        thrd = threading.Thread(target=target, args=(), name=thread_name, daemon=True)
         thrd.start()
         thrd.join()
+        self.stop_pool()
+        if self.batch_writer is not None:
+            self.batch_writer.flush()
 
     def terminate(self):
         """Terminate the simulation."""
         self.sim_control.terminate()
+        self.stop_pool()
 
     def report(self):
         """Return a dict of simulation status and statistics."""
         return {  'name': self.name,
-                  'config_file': self.config['config_file'],
+                  'config_file': self.config_file,
                   'active_sessions': self.sim_control.get_entity_count(),
                   'total_records': self.sim_control.get_record_count(),
                   'start_time': self.sim_control.get_start_time().strftime('%Y-%m-%d %H:%M:%S'),
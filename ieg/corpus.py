@@ -0,0 +1,356 @@
+"""Pre-generated corpora: generate records once in simulated time, replay them in real time at any rate.
+
+write_corpus() runs a config in simulated time and stores its rendered records in
+one file, with each record's time relative to the start. Every timestamp inside a
+record is found as it is stored: each datetime the record holds (its clock field,
+timestamp fields and datetime variables) is formatted in the ways the output can
+show it, ISO 8601 for JSON and also the template's strftime formats, epoch
+seconds or milliseconds and str() for a template, and the places those strings
+appear in the rendered text are kept as spans. Nothing else is re-rendered later.
+
+Corpus opens the file as a memory map, so replay reads records straight from the
+page cache and several processes can share one corpus. replay() writes the
+records in real time: record i of loop k is due (t_i + k * duration) / speed
+seconds after the replay starts, and each timestamp span is rewritten to the time
+the record is due, plus the timestamp's own offset from the record's time, also
+divided by speed. The corpus loops until the record or time limit. Pacing uses a
+real-time Clock with catch-up (see Clock.sleep), so a replay that falls behind
+writes without sleeping until it is back on schedule, and its lag is reported.
+
+Like a partition (see ieg/parallel.py), a corpus starts its clock a warm-up period
+early and keeps only the records after it, so it opens with Actors in flight and
+the rate does not dip where the replay loops.
+
+File layout: an 8-byte magic and the little-endian offset of the footer, then the
+rendered records, then the arrays (record times, record offsets, span index and
+spans), then the footer, a JSON object with the arrays' positions and sizes, the
+timestamp formats, the template header and the corpus duration.
+"""
+
+import io
+import json
+import logging
+import mmap
+import re
+import struct
+import time
+from datetime import datetime, timedelta, timezone
+
+import isodate
+import numpy as np
+
+from ieg.api import _threaded_records
+from ieg.core import Clock, DataDriver
+from ieg.parallel import warmup_seconds
+from ieg.validate import validate_config
+
+logger = logging.getLogger('ieg')
+
+MAGIC = b'IEGCORP1'
+_HEADER = struct.Struct('<8sQ')
+# A timestamp inside a record: where it is, how it is formatted (an index into
+# the footer's formats) and its offset from the record's time in microseconds
+SPAN_DTYPE = np.dtype([('position', '<u4'), ('length', '<u4'), ('format', '<u4'), ('delta', '<i8')])
+# Records are read from the arrays this many at a time
+REPLAY_CHUNK = 4096
+# replay() writes out what it has formatted once it holds this many bytes
+REPLAY_BUFFER = 1 << 20
+_STRFTIME = re.compile(r'''strftime\(\s*(['"])(.+?)\1\s*\)''')
+_ISO = re.compile(r'\d{4}-\d\d-\d\dT\d\d:\d\d')
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _format(spec, value):
+    """Format datetime value as spec, one of the footer's formats, describes."""
+    kind, pattern, aware = spec
+    if aware:
+        value = value.replace(tzinfo=timezone.utc)
+    if kind == 'iso':
+        return value.isoformat()
+    if kind == 'str':
+        return str(value)
+    if kind == 'strftime':
+        return value.strftime(pattern)
+    seconds = (value.replace(tzinfo=None) - _EPOCH).total_seconds()
+    return str(int(seconds * 1000)) if kind == 'epoch_ms' else str(int(seconds))
+
+
+class CorpusWriter:
+    """Stores rendered records and their timestamp spans in a corpus file.
+
+    template_body is the template the records were rendered with, or None for
+    JSON; it decides which timestamp formats are looked for. clock_fields are the
+    names of clock fields, whose value is a record's time.
+    """
+
+    def __init__(self, path, start_time, template_body=None, clock_fields=(), header=None):
+        self.path = path
+        self.start_time = start_time.replace(tzinfo=None)
+        self.header = header
+        self.clock_fields = tuple(clock_fields)
+        if template_body is None:
+            self.formats = [('iso', None, True), ('iso', None, False)]
+        else:
+            patterns = dict.fromkeys(m.group(2) for m in _STRFTIME.finditer(template_body))
+            self.formats = [('strftime', p, aware) for p in patterns for aware in (True, False)]
+            self.formats += [(kind, None, aware) for kind in ('iso', 'str') for aware in (True, False)]
+            self.formats += [('epoch_ms', None, False), ('epoch', None, False)]
+        self.json = template_body is None
+        self.file = open(path, 'wb')
+        self.file.write(_HEADER.pack(MAGIC, 0))
+        self.size = 0
+        self.times = []
+        self.offsets = [0]
+        self.span_index = [0]
+        self.spans = []
+        self.last_time = self.start_time
+
+    def __str__(self):
+        return 'CorpusWriter(path='+self.path+', records='+str(len(self.times))+')'
+
+    def record_time(self, record):
+        """Return the record's time, from its clock field, as a naive datetime."""
+        for name in self.clock_fields:
+            value = record.get(name)
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            if isinstance(value, datetime):
+                return value.replace(tzinfo=None)
+        return self.last_time  # a record without a clock field
+
+    def datetimes(self, record):
+        """Return the datetimes a record holds, as formatted for JSON or for its template."""
+        values = []
+        for value in record.values():
+            if isinstance(value, datetime):
+                values.append(value)
+            elif self.json and isinstance(value, str) and _ISO.match(value):
+                try:
+                    values.append(datetime.fromisoformat(value))
+                except ValueError:
+                    pass
+        return values
+
+    def add(self, record, text):
+        """Store a record dict's rendered text, without its newline."""
+        t = self.record_time(record)
+        self.last_time = t
+        data = (text + '\n').encode('utf-8')
+        spans = []
+        taken = []
+        for value in self.datetimes(record):
+            aware = value.tzinfo is not None
+            naive = value.replace(tzinfo=None)
+            delta = (naive - t) // timedelta(microseconds=1)
+            candidates = [(len(s), i, s) for i, spec in enumerate(self.formats)
+                          if spec[2] == aware or spec[0] in ('epoch', 'epoch_ms')
+                          for s in (_format(spec, naive).encode('utf-8'),)]
+            # Longest first, so that a date and time are one span rather than two
+            for length, i, s in sorted(candidates, key=lambda c: -c[0]):
+                position = data.find(s)
+                while position >= 0:
+                    end = position + length
+                    if not any(position < b and a < end for a, b in taken):
+                        taken.append((position, end))
+                        spans.append((position, length, i, delta))
+                    position = data.find(s, end)
+        spans.sort()
+        self.file.write(data)
+        self.size += len(data)
+        self.times.append((t - self.start_time) // timedelta(microseconds=1))
+        self.offsets.append(self.size)
+        self.spans.extend(spans)
+        self.span_index.append(len(self.spans))
+
+    def close(self, duration):
+        """Write the arrays and the footer. duration is the corpus length in seconds, from its start."""
+        sections = {}
+        position = _HEADER.size + self.size
+        arrays = [
+            ('times', np.array(self.times, dtype='<i8')),
+            ('offsets', np.array(self.offsets, dtype='<i8')),
+            ('span_index', np.array(self.span_index, dtype='<i8')),
+            ('spans', np.array(self.spans, dtype=SPAN_DTYPE)),
+        ]
+        for name, array in arrays:
+            padding = -position % 8
+            self.file.write(b'\0' * padding)
+            position += padding
+            sections[name] = [position, len(array)]
+            self.file.write(array.tobytes())
+            position += array.nbytes
+        footer = {
+            'records': len(self.times),
+            'bytes': self.size,
+            'duration': duration,
+            'start_time': self.start_time.isoformat(),
+            'header': self.header,
+            'formats': self.formats,
+            'sections': sections,
+        }
+        self.file.write(json.dumps(footer).encode('utf-8'))
+        self.file.seek(0)
+        self.file.write(_HEADER.pack(MAGIC, position))
+        self.file.close()
+
+
+class Corpus:
+    """A corpus file, memory-mapped read-only."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, footer_offset = _HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or footer_offset == 0:
+            self.map.close()
+            raise ValueError(f"'{path}' is not a complete corpus file")
+        footer = json.loads(self.map[footer_offset:])
+        self.records = footer['records']
+        self.duration = footer['duration']
+        self.start_time = datetime.fromisoformat(footer['start_time'])
+        self.header = footer['header']
+        self.formats = [tuple(spec) for spec in footer['formats']]
+        self.data = memoryview(self.map)[_HEADER.size:]  # the rendered records, indexed by offsets
+        arrays = {}
+        for name, dtype in (('times', '<i8'), ('offsets', '<i8'), ('span_index', '<i8'), ('spans', SPAN_DTYPE)):
+            offset, count = footer['sections'][name]
+            arrays[name] = np.frombuffer(self.map, dtype=dtype, count=count, offset=offset)
+        self.times = arrays['times']
+        self.offsets = arrays['offsets']
+        self.span_index = arrays['span_index']
+        self.spans = arrays['spans']
+
+    def __str__(self):
+        return 'Corpus(path='+self.path+', records='+str(self.records)+', duration='+str(self.duration)+')'
+
+    def close(self):
+        self.data.release()
+        self.times = self.offsets = self.span_index = self.spans = None
+        self.map.close()
+
+
+def write_corpus(path, config, start_time, runtime=None, total_recs=None, warmup=None, **driver_options):
+    """Generate a corpus in simulated time from start_time, for runtime (ISO 8601) or total_recs records.
+
+    The clock starts warmup seconds before start_time (default:
+    ieg.parallel.warmup_seconds()), and only records from start_time on are kept.
+    driver_options are passed to the DataDriver (max_entities, template_name,
+    schedule_config and so on). Returns the number of records stored.
+    """
+    if not validate_config(config, template_name=driver_options.get('template_name')):
+        raise ValueError("Configuration is invalid — see log output for details.")
+    if warmup is None:
+        warmup = warmup_seconds(config)
+    clock_start = start_time - timedelta(seconds=warmup)
+    end_time = None
+    if runtime is not None:
+        try:
+            seconds = isodate.parse_duration(runtime).total_seconds()
+        except Exception as e:
+            raise ValueError(f"Error parsing runtime '{runtime}': {e}")
+        end_time = start_time + timedelta(seconds=seconds)
+        runtime = isodate.duration_isoformat(end_time - clock_start)
+    driver = DataDriver(name='corpus', config=config, runtime=runtime, total_recs=total_recs, time_type='SIM',
+                        start_time=clock_start, emit_window=(start_time, end_time or datetime.max),
+                        **driver_options)
+    clock_fields = [d['name'] for e in config['emitters'] for d in e['dimensions'] if d.get('type') == 'clock']
+    writer = CorpusWriter(path, start_time, driver.template_body, clock_fields, driver.header)
+    render = driver.render_record
+    driver.header = None
+    # Hand over the record dicts themselves; each is rendered here and stored with its text
+    driver.render_record = lambda record: record
+    if driver.lifecycle is not None:
+        stream = driver.closed_form_records()
+    else:
+        stream = _threaded_records(driver)
+    for record in stream:
+        writer.add(record, render(record))
+    if end_time is not None:
+        duration = (end_time - start_time).total_seconds()
+    else:
+        # Without a time limit, the corpus ends one mean gap after its last record
+        last = writer.times[-1] / 1e6 if writer.times else 0.0
+        duration = last * len(writer.times) / max(1, len(writer.times) - 1)
+    writer.close(duration)
+    logger.info("Corpus %s: %d records, %.1f MB, %s of data, %d timestamp spans",
+                path, len(writer.times), writer.size / 1e6, timedelta(seconds=duration), len(writer.spans))
+    return len(writer.times)
+
+
+def replay(corpus, printer, speed=1.0, total_recs=None, runtime=None, start_time=None):
+    """Write corpus records to printer in real time, speed times faster than they were generated.
+
+    Loops over the corpus until total_recs records have been written or runtime
+    seconds of real time have passed; with neither, forever. Timestamps count from
+    start_time, a naive datetime, instead of the time the replay starts if it is
+    given: at speed 1, the corpus start time gives back its records as they were
+    generated. printer receives the
+    template header, if any, with print() and the records with write(), a buffer at
+    a time. Returns a dict of records, loops and the largest lag in seconds.
+    """
+    if speed <= 0:
+        raise ValueError(f"Replay speed must be positive, got {speed}")
+    if corpus.records == 0:
+        raise ValueError(f"Corpus '{corpus.path}' has no records")
+    if corpus.duration <= 0:
+        raise ValueError(f"Corpus '{corpus.path}' has no duration to loop over")
+    if corpus.header:
+        printer.print(corpus.header)
+    clock = Clock('REAL', datetime.now())
+    clock.catch_up = True
+    base = start_time if start_time is not None else clock.get_start_time()
+    started = time.monotonic()
+    formats = [lambda value, spec=spec: _format(spec, value).encode('utf-8') for spec in corpus.formats]
+    data = corpus.data
+    loop_micros = int(corpus.duration * 1e6)
+    written = 0
+    loop = 0
+    scheduled = 0.0  # seconds after the start at which the replay last slept until
+    max_lag = 0.0
+    buffer = io.BytesIO()
+    try:
+        while True:
+            for first in range(0, corpus.records, REPLAY_CHUNK):
+                last = min(first + REPLAY_CHUNK, corpus.records)
+                times = corpus.times[first:last].tolist()
+                offsets = corpus.offsets[first:last + 1].tolist()
+                span_index = corpus.span_index[first:last + 1].tolist()
+                spans = corpus.spans[span_index[0]:span_index[-1]].tolist()
+                span_base = span_index[0]
+                for i, micros in enumerate(times):
+                    due = (micros + loop * loop_micros) / 1e6 / speed
+                    if runtime is not None and due >= runtime:
+                        return {'records': written, 'loops': loop, 'max_lag': max_lag}
+                    now = time.monotonic() - started
+                    if due > now:
+                        printer.write(buffer.getvalue())
+                        buffer = io.BytesIO()
+                        clock.sleep(due - scheduled)
+                        scheduled = due
+                    elif now - due > max_lag:
+                        max_lag = now - due
+                    start = offsets[i]
+                    end = offsets[i + 1]
+                    s0 = span_index[i] - span_base
+                    s1 = span_index[i + 1] - span_base
+                    if s0 == s1:
+                        buffer.write(data[start:end])
+                    else:
+                        t = base + timedelta(seconds=due)
+                        position = start
+                        for offset, length, spec, delta in spans[s0:s1]:
+                            buffer.write(data[position:start + offset])
+                            buffer.write(formats[spec](t + timedelta(microseconds=delta / speed)))
+                            position = start + offset + length
+                        buffer.write(data[position:end])
+                    written += 1
+                    if total_recs is not None and written >= total_recs:
+                        return {'records': written, 'loops': loop, 'max_lag': max_lag}
+                    if buffer.tell() >= REPLAY_BUFFER:
+                        printer.write(buffer.getvalue())
+                        buffer = io.BytesIO()
+            loop += 1
+    finally:
+        if buffer.tell():
+            printer.write(buffer.getvalue())
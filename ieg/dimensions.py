@@ -9,19 +9,59 @@ See docs/field-generators.md for the config-level reference.
 """
 
 import logging
-import random
+import os
 import string
 import re
+import threading
 from datetime import datetime, timezone
+import numpy as np
+from ieg.rng import rng
 from ieg.distributions import parse_distribution, parse_timestamp_distribution, validate_distribution_desc
+from ieg.entities import EntityRegistry, load_spec, validate_spec
+from ieg.lookup import ValueFile
 
 logger = logging.getLogger('ieg')
 
+def _columnar(*dists):
+    """Return True if every given distribution (None for unused ones) can draw samples a column at a time."""
+    return all(d is None or hasattr(d, 'get_samples') for d in dists)
+
+def _pool_column(pool, dist, n):
+    """Pick n values from pool, using samples from dist as clamped indexes."""
+    index = dist.get_samples(n).astype(np.int64)
+    np.clip(index, 0, len(pool) - 1, out=index)
+    return [pool[i] for i in index.tolist()]
+
 #
 # Classes for different types of emitter dimension
 #
+# Every dimension class declares __slots__: a config builds a few dozen of these
+# objects, but create_record() reads their attributes for every record.
+#
+
+class DimensionNullable:
+    """
+    Base class for dimensions that support percent_nulls and percent_missing.
+
+    Parses the name and both percentages from the config and provides is_missing().
+    Subclasses call __init__ first and add their own slots.
+    """
+    __slots__ = ('name', 'percent_nulls', 'percent_missing')
+
+    def __init__(self, desc):
+        self.name = desc['name']
+        self.percent_nulls = desc.get('percent_nulls', 0) / 100.0
+        self.percent_missing = desc.get('percent_missing', 0) / 100.0
 
-class DimensionBase:
+    def is_missing(self):
+        """Return True if the dimension should be left out of this record."""
+        return rng.random.random() < self.percent_missing
+
+    def supports_columns(self):
+        """Return True if get_stochastic_values() can generate this dimension a column at a time."""
+        return False
+
+class DimensionBase(DimensionNullable):
     """
     Base class for defining emitter dimensions.
 
@@ -30,6 +70,7 @@ class DimensionBase:
     generating stochastic values and JSON field strings, which are intended to be
     overridden by subclasses.
     """
+    __slots__ = ('cardinality', 'cardinality_distribution')
 
     def __init__(self, desc):
         """
@@ -43,15 +84,7 @@ class DimensionBase:
         Raises:
             Exception: If 'cardinality' or 'cardinality_distribution' is missing when required.
         """
-        self.name = desc['name']
-        if 'percent_nulls' in desc.keys():
-            self.percent_nulls = desc['percent_nulls'] / 100.0
-        else:
-            self.percent_nulls = 0.0
-        if 'percent_missing' in desc.keys():
-            self.percent_missing = desc['percent_missing'] / 100.0
-        else:
-            self.percent_missing = 0.0
+        super().__init__(desc)
 
         if 'cardinality' not in desc.keys():
                 raise Exception(f'Dimension {self.name} has no value for cardinality.')
@@ -124,6 +157,16 @@ class DimensionBase:
             return self.cardinality[index]
         return self._get_raw_value()
 
+    def _get_raw_values(self, n):
+        """Generate n raw values at once. Overridden by subclasses that support columns."""
+        raise NotImplementedError("Unexpected error: Subclasses that support columns must implement _get_raw_values()")
+
+    def get_stochastic_values(self, n):
+        """Return a list of n values, as get_stochastic_value() would, sampled a column at a time."""
+        if self.cardinality is not None:
+            return _pool_column(self.cardinality, self.cardinality_distribution, n)
+        return self._get_raw_values(n)
+
     def get_json_field_string(self):
         """
         Generate a JSON field string representation of the dimension.
@@ -132,7 +175,7 @@ class DimensionBase:
             str: A JSON-formatted string representing the dimension's name and value.
                  If the value is null, the string will include "null".
         """
-        if random.random() < self.percent_nulls:
+        if rng.random.random() < self.percent_nulls:
             s = '"'+self.name+'": null'
         else:
             if self.cardinality is None:
@@ -147,16 +190,14 @@ class DimensionBase:
             s = '"'+self.name+'":'+str(value)
         return s
 
-    def is_missing(self):
-        # Return True if the dimension value is missing.
-        return random.random() < self.percent_missing
-
 #
 #  LONG dimensions
 #
 
 class DimensionInt(DimensionBase):
     """Generates integer values from a numeric distribution. Config type: "int"."""
+    __slots__ = ('value_distribution',)
+
     def __init__(self, desc):
         self.value_distribution = parse_distribution(desc['distribution'])
         super().__init__(desc)
@@ -171,12 +212,20 @@ class DimensionInt(DimensionBase):
     def _get_raw_value(self):
         return int(self.value_distribution.get_sample())
 
+    def supports_columns(self):
+        return _columnar(self.value_distribution, self.cardinality_distribution)
+
+    def _get_raw_values(self, n):
+        return self.value_distribution.get_samples(n).astype(np.int64).tolist()
+
 #
 # FLOAT dimensions
 #
 
 class DimensionFloat(DimensionBase):
     """Generates float values from a numeric distribution with optional decimal precision. Config type: "float"."""
+    __slots__ = ('value_distribution', 'precision')
+
     def __init__(self, desc):
         self.value_distribution = parse_distribution(desc['distribution'])
         if 'precision' in desc:
@@ -205,8 +254,14 @@ class DimensionFloat(DimensionBase):
     def _get_raw_value(self):
         return float(self.value_distribution.get_sample())
 
+    def supports_columns(self):
+        return _columnar(self.value_distribution, self.cardinality_distribution)
+
+    def _get_raw_values(self, n):
+        return self.value_distribution.get_samples(n).astype(np.float64).tolist()
+
     def get_json_field_string(self):
-        if random.random() < self.percent_nulls:
+        if rng.random.random() < self.percent_nulls:
             s = '"'+self.name+'": null'
         else:
             if self.cardinality is None:
@@ -225,23 +280,18 @@ class DimensionFloat(DimensionBase):
                 s = '"'+self.name+'":'+str(format%value)
         return s
 
-class DimensionCounter:
+class DimensionCounter(DimensionNullable):
     """Emits a sequentially incrementing integer. Config type: "counter".
 
     The counter is per-instance, not global — each DimensionCounter object maintains
-    its own sequence. Useful for surrogate keys within a single emitter.
+    its own sequence. Useful for surrogate keys within a single emitter. Each value
+    is taken under a lock, so threads sharing the emitter never get the same one.
     Fields: start (default 0), increment (default 1).
     """
+    __slots__ = ('start', 'increment', 'value', 'lock')
+
     def __init__(self, desc):
-        self.name = desc['name']
-        if 'percent_nulls' in desc.keys():
-            self.percent_nulls = desc['percent_nulls'] / 100.0
-        else:
-            self.percent_nulls = 0.0
-        if 'percent_missing' in desc.keys():
-            self.percent_missing = desc['percent_missing'] / 100.0
-        else:
-            self.percent_missing = 0.0
+        super().__init__(desc)
         if 'start' in desc.keys():
             self.start = desc['start']
         else:
@@ -251,6 +301,18 @@ class DimensionCounter:
         else:
             self.increment = 1
         self.value = self.start
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        # For a checkpoint (see ieg/checkpoint.py): the lock is recreated on load
+        return {name: getattr(self, name) for name in ('name', 'percent_nulls', 'percent_missing',
+                                                       'start', 'increment', 'value')}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.lock = threading.Lock()
+
     def __str__(self):
         s = 'DimensionCounter(name='+self.name
         if self.start != 0:
@@ -281,31 +343,29 @@ class DimensionCounter:
         return valid
 
     def get_stochastic_value(self):
-        v = self.value
-        self.value += self.increment
+        with self.lock:
+            v = self.value
+            self.value += self.increment
         return v
 
     def get_json_field_string(self):
-        if random.random() < self.percent_nulls:
+        if rng.random.random() < self.percent_nulls:
             s = '"'+self.name+'": null'
         else:
             s = '"'+self.name+'":"'+str(self.get_stochastic_value())+'"'
             return s
 
-    def is_missing(self):
-        return random.random() < self.percent_missing
-
 #
 # STRING dimensions
 #
 
-class DimensionStringStatic:
+class DimensionStringStatic(DimensionNullable):
     """Always emits a fixed literal string value. Use instead of the string+chars+length_distribution hack."""
+    __slots__ = ('value',)
+
     def __init__(self, desc):
-        self.name = desc['name']
+        super().__init__(desc)
         self.value = str(desc['value'])
-        self.percent_nulls = desc.get('percent_nulls', 0) / 100.0
-        self.percent_missing = desc.get('percent_missing', 0) / 100.0
 
     @staticmethod
     def validate_desc(desc, context):
@@ -324,22 +384,25 @@ class DimensionStringStatic:
     def get_stochastic_value(self):
         return self.value
 
+    def supports_columns(self):
+        return True
+
+    def get_stochastic_values(self, n):
+        return [self.value] * n
+
     def get_json_field_string(self):
-        if random.random() < self.percent_nulls:
+        if rng.random.random() < self.percent_nulls:
             return f'"{self.name}": null'
         return f'"{self.name}":"{self.value}"'
 
-    def is_missing(self):
-        return random.random() < self.percent_missing
-
 
-class DimensionIntStatic:
+class DimensionIntStatic(DimensionNullable):
     """Always emits a fixed integer value."""
+    __slots__ = ('value',)
+
     def __init__(self, desc):
-        self.name = desc['name']
+        super().__init__(desc)
         self.value = int(desc['value'])
-        self.percent_nulls = desc.get('percent_nulls', 0) / 100.0
-        self.percent_missing = desc.get('percent_missing', 0) / 100.0
 
     @staticmethod
     def validate_desc(desc, context):
@@ -358,14 +421,17 @@ class DimensionIntStatic:
     def get_stochastic_value(self):
         return self.value
 
+    def supports_columns(self):
+        return True
+
+    def get_stochastic_values(self, n):
+        return [self.value] * n
+
     def get_json_field_string(self):
-        if random.random() < self.percent_nulls:
+        if rng.random.random() < self.percent_nulls:
             return f'"{self.name}": null'
         return f'"{self.name}":{self.value}'
 
-    def is_missing(self):
-        return random.random() < self.percent_missing
-
 
 class DimensionString(DimensionBase):
     """Generates random strings of a given length drawn from a character set. Config type: "string".
@@ -373,6 +439,8 @@ class DimensionString(DimensionBase):
     length_distribution controls how many characters to generate per value.
     chars (optional) restricts the character set; defaults to all printable ASCII.
     """
+    __slots__ = ('length_distribution', 'chars')
+
     def __init__(self, desc):
         self.length_distribution = parse_distribution(desc['length_distribution'])
         if 'chars' in desc:
@@ -419,10 +487,22 @@ class DimensionString(DimensionBase):
 
     def _get_raw_value(self):
         length = int(self.length_distribution.get_sample())
-        return ''.join(random.choices(list(self.chars), k=length))
+        return ''.join(rng.random.choices(list(self.chars), k=length))
+
+    def supports_columns(self):
+        return _columnar(self.length_distribution, self.cardinality_distribution)
+
+    def _get_raw_values(self, n):
+        # Draw the characters for all n strings in one go, then cut them apart
+        lengths = np.maximum(self.length_distribution.get_samples(n).astype(np.int64), 0)
+        ends = np.cumsum(lengths).tolist()
+        total = ends[-1] if ends else 0
+        chars = self.chars
+        text = ''.join(map(chars.__getitem__, rng.numpy.randint(0, len(chars), total).tolist()))
+        return [text[start:end] for start, end in zip([0] + ends[:-1], ends)]
 
     def get_json_field_string(self):
-        if random.random() < self.percent_nulls:
+        if rng.random.random() < self.percent_nulls:
             s = '"'+self.name+'": null'
         else:
             if self.cardinality is None:
@@ -448,6 +528,8 @@ class DimensionTimestampClock:
     setup → timer → emit pattern. Returns timezone-aware UTC datetimes.
     Unlike DimensionTimestamp, this reflects the simulation clock, not a random range.
     """
+    __slots__ = ('clock', 'name')
+
     def __init__(self, clock, desc):
         self.clock = clock
         self.name = desc['name']  # Ensure self.name is set
@@ -467,39 +549,26 @@ class DimensionTimestampClock:
             current_time = current_time.replace(tzinfo=timezone.utc)  # Default to UTC if no timezone
         return current_time
 
+    def get_value_at(self, now):
+        """Return the value this dimension would have had with the clock at now.
+
+        Used for records whose timestamp was planned ahead of the clock.
+        """
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        return now
+
 class DimensionTimestamp(DimensionBase):
     """Generates a random datetime within a fixed range, independent of the simulation clock. Config type: "timestamp".
 
     distribution min/max are ISO 8601 strings. Use DimensionTimestampClock ("clock") instead
     when you want the record time to track the simulation clock.
     """
+    __slots__ = ('value_distribution',)
+
     def __init__(self, desc):
-        self.name = desc['name']
         self.value_distribution = parse_timestamp_distribution(desc['distribution'])
-        if 'percent_nulls' in desc.keys():
-            self.percent_nulls = desc['percent_nulls'] / 100.0
-        else:
-            self.percent_nulls = 0.0
-        if 'percent_missing' in desc.keys():
-            self.percent_missing = desc['percent_missing'] / 100.0
-        else:
-            self.percent_missing = 0.0
-        cardinality = desc['cardinality']
-        if cardinality == 0:
-            self.cardinality = None
-            self.cardinality_distribution = None
-        else:
-            if 'cardinality_distribution' not in desc.keys():
-                raise Exception(f'"{self.name}" dimension specifies a cardinality without a cardinality distribution.')
-            self.cardinality = []
-            self.cardinality_distribution = parse_distribution(desc['cardinality_distribution'])
-            for i in range(cardinality):
-                value = None
-                while True:
-                    value = self._get_raw_value()
-                    if value not in self.cardinality:
-                        break
-                self.cardinality.append(value)
+        super().__init__(desc)
 
     def __str__(self):
         return 'DimensionTimestamp(name='+self.name+', value_distribution='+str(self.value_distribution)+', cardinality='+str(self.cardinality)+', cardinality_distribution='+str(self.cardinality_distribution)+')'
@@ -529,7 +598,7 @@ class DimensionTimestamp(DimensionBase):
         return timestamp
 
     def get_json_field_string(self):
-        if random.random() < self.percent_nulls:
+        if rng.random.random() < self.percent_nulls:
             s = '"'+self.name+'": null'
         else:
             if self.cardinality is None:
@@ -544,15 +613,14 @@ class DimensionTimestamp(DimensionBase):
             s = '"'+self.name+'":"'+str(value)+'"'
         return s
 
-    def is_missing(self):
-        return random.random() < self.percent_missing
-
 class DimensionIPAddress(DimensionBase):
     """Generates IPv4 addresses from a numeric distribution over the 32-bit address space. Config type: "ipaddress".
 
     distribution min/max are integers representing the packed 32-bit address.
     Use a CIDR range by computing min/max from the network prefix.
     """
+    __slots__ = ('value_distribution',)
+
     def __init__(self, desc):
         self.value_distribution = parse_distribution(desc['distribution'])
         super().__init__(desc)
@@ -568,8 +636,17 @@ class DimensionIPAddress(DimensionBase):
         value = int(self.value_distribution.get_sample())
         return str((value & 0xFF000000) >> 24)+'.'+str((value & 0x00FF0000) >> 16)+'.'+str((value & 0x0000FF00) >> 8)+'.'+str(value & 0x000000FF)
 
+    def supports_columns(self):
+        return _columnar(self.value_distribution, self.cardinality_distribution)
+
+    def _get_raw_values(self, n):
+        values = self.value_distribution.get_samples(n).astype(np.int64)
+        octets = [((values & mask) >> shift).tolist() for mask, shift in
+                  ((0xFF000000, 24), (0x00FF0000, 16), (0x0000FF00, 8), (0x000000FF, 0))]
+        return ['%d.%d.%d.%d' % ip for ip in zip(*octets)]
+
     def get_json_field_string(self):
-        if random.random() < self.percent_nulls:
+        if rng.random.random() < self.percent_nulls:
             s = '"'+self.name+'": null'
         else:
             if self.cardinality is None:
@@ -588,23 +665,17 @@ class DimensionIPAddress(DimensionBase):
 # Complex dimensions
 #
 
-class DimensionEnum:
+class DimensionEnum(DimensionNullable):
     """Selects a value from a fixed list using a cardinality_distribution index. Config type: "enum".
 
     cardinality_distribution is used as a zero-based index into the values list, so
     uniform(min=0, max=N-1) gives equal probability. The index is clamped to
     [0, len(values)-1] to prevent out-of-range errors.
     """
+    __slots__ = ('cardinality', 'cardinality_distribution')
+
     def __init__(self, desc):
-        self.name = desc['name']
-        if 'percent_nulls' in desc.keys():
-            self.percent_nulls = desc['percent_nulls'] / 100.0
-        else:
-            self.percent_nulls = 0.0
-        if 'percent_missing' in desc.keys():
-            self.percent_missing = desc['percent_missing'] / 100.0
-        else:
-            self.percent_missing = 0.0
+        super().__init__(desc)
         self.cardinality = desc['values']
         if 'cardinality_distribution' not in desc.keys():
             raise Exception(f'Dimension {self.name} specifies a cardinality without a cardinality distribution.')
@@ -647,30 +718,104 @@ class DimensionEnum:
             index = len(self.cardinality)-1
         return self.cardinality[index]
 
+    def supports_columns(self):
+        return _columnar(self.cardinality_distribution)
+
+    def get_stochastic_values(self, n):
+        return _pool_column(self.cardinality, self.cardinality_distribution, n)
+
     def get_json_field_string(self):
-        if random.random() < self.percent_nulls:
+        if rng.random.random() < self.percent_nulls:
             s = '"'+self.name+'": null'
         else:
             s = '"'+self.name+'":"'+str(self.get_stochastic_value())+'"'
         return s
 
-    def is_missing(self):
-        return random.random() < self.percent_missing
+class DimensionEnumFile(DimensionNullable):
+    """Selects a value from a value file, one value per line. Config type: "enum:file".
+
+    The file is memory-mapped and indexed once (see ieg/lookup.py), so it may hold
+    millions of values at no cost to config loading. With weighted, each line ends
+    with a tab and a weight, and values are picked in proportion to their weights.
+    Otherwise cardinality_distribution, if given, picks a zero-based line index as
+    for "enum", clamped to the file; without it every line is equally likely.
+    """
+    __slots__ = ('values', 'cardinality_distribution')
+
+    def __init__(self, desc):
+        super().__init__(desc)
+        self.values = ValueFile.open(desc['path'], weighted=desc.get('weighted', False))
+        if 'cardinality_distribution' in desc:
+            self.cardinality_distribution = parse_distribution(desc['cardinality_distribution'])
+        else:
+            self.cardinality_distribution = None
+
+    def __str__(self):
+        return 'DimensionEnumFile(name='+self.name+', values='+str(self.values)+', cardinality_distribution='+str(self.cardinality_distribution)+')'
+
+    @staticmethod
+    def validate_desc(desc, context):
+        valid = True
+        if 'name' not in desc:
+            logger.error("%s: missing required field 'name'", context)
+            valid = False
+        path = desc.get('path')
+        if not path or not isinstance(path, str):
+            logger.error("%s: 'path' required and must be a file name", context)
+            valid = False
+        elif not os.path.isfile(path):
+            logger.error("%s: value file '%s' not found", context, path)
+            valid = False
+        if not isinstance(desc.get('weighted', False), bool):
+            logger.error("%s: 'weighted' must be true or false, got %r", context, desc['weighted'])
+            valid = False
+        if 'cardinality_distribution' in desc:
+            if desc.get('weighted'):
+                logger.error("%s: 'cardinality_distribution' may not be used with 'weighted'", context)
+                valid = False
+            elif not validate_distribution_desc(desc['cardinality_distribution'], f"{context} cardinality_distribution"):
+                valid = False
+        return valid
+
+    def get_stochastic_value(self):
+        values = self.values
+        if values.weighted:
+            index = int(values.cumulative.searchsorted(rng.random.random() * values.total, 'right'))
+            return values.value(min(index, values.count - 1))
+        if self.cardinality_distribution is None:
+            return values.value(rng.random.randrange(values.count))
+        index = int(self.cardinality_distribution.get_sample())
+        return values.value(max(0, min(index, values.count - 1)))
+
+    def supports_columns(self):
+        return _columnar(self.cardinality_distribution)
+
+    def get_stochastic_values(self, n):
+        values = self.values
+        if values.weighted:
+            index = values.weighted_index(rng.numpy.random_sample(n))
+        elif self.cardinality_distribution is None:
+            index = rng.numpy.randint(0, values.count, n)
+        else:
+            index = self.cardinality_distribution.get_samples(n).astype(np.int64)
+            np.clip(index, 0, values.count - 1, out=index)
+        return values.values(index)
+
+    def get_json_field_string(self):
+        if rng.random.random() < self.percent_nulls:
+            s = '"'+self.name+'": null'
+        else:
+            s = '"'+self.name+'":"'+str(self.get_stochastic_value())+'"'
+        return s
 
-class DimensionObject():
+class DimensionObject(DimensionNullable):
     """Generates a nested JSON object from a list of child dimensions. Config type: "object"."""
+    __slots__ = ('global_clock', 'dimensions', 'cardinality', 'cardinality_distribution')
+
     def __init__(self, clock, desc):
+        super().__init__(desc)
         self.global_clock = clock
-        self.name = desc['name']
         self.dimensions = get_variables(desc['dimensions'], self.global_clock)
-        if 'percent_nulls' in desc.keys():
-            self.percent_nulls = desc['percent_nulls'] / 100.0
-        else:
-            self.percent_nulls = 0.0
-        if 'percent_missing' in desc.keys():
-            self.percent_missing = desc['percent_missing'] / 100.0
-        else:
-            self.percent_missing = 0.0
         cardinality = desc['cardinality']
         if cardinality == 0:
             self.cardinality = None
@@ -739,7 +884,7 @@ class DimensionObject():
 
 
     def get_json_field_string(self):
-        if random.random() < self.percent_nulls:
+        if rng.random.random() < self.percent_nulls:
             s = '"'+self.name+'": null'
         else:
             if self.cardinality is None:
@@ -753,29 +898,21 @@ class DimensionObject():
                 s = self.cardinality[index]
         return s
 
-    def is_missing(self):
-        return random.random() < self.percent_missing
-
-class DimensionList():
+class DimensionList(DimensionNullable):
     """Generates a JSON array whose length and element type are both drawn from distributions. Config type: "list".
 
     length_distribution controls the number of elements per array.
     selection_distribution indexes into the elements list to pick the element type for each slot.
     """
+    __slots__ = ('global_clock', 'elements', 'length_distribution', 'selection_distribution',
+                 'cardinality', 'cardinality_distribution')
+
     def __init__(self, clock, desc):
+        super().__init__(desc)
         self.global_clock = clock
-        self.name = desc['name']
         self.elements = get_variables(desc['elements'], self.global_clock)
         self.length_distribution = parse_distribution(desc['length_distribution'])
         self.selection_distribution = parse_distribution(desc['selection_distribution'])
-        if 'percent_nulls' in desc.keys():
-            self.percent_nulls = desc['percent_nulls'] / 100.0
-        else:
-            self.percent_nulls = 0.0
-        if 'percent_missing' in desc.keys():
-            self.percent_missing = desc['percent_missing'] / 100.0
-        else:
-            self.percent_missing = 0.0
         cardinality = desc['cardinality']
         if cardinality == 0:
             self.cardinality = None
@@ -865,7 +1002,7 @@ class DimensionList():
 
 
     def get_json_field_string(self):
-        if random.random() < self.percent_nulls:
+        if rng.random.random() < self.percent_nulls:
             s = '"'+self.name+'": null'
         else:
             if self.cardinality is None:
@@ -879,9 +1016,6 @@ class DimensionList():
                 s = self.cardinality[index]
         return s
 
-    def is_missing(self):
-        return random.random() < self.percent_missing
-
 
 #
 # Classes for handling variables
@@ -895,6 +1029,8 @@ class DimensionVariable:
     will be raised at runtime. Use validate_config() to catch this pre-flight.
     Only valid in emitter dimensions, not in a state's variables block.
     """
+    __slots__ = ('name', 'variable_name')
+
     def __init__(self, desc):
         self.name = desc['name']
         self.variable_name = desc['variable']
@@ -917,6 +1053,127 @@ class DimensionVariable:
         value = variables[self.variable_name]
         return '"'+self.name+'":"'+str(value)+'"'
 
+class DimensionEntity(DimensionNullable):
+    """Picks an entity from an entity registry and emits its ID. Config type: "entity".
+
+    registry is the registry's spec file (see ieg/entities.py). distribution, if
+    given, picks a zero-based entity ID, clamped to the registry, so that some
+    entities are more active than others; without it every entity is equally
+    likely. Set the ID in an Actor's variables and read the entity's attributes
+    with "entity:attribute" dimensions.
+    """
+    __slots__ = ('registry', 'distribution')
+
+    def __init__(self, desc):
+        super().__init__(desc)
+        self.registry = EntityRegistry.open(desc['registry'])
+        if 'distribution' in desc:
+            self.distribution = parse_distribution(desc['distribution'])
+        else:
+            self.distribution = None
+
+    def __str__(self):
+        return 'DimensionEntity(name='+self.name+', registry='+str(self.registry)+', distribution='+str(self.distribution)+')'
+
+    @staticmethod
+    def validate_desc(desc, context):
+        valid = True
+        if 'name' not in desc:
+            logger.error("%s: missing required field 'name'", context)
+            valid = False
+        if not _validate_registry(desc, context):
+            valid = False
+        if 'distribution' in desc:
+            if not validate_distribution_desc(desc['distribution'], f"{context} distribution"):
+                valid = False
+        return valid
+
+    def get_stochastic_value(self):
+        if self.distribution is None:
+            return rng.random.randrange(self.registry.count)
+        index = int(self.distribution.get_sample())
+        return max(0, min(index, self.registry.count - 1))
+
+    def supports_columns(self):
+        return _columnar(self.distribution)
+
+    def get_stochastic_values(self, n):
+        if self.distribution is None:
+            return rng.numpy.randint(0, self.registry.count, n).tolist()
+        index = self.distribution.get_samples(n).astype(np.int64)
+        np.clip(index, 0, self.registry.count - 1, out=index)
+        return index.tolist()
+
+    def get_json_field_string(self):
+        if rng.random.random() < self.percent_nulls:
+            return '"'+self.name+'": null'
+        return '"'+self.name+'":'+str(self.get_stochastic_value())
+
+def _validate_registry(desc, context):
+    """Check a dimension's 'registry' spec file, returning the spec, or None if it is invalid."""
+    path = desc.get('registry')
+    if not path or not isinstance(path, str):
+        logger.error("%s: 'registry' required and must be a registry spec file", context)
+        return None
+    try:
+        spec = load_spec(path)
+    except (OSError, ValueError) as e:
+        logger.error("%s: %s", context, e)
+        return None
+    if not validate_spec(spec, f"{context}, registry '{path}'"):
+        return None
+    return spec
+
+class DimensionEntityAttribute(DimensionVariable):
+    """Outputs an attribute of the entity whose ID is in a worker variable. Config type: "entity:attribute".
+
+    The variable is normally set by an "entity" dimension in an activity's
+    variables, so every record of the Actor shows the same entity. The attribute
+    is read from the registry's memory-mapped column by ID. Like "variable", only
+    valid in emitter dimensions.
+    """
+    __slots__ = ('registry', 'attribute', 'read')
+
+    def __init__(self, desc):
+        super().__init__(desc)
+        self.registry = EntityRegistry.open(desc['registry'])
+        self.attribute = desc['attribute']
+        if self.attribute not in self.registry.columns:
+            raise ValueError(f"Dimension {self.name}: entity registry '{desc['registry']}' has no attribute "
+                             f"'{self.attribute}'")
+        self.read = self.registry.reader(self.attribute)
+
+    def __getstate__(self):
+        # For a checkpoint (see ieg/checkpoint.py): the reader is looked up again on load
+        return {'name': self.name, 'variable_name': self.variable_name, 'registry': self.registry,
+                'attribute': self.attribute}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.read = self.registry.reader(self.attribute)
+
+    def __str__(self):
+        return 'DimensionEntityAttribute(name='+self.name+', variable='+self.variable_name+', attribute='+self.attribute+')'
+
+    @staticmethod
+    def validate_desc(desc, context):
+        valid = DimensionVariable.validate_desc(desc, context)
+        spec = _validate_registry(desc, context)
+        if spec is None:
+            valid = False
+        if 'attribute' not in desc:
+            logger.error("%s: missing required field 'attribute'", context)
+            valid = False
+        elif spec is not None and desc['attribute'] not in [a.get('name') for a in spec['attributes']]:
+            logger.error("%s: registry '%s' has no attribute '%s'", context, desc['registry'], desc['attribute'])
+            valid = False
+        return valid
+
+    def get_json_field_string(self, variables):
+        value = self.read(variables[self.variable_name])
+        return '"'+self.name+'":"'+str(value)+'"'
+
 #
 # Configuration parsing functions
 #
@@ -928,6 +1185,8 @@ def parse_element(desc, global_clock):
         el = DimensionCounter(desc)
     elif desc['type'].lower() == 'enum':
         el = DimensionEnum(desc)
+    elif desc['type'].lower() == 'enum:file':
+        el = DimensionEnumFile(desc)
     elif desc['type'].lower() == 'string:static':
         el = DimensionStringStatic(desc)
     elif desc['type'].lower() == 'int:static':
@@ -946,6 +1205,10 @@ def parse_element(desc, global_clock):
         el = DimensionIPAddress(desc)
     elif desc['type'].lower() == 'variable':
         el = DimensionVariable(desc)
+    elif desc['type'].lower() == 'entity':
+        el = DimensionEntity(desc)
+    elif desc['type'].lower() == 'entity:attribute':
+        el = DimensionEntityAttribute(desc)
     elif desc['type'].lower() == 'object':
         el = DimensionObject(global_clock, desc)
     elif desc['type'].lower() == 'list':
@@ -968,8 +1231,8 @@ def get_dimensions(desc, global_clock):
     return elements
 
 KNOWN_DIMENSION_TYPES = (
-    'counter', 'enum', 'string', 'string:static', 'int', 'int:static', 'float',
-    'timestamp', 'clock', 'ipaddress', 'variable', 'object', 'list'
+    'counter', 'enum', 'enum:file', 'string', 'string:static', 'int', 'int:static', 'float',
+    'timestamp', 'clock', 'ipaddress', 'variable', 'entity', 'entity:attribute', 'object', 'list'
 )
 
 def validate_dimension_desc(desc, context):
@@ -986,6 +1249,8 @@ def validate_dimension_desc(desc, context):
     dim_type = str(desc['type']).lower()
     if dim_type == 'enum':
         return DimensionEnum.validate_desc(desc, context)
+    elif dim_type == 'enum:file':
+        return DimensionEnumFile.validate_desc(desc, context)
     elif dim_type == 'counter':
         return DimensionCounter.validate_desc(desc, context)
     elif dim_type == 'string:static':
@@ -1006,6 +1271,10 @@ def validate_dimension_desc(desc, context):
         return DimensionIPAddress.validate_desc(desc, context)
     elif dim_type == 'variable':
         return DimensionVariable.validate_desc(desc, context)
+    elif dim_type == 'entity':
+        return DimensionEntity.validate_desc(desc, context)
+    elif dim_type == 'entity:attribute':
+        return DimensionEntityAttribute.validate_desc(desc, context)
     elif dim_type == 'object':
         return DimensionObject.validate_desc(desc, context)
     elif dim_type == 'list':
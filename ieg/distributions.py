@@ -7,22 +7,28 @@ Each Dist* class maps to a distribution type in the config JSON
   validate_distribution_desc(desc)     — pre-flight validation without constructing
 
 DistGMMTemporal requires a Clock instance for time-of-day modulation and is only
-valid in cardinality_distribution on timer states.
+valid in cardinality_distribution on timer states. Its day profiles are evaluated
+once into a per-minute WeeklyCurve, which Schedule shares.
 
 See docs/distributions.md for the config-level reference.
 """
 
+import bisect
+import json
 import logging
 import math
 import numpy as np
 import dateutil.parser
 
+from ieg.rng import rng
+
 logger = logging.getLogger('ieg')
 
 class DistConstant:
     """
     Represents a constant value distribution.
     """
+    __slots__ = ('value',)
     def __init__(self, value):
         self.value = value
     def __str__(self):
@@ -31,6 +37,10 @@ class DistConstant:
         """Return the constant value."""
         return self.value
 
+    def get_samples(self, size):
+        """Return an array of size copies of the constant value."""
+        return np.full(size, self.value)
+
     @staticmethod
     def validate_desc(desc, context):
         valid = True
@@ -43,6 +53,7 @@ class DistUniform:
     """
     Represents a uniform distribution between a minimum and maximum value.
     """
+    __slots__ = ('min_value', 'max_value')
     def __init__(self, min_value, max_value):
         self.min_value = min_value
         self.max_value = max_value
@@ -50,7 +61,11 @@ class DistUniform:
         return 'DistUniform(min_value='+str(self.min_value)+', max_value='+str(self.max_value)+')'
     def get_sample(self):
         """Return a uniformly distributed random value between min and max."""
-        return np.random.uniform(self.min_value, self.max_value+1)
+        return rng.numpy.uniform(self.min_value, self.max_value+1)
+
+    def get_samples(self, size):
+        """Return an array of size uniformly distributed values."""
+        return rng.numpy.uniform(self.min_value, self.max_value+1, size=size)
 
     @staticmethod
     def validate_desc(desc, context):
@@ -74,13 +89,18 @@ class DistExponential:
     """
     Represents an exponential distribution with a given mean.
     """
+    __slots__ = ('mean',)
     def __init__(self, mean):
         self.mean = mean
     def __str__(self):
         return 'DistExponential(mean='+str(self.mean)+')'
     def get_sample(self):
         """Return an exponentially distributed random value with the configured mean."""
-        return np.random.exponential(scale=self.mean)
+        return rng.numpy.exponential(scale=self.mean)
+
+    def get_samples(self, size):
+        """Return an array of size exponentially distributed values."""
+        return rng.numpy.exponential(scale=self.mean, size=size)
 
     @staticmethod
     def validate_desc(desc, context):
@@ -102,6 +122,7 @@ class DistNormal:
     """
     Represents a normal (Gaussian) distribution with a given mean and standard deviation.
     """
+    __slots__ = ('mean', 'stddev')
     def __init__(self, mean, stddev):
         self.mean = mean
         self.stddev = stddev
@@ -109,7 +130,11 @@ class DistNormal:
         return 'DistNormal(mean='+str(self.mean)+', stddev='+str(self.stddev)+')'
     def get_sample(self):
         """Return a normally distributed random value with the configured mean and stddev."""
-        return np.random.normal(self.mean, self.stddev)
+        return rng.numpy.normal(self.mean, self.stddev)
+
+    def get_samples(self, size):
+        """Return an array of size normally distributed values."""
+        return rng.numpy.normal(self.mean, self.stddev, size=size)
 
     @staticmethod
     def validate_desc(desc, context):
@@ -130,60 +155,158 @@ class DistNormal:
                 valid = False
         return valid
 
+class WeeklyCurve:
+    """
+    A gmm_temporal multiplier curve precomputed over the whole week.
+
+    The sum of Gaussian components for each day profile is evaluated once per
+    minute across all 7 x 24h, so looking up the multiplier at any instant is two
+    list indexes and a linear interpolation instead of an exp() per component.
+    Curves are cached by their day profiles, so a config distribution and a
+    schedule with the same days share one table.
+
+    The curve also carries its running integral (in multiplier-seconds, treating
+    each minute at the mean of its endpoints), which advance() inverts to place
+    arrivals of a non-homogeneous Poisson process by time rescaling.
+    """
+    RESOLUTION = 60  # seconds per table entry
+    SLOTS = 7 * 24 * 3600 // RESOLUTION
+
+    _cache = {}
+
+    def __init__(self, days):
+        self.days = days
+        sorted_days = sorted(int(k) for k in days.keys())
+        hours = np.arange(24 * 3600 // self.RESOLUTION) * (self.RESOLUTION / 3600.0)
+        table = []
+        for day in range(1, 8):
+            profile = days[str(DistGMMTemporal.nearest_day(day, sorted_days))]
+            total = np.zeros_like(hours)
+            for comp in profile:
+                mu = float(comp['utc_hour'])
+                sigma = float(comp['sigma'])
+                w = float(comp['weight'])
+                # Midnight wraparound: take the strongest of the -24/0/+24 images
+                best = np.zeros_like(hours)
+                for offset in (-24, 0, 24):
+                    best = np.maximum(best, w * np.exp(-0.5 * ((hours - mu + offset) / sigma) ** 2))
+                total += best
+            table.extend(total.tolist())
+        table.append(table[0])  # so interpolation past Sunday 23:59 wraps to Monday 00:00
+        self.table = table
+        values = np.array(table)
+        rates = (values[:-1] + values[1:]) / 2.0
+        self.rates = rates.tolist()
+        self.cumulative_array = np.concatenate(([0.0], np.cumsum(rates * self.RESOLUTION)))
+        self.cumulative = self.cumulative_array.tolist()
+        self.total = self.cumulative[-1]  # integral over one full week
+
+    def __str__(self):
+        return f'WeeklyCurve(days={list(self.days.keys())}, resolution={self.RESOLUTION}s)'
+
+    def __reduce__(self):
+        # Pickled (for a checkpoint) as its day profiles; the tables are rebuilt on load
+        return (WeeklyCurve.for_days, (self.days,))
+
+    @classmethod
+    def for_days(cls, days):
+        """Return the (cached) curve for the given day profiles."""
+        key = json.dumps(days, sort_keys=True)
+        curve = cls._cache.get(key)
+        if curve is None:
+            curve = cls(days)
+            cls._cache[key] = curve
+        return curve
+
+    @staticmethod
+    def seconds_of_week(t):
+        """Return seconds since Monday 00:00 for datetime t, using its own fields."""
+        return (t.weekday() * 86400 + t.hour * 3600 + t.minute * 60 + t.second
+                + t.microsecond / 1e6)
+
+    def multiplier_at(self, t):
+        """Return the interpolated multiplier for datetime t."""
+        return self.multiplier_at_offset(self.seconds_of_week(t))
+
+    def multiplier_at_offset(self, seconds):
+        """Return the interpolated multiplier at the given seconds since Monday 00:00."""
+        pos = (seconds % 604800.0) / self.RESOLUTION
+        i = int(pos)
+        if i >= self.SLOTS:
+            i = self.SLOTS - 1
+        lo = self.table[i]
+        return lo + (self.table[i + 1] - lo) * (pos - i)
+
+    def _integral_to(self, seconds):
+        # Integral of the curve from Monday 00:00 to seconds (within one week)
+        i = min(int(seconds / self.RESOLUTION), self.SLOTS - 1)
+        return self.cumulative[i] + self.rates[i] * (seconds - i * self.RESOLUTION)
+
+    def advance(self, seconds, area):
+        """Return how many seconds after seconds-of-week it takes for the integral
+        of the curve to grow by area. Requires self.total > 0."""
+        seconds = seconds % 604800.0
+        target = self._integral_to(seconds) + area
+        weeks = math.floor(target / self.total)
+        rem = target - weeks * self.total
+        j = min(max(bisect.bisect_right(self.cumulative, rem) - 1, 0), self.SLOTS - 1)
+        rate = self.rates[j]
+        within = (rem - self.cumulative[j]) / rate if rate > 0 else 0.0
+        return weeks * 604800.0 + j * self.RESOLUTION + within - seconds
+
+    def advance_many(self, seconds, areas):
+        """Vectorised advance() for an increasing array of cumulative areas, all
+        measured from the same starting seconds-of-week. Returns a NumPy array."""
+        seconds = seconds % 604800.0
+        target = self._integral_to(seconds) + np.asarray(areas, dtype=float)
+        weeks = np.floor(target / self.total)
+        rem = target - weeks * self.total
+        j = np.clip(np.searchsorted(self.cumulative_array, rem, side='right') - 1, 0, self.SLOTS - 1)
+        rates = np.asarray(self.rates)[j]
+        safe = np.where(rates > 0, rates, 1.0)
+        within = np.where(rates > 0, (rem - self.cumulative_array[j]) / safe, 0.0)
+        return weeks * 604800.0 + j * self.RESOLUTION + within - seconds
+
 class DistGMMTemporal:
     """
     Gaussian Mixture Model temporal distribution.
     Modulates an exponential interarrival time by time of day and day of week.
     Each day profile is an array of Gaussian components (utc_hour=μ, sigma=σ, weight).
     Days are keyed by ISO weekday (1=Mon, 7=Sun) with nearest-prior wraparound lookup.
+
+    Samples are interarrival times of a non-homogeneous Poisson process with rate
+    multiplier(t) / mean, so a wait that spans a change in the multiplier is timed
+    by the rate it actually passes through rather than the rate at its start.
     """
+    __slots__ = ('mean', 'days', 'clock', 'sorted_days', 'curve')
     def __init__(self, mean, days, clock):
         self.mean = mean
         self.days = days  # dict: str(day_number) -> list of {utc_hour, sigma, weight}
         self.clock = clock
         self.sorted_days = sorted(int(k) for k in self.days.keys())
+        self.curve = WeeklyCurve.for_days(days)
 
     def __str__(self):
         return f'DistGMMTemporal(mean={self.mean}, days={list(self.days.keys())})'
 
-    def _get_profile(self, day):
-        # Walk back from the given ISO weekday to find the nearest defined day key.
+    @staticmethod
+    def nearest_day(day, sorted_days):
+        """Walk back from the given ISO weekday to find the nearest defined day key."""
         for i in range(7):
             candidate = (day - 1 - i) % 7 + 1
-            if candidate in self.sorted_days:
-                return self.days[str(candidate)]
+            if candidate in sorted_days:
+                return candidate
         raise ValueError('No day profiles defined')
 
-    def _get_multiplier(self, hour, profile):
-        # Evaluate the sum of Gaussian components at the given fractional hour.
-        # Handles midnight wraparound by checking offsets -24, 0, +24.
-        total = 0.0
-        for comp in profile:
-            mu = comp['utc_hour']
-            sigma = comp['sigma']
-            w = comp['weight']
-            best = 0.0
-            for offset in (-24, 0, 24):
-                diff = hour - mu + offset
-                val = w * math.exp(-0.5 * (diff / sigma) ** 2)
-                if val > best:
-                    best = val
-            total += best
-        return total
-
     def get_sample(self):
         """
         Return a time-modulated exponential sample based
         on current clock time and day of week.
         """
-        now = self.clock.now()
-        day = now.isoweekday()
-        hour = now.hour + now.minute / 60.0 + now.second / 3600.0
-        profile = self._get_profile(day)
-        multiplier = self._get_multiplier(hour, profile)
-        if multiplier <= 0:
-            multiplier = 0.001
-        return np.random.exponential(scale=self.mean / multiplier)
+        if self.curve.total <= 0:
+            return rng.numpy.exponential(scale=self.mean / 0.001)
+        area = rng.numpy.exponential(scale=self.mean)
+        return self.curve.advance(WeeklyCurve.seconds_of_week(self.clock.now()), area)
 
     @staticmethod
     def validate_desc(desc, context):
@@ -224,12 +347,96 @@ class DistGMMTemporal:
                                 valid = False
         return valid
 
+class SampleBuffer:
+    """
+    Hands out samples from an iid distribution one at a time, drawing them from
+    NumPy in blocks of block_size. Used by closed-form lifecycles (ieg/lifecycle.py) so that
+    each timer delay costs a list index rather than a NumPy call.
+    Not valid for DistGMMTemporal, whose samples depend on the clock.
+    """
+    __slots__ = ('dist', 'block_size', 'block', 'index')
+    def __init__(self, dist, block_size=1024):
+        self.dist = dist
+        self.block_size = block_size
+        self.block = []
+        self.index = 0
+
+    def __str__(self):
+        return 'SampleBuffer(dist='+str(self.dist)+', block_size='+str(self.block_size)+')'
+
+    def __getstate__(self):
+        # Pickled (for a checkpoint) without the samples already handed out
+        return {'dist': self.dist, 'block_size': self.block_size, 'block': self.block[self.index:], 'index': 0}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def next(self):
+        """Return the next sample, refilling the block when it is exhausted."""
+        if self.index >= len(self.block):
+            self.block = self.dist.get_samples(self.block_size).tolist()
+            self.index = 0
+        value = self.block[self.index]
+        self.index += 1
+        return value
+
+class ArrivalProcess:
+    """
+    The spawner's stream of interarrival gaps, drawn in batches.
+
+    For iid distributions this is a SampleBuffer. For gmm_temporal, arrival times
+    for a whole batch are placed at once by inverting the cumulative rate curve,
+    so the spawner neither reads the clock nor evaluates the multiplier per spawn.
+    Times are tracked in seconds since start_time.
+    """
+    __slots__ = ('dist', 'batch_size', 'gmm', 'origin', 'cursor', 'arrivals', 'index', 'buffer')
+    def __init__(self, dist, start_time, batch_size=1024):
+        self.dist = dist
+        self.batch_size = batch_size
+        self.gmm = isinstance(dist, DistGMMTemporal) and dist.curve.total > 0
+        if self.gmm:
+            self.origin = WeeklyCurve.seconds_of_week(start_time)
+            self.cursor = 0.0  # time of the previous arrival
+            self.arrivals = []
+            self.index = 0
+        else:
+            self.buffer = SampleBuffer(dist, batch_size) if hasattr(dist, 'get_samples') else None
+
+    def __str__(self):
+        return 'ArrivalProcess(dist='+str(self.dist)+', batch_size='+str(self.batch_size)+')'
+
+    def next_gap(self):
+        """Return the time in seconds from the previous arrival to the next one."""
+        if not self.gmm:
+            return float(self.buffer.next() if self.buffer is not None else self.dist.get_sample())
+        if self.index >= len(self.arrivals):
+            areas = np.cumsum(rng.numpy.exponential(scale=self.dist.mean, size=self.batch_size))
+            offsets = self.dist.curve.advance_many(self.origin + self.cursor, areas)
+            self.arrivals = (self.cursor + offsets).tolist()
+            self.index = 0
+        arrival = self.arrivals[self.index]
+        self.index += 1
+        gap = arrival - self.cursor
+        self.cursor = arrival
+        return gap
+
+    def restart(self, elapsed):
+        """Continue the process from elapsed seconds since start_time, discarding
+        arrivals that fell while the spawner could not use them. The Poisson
+        process has independent increments, so this does not bias the rate."""
+        if self.gmm and elapsed > self.cursor:
+            self.cursor = elapsed
+            self.arrivals = []
+            self.index = 0
+
 class Schedule:
     """
     A capacity schedule that returns a multiplier (0–1) for the current time.
     Used with --schedule to modulate max_entities over time.
     Supports 'constant' (flat capacity) and 'gmm_temporal' (time-varying) distributions.
     """
+    __slots__ = ('clock', '_constant', '_gmm')
     def __init__(self, dist_config, clock):
         self.clock = clock
         dist_type = dist_config['type'].lower()
@@ -249,11 +456,7 @@ class Schedule:
         """Return the current capacity multiplier (0–1)."""
         if self._gmm is None:
             return self._constant
-        now = self.clock.now()
-        day = now.isoweekday()
-        hour = now.hour + now.minute / 60.0 + now.second / 3600.0
-        profile = self._gmm._get_profile(day)
-        return max(0.0, self._gmm._get_multiplier(hour, profile))
+        return max(0.0, self._gmm.curve.multiplier_at(self.clock.now()))
 
 
 def parse_schedule(desc, clock):
@@ -306,6 +509,29 @@ def parse_distribution(desc, clock=None):
 
 KNOWN_DISTRIBUTION_TYPES = ('constant', 'uniform', 'exponential', 'normal', 'gmm_temporal')
 
+def scale_distribution_desc(desc, factor):
+    """
+    Return a copy of a delay distribution config whose samples are factor times as
+    long. For a timer's cardinality_distribution this divides the rate by factor;
+    for gmm_temporal the shape of the week is kept. uniform samples lie in
+    [min, max + 1), so max is scaled as max + 1.
+    """
+    desc = dict(desc)
+    dist_type = desc['type'].lower()
+    if dist_type == 'constant':
+        desc['value'] = float(desc['value']) * factor
+    elif dist_type == 'uniform':
+        desc['min'] = float(desc['min']) * factor
+        desc['max'] = (float(desc['max']) + 1) * factor - 1
+    elif dist_type in ('exponential', 'gmm_temporal'):
+        desc['mean'] = float(desc['mean']) * factor
+    elif dist_type == 'normal':
+        desc['mean'] = float(desc['mean']) * factor
+        desc['stddev'] = float(desc['stddev']) * factor
+    else:
+        raise ValueError(f'Error: Unknown distribution "{dist_type}"')
+    return desc
+
 def validate_distribution_desc(desc, context):
     """
     Validate a distribution config dict without constructing any objects.
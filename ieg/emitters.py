@@ -0,0 +1,307 @@
+"""Emitter classes: one record type's dimensions and how a record is built from them.
+
+An Emitter is built once per entry in the config's "emitters" list and shared by
+every activity state that names it. Per-record work that spans all of an emitter's
+dimensions, such as the null and missing decisions, lives here rather than on
+the individual Dimension* objects.
+
+Each Emitter compiles its dimension list into a Python function when it is built.
+The function creates the record as one dict display in field order, with variable
+lookups, the clock read and null/missing handling written out per field, so a
+record costs no type dispatch at run time.
+
+On the closed-form path, Actors keep their variables in an ActorTable rather than
+a dict, and bind_table() compiles a second builder that reads them from the
+table's columns by slot.
+
+In columnar mode, an emitter whose fields are all independent generators (no
+variables or counters) samples its values as NumPy columns for a block of records
+at a time; each record then takes the next row and adds the engine's timestamp.
+
+See docs/emitters.md for the config-level reference.
+"""
+
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+from ieg.dimensions import (DimensionEntityAttribute, DimensionNullable, DimensionTimestamp, DimensionTimestampClock,
+                            DimensionVariable)
+from ieg.rng import rng
+
+# Per-dimension outcomes drawn by NullMissingMasks
+PRESENT = 0
+NULL = 1
+MISSING = 2
+
+
+class NullMissingMasks:
+    """
+    Draws the null and missing decisions for all of an emitter's dimensions at once.
+
+    Only dimensions with a non-zero percent_nulls or percent_missing take part; the
+    rest never touch the RNG. One uniform sample per taking-part dimension decides
+    both outcomes: below percent_missing the field is left out, below
+    percent_missing + percent_nulls it is null. Samples are drawn from NumPy for
+    block_size records at a time. Real-time worker threads share the block, so
+    rows are handed out under a lock.
+    """
+    __slots__ = ('width', 'positions', 'missing', 'nulls', 'block_size', 'block', 'index', 'lock')
+
+    def __init__(self, dimensions, block_size=256):
+        self.width = len(dimensions)
+        self.positions = [i for i, d in enumerate(dimensions)
+                          if isinstance(d, DimensionNullable) and (d.percent_missing > 0 or d.percent_nulls > 0)]
+        self.missing = np.array([dimensions[i].percent_missing for i in self.positions])
+        self.nulls = self.missing + np.array([dimensions[i].percent_nulls for i in self.positions])
+        self.block_size = block_size
+        self.block = []
+        self.index = 0
+        self.lock = threading.Lock()
+
+    def __str__(self):
+        return 'NullMissingMasks(positions='+str(self.positions)+', block_size='+str(self.block_size)+')'
+
+    def __getstate__(self):
+        # Pickled (for a checkpoint) without the rows already handed out
+        return {'width': self.width, 'positions': self.positions, 'missing': self.missing, 'nulls': self.nulls,
+                'block_size': self.block_size, 'block': self.block[self.index:], 'index': 0}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.lock = threading.Lock()
+
+    def is_empty(self):
+        """Return True if no dimension can be null or missing."""
+        return not self.positions
+
+    def next(self):
+        """Return one record's outcomes: a list of PRESENT, NULL or MISSING per dimension."""
+        with self.lock:
+            i = self.index
+            if i >= len(self.block):
+                u = rng.numpy.random_sample((self.block_size, len(self.positions)))
+                codes = np.zeros((self.block_size, self.width), dtype=np.int8)
+                codes[:, self.positions] = (u < self.missing).astype(np.int8) + (u < self.nulls)
+                self.block = codes.tolist()
+                i = 0
+            self.index = i + 1
+            return self.block[i]
+
+
+class ColumnBlock:
+    """
+    Field values for block_size records at a time, generated a column per dimension.
+
+    next_row() returns one record's values as a tuple aligned with dimensions. Only
+    valid for dimensions whose supports_columns() is True. Like NullMissingMasks,
+    rows are handed out under a lock.
+    """
+    __slots__ = ('dimensions', 'block_size', 'rows', 'index', 'lock')
+
+    def __init__(self, dimensions, block_size):
+        self.dimensions = dimensions
+        self.block_size = block_size
+        self.rows = []
+        self.index = 0
+        self.lock = threading.Lock()
+
+    def __str__(self):
+        return 'ColumnBlock(dimensions='+str([d.name for d in self.dimensions])+', block_size='+str(self.block_size)+')'
+
+    def __getstate__(self):
+        # Pickled (for a checkpoint) without the rows already handed out
+        return {'dimensions': self.dimensions, 'block_size': self.block_size, 'rows': self.rows[self.index:],
+                'index': 0}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def is_eligible(dimensions):
+        """Return True if every dimension is a clock or can be generated a column at a time."""
+        return all(isinstance(d, DimensionTimestampClock) or
+                   (isinstance(d, DimensionNullable) and d.supports_columns())
+                   for d in dimensions)
+
+    def next_row(self):
+        """Return the next record's values, sampling a new block of columns when needed."""
+        with self.lock:
+            i = self.index
+            if i >= len(self.rows):
+                self.rows = list(zip(*[d.get_stochastic_values(self.block_size) for d in self.dimensions]))
+                i = 0
+            self.index = i + 1
+            return self.rows[i]
+
+
+def _isoformat(value):
+    """Format a datetime variable for JSON output, passing any other value through."""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class Emitter:
+    """A named record type: an ordered list of dimensions plus per-record sampling state.
+
+    fields is the record layout: the field names in the order records are built.
+    With isoformat=True, datetime values (clock and timestamp dimensions, and the
+    variables named in datetime_variables) are formatted as ISO 8601 strings while
+    the record is built, ready for JSON output. Otherwise they are left as datetime
+    objects for templates.
+
+    With column_block_size > 0, an eligible emitter samples its field values in
+    columns of that many records (see ColumnBlock); columns is None otherwise.
+
+    With a profiler, each dimension's sampling is timed as "<emitter>.<field>".
+    """
+    __slots__ = ('name', 'dimensions', 'masks', 'columns', 'fields', 'isoformat', 'datetime_variables',
+                 'profiler', 'table', 'build', 'build_slot')
+
+    # Pickled for a checkpoint (see ieg/checkpoint.py); the builders are compiled again on load
+    _STATE = ('name', 'dimensions', 'masks', 'columns', 'fields', 'isoformat', 'datetime_variables', 'table')
+
+    def __init__(self, name, dimensions, isoformat=False, datetime_variables=(), column_block_size=0, profiler=None):
+        self.name = name
+        self.dimensions = dimensions
+        masks = NullMissingMasks(dimensions)
+        self.masks = None if masks.is_empty() else masks
+        self.columns = None
+        if column_block_size > 0 and ColumnBlock.is_eligible(dimensions):
+            self.columns = ColumnBlock([d for d in dimensions if not isinstance(d, DimensionTimestampClock)],
+                                       column_block_size)
+        self.fields = tuple(d.name for d in dimensions)
+        self.isoformat = isoformat
+        self.datetime_variables = set(datetime_variables)
+        self.profiler = profiler
+        self.table = None
+        self.build = self._compile()
+        self.build_slot = None
+
+    def __str__(self):
+        return 'Emitter(name='+self.name+', dimensions='+str([str(d) for d in self.dimensions])+')'
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self._STATE}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.profiler = None
+        self.build = self._compile()
+        self.build_slot = self._compile(self.table) if self.table is not None else None
+
+    def create_record(self, variables, now=None):
+        """Build a record dict from the dimensions and variable values.
+
+        now overrides the clock time for clock dimensions, for records that were
+        planned ahead of the clock.
+        """
+        return self.build(variables, now)
+
+    def bind_table(self, table):
+        """Compile build_slot(slot, now), which reads variables from an ActorTable slot."""
+        self.table = table
+        self.build_slot = self._compile(table)
+
+    def _compile(self, table=None):
+        """Generate and return the record builder for this emitter.
+
+        Without a table, this is build(variables, now) for a variables dict. With an
+        ActorTable, it is build_slot(slot, now), which reads each variable from the
+        table's column for that name and raises KeyError, as a dict would, if the
+        Actor has not set it.
+        """
+        namespace = {'_utc': timezone.utc, '_isoformat': _isoformat}
+        datetime_variables = self.datetime_variables
+        profiler = self.profiler
+        exprs = []
+        reads = []  # statements that fetch variables from the table, before the record is built
+        clock = None
+        column = 0
+        for i, d in enumerate(self.dimensions):
+            if self.columns is not None and not isinstance(d, DimensionTimestampClock):
+                expr = '_row[%d]' % column
+                column += 1
+            elif isinstance(d, DimensionVariable) and table is not None:
+                namespace['_col%d' % i] = table.columns[d.variable_name]
+                expr = '_var%d' % i
+                reads += [
+                    '    _var%d = _col%d[slot]' % (i, i),
+                    '    if _var%d is _unset:' % i,
+                    '        raise KeyError(' + repr(d.variable_name) + ')',
+                ]
+                if isinstance(d, DimensionEntityAttribute):
+                    namespace['_read%d' % i] = d.read
+                    expr = '_read%d(%s)' % (i, expr)
+                elif self.isoformat and d.variable_name in datetime_variables:
+                    expr = '_isoformat(' + expr + ')'
+            elif isinstance(d, DimensionVariable):
+                expr = 'variables[' + repr(d.variable_name) + ']'
+                if isinstance(d, DimensionEntityAttribute):
+                    # The variable holds an entity ID; the field is the entity's attribute
+                    namespace['_read%d' % i] = d.read
+                    expr = '_read%d(%s)' % (i, expr)
+                elif self.isoformat and d.variable_name in datetime_variables:
+                    expr = '_isoformat(' + expr + ')'
+            elif isinstance(d, DimensionTimestampClock):
+                # Every clock dimension in the record shares a single clock read
+                clock = d.clock
+                expr = '_now'
+            else:
+                sample = getattr(d, 'get_stochastic_value', None)
+                if sample is not None:
+                    if profiler is not None:
+                        sample = profiler.timed_dimension(self.name + '.' + d.name, sample)
+                    namespace['_d%d' % i] = sample
+                    expr = '_d%d()' % i
+                else:
+                    # Keep the original run-time error for dimensions that cannot build a value
+                    namespace['_d%d' % i] = d
+                    expr = '_d%d.get_stochastic_value()' % i
+                if self.isoformat and isinstance(d, DimensionTimestamp):
+                    expr += '.isoformat()'
+            exprs.append(expr)
+
+        if table is not None:
+            namespace['_unset'] = table.UNSET
+            lines = ['def build(slot, now=None):'] + reads
+        else:
+            lines = ['def build(variables, now=None):']
+        if clock is not None:
+            namespace['_clock_now'] = clock.now
+            lines += [
+                '    if now is None:',
+                '        now = _clock_now()',
+                '    if now.tzinfo is None:',
+                '        now = now.replace(tzinfo=_utc)',
+                '    _now = now.isoformat()' if self.isoformat else '    _now = now',
+            ]
+        if self.columns is not None:
+            namespace['_next_row'] = self.columns.next_row
+            lines.append('    _row = _next_row()')
+        if self.masks is None:
+            items = ', '.join(repr(name) + ': ' + expr for name, expr in zip(self.fields, exprs))
+            lines.append('    return {' + items + '}')
+        else:
+            namespace['_masks_next'] = self.masks.next
+            masked = set(self.masks.positions)
+            lines += ['    outcome = _masks_next()', '    record = {}']
+            for i, (name, expr) in enumerate(zip(self.fields, exprs)):
+                key = 'record[' + repr(name) + ']'
+                if i in masked:
+                    lines += [
+                        '    if outcome[%d] == %d:' % (i, PRESENT),
+                        '        ' + key + ' = ' + expr,
+                        '    elif outcome[%d] == %d:' % (i, NULL),
+                        '        ' + key + ' = None',
+                    ]
+                else:
+                    lines.append('    ' + key + ' = ' + expr)
+            lines.append('    return record')
+
+        exec(compile('\n'.join(lines) + '\n', '<emitter ' + self.name + '>', 'exec'), namespace)
+        return namespace['build']
@@ -0,0 +1,468 @@
+"""Entity registries: a fixed population of entities whose attributes stay the same across records.
+
+A registry is described by a spec file, a JSON object:
+
+    {
+      "count": 10000000,
+      "seed": 1,
+      "attributes": [
+        {"name": "country", "type": "enum", "values": ["US", "DE", "IN"],
+         "cardinality_distribution": {"type": "exponential", "mean": 0.8}},
+        {"name": "ip", "by": "country", "cases": {
+          "US": {"type": "ipaddress", "cardinality": 0, "distribution": {...}},
+          "DE": {"type": "ipaddress", "cardinality": 0, "distribution": {...}}},
+         "default": {"type": "ipaddress", "cardinality": 0, "distribution": {...}}}
+      ]
+    }
+
+Each attribute is a field generator, as in an emitter, or a set of them chosen by
+the value of an earlier attribute ("by", "cases" and an optional "default"), so
+that attributes are drawn jointly. Entity i has attributes row i.
+
+build_registry() draws the attributes a column of BUILD_CHUNK entities at a time,
+with generators seeded from the spec's seed rather than the run's, and writes one
+file: an 8-byte magic and the little-endian offset of the footer, then a section
+per column, then the footer, a JSON object with the spec's fingerprint and each
+column's kind and sections. The kinds are:
+
+    int, float   one 8-byte number per entity
+    ipv4         one 4-byte address per entity, formatted as a dotted quad when read
+    code         a 4-byte index per entity into a list of distinct values (for enum
+                 and pooled attributes), stored as text
+    text         each entity's value as UTF-8, located by an offset per entity
+
+EntityRegistry maps the file read-only, so that every process of a run shares it
+through the page cache, and reads an attribute of an entity with one index into
+its column. EntityRegistry.open() builds the file the first time and rebuilds it
+when the spec changes; it keeps one registry per spec file in a process.
+
+See docs/entities.md for the config-level reference.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import random
+import shutil
+import struct
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from ieg.rng import rng
+
+logger = logging.getLogger('ieg')
+
+MAGIC = b'IEGENTS1'
+_HEADER = struct.Struct('<8sQ')
+# Format of a registry file; a file of another version is rebuilt
+REGISTRY_VERSION = 1
+# Entities whose attributes are drawn at a time while building
+BUILD_CHUNK = 1 << 20
+# Suffix of the registry file built from a spec file without a "path"
+REGISTRY_SUFFIX = '.entities'
+# Field generator types an attribute may not use: they depend on the clock or an
+# Actor, or produce nested JSON
+EXCLUDED_TYPES = ('clock', 'variable', 'entity', 'entity:attribute', 'object', 'list')
+
+_INT_TYPES = ('int', 'int:static', 'counter')
+_OCTETS = [str(i) for i in range(256)]
+
+
+def load_spec(spec_path):
+    """Read a registry spec file."""
+    with open(spec_path, 'r') as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Error parsing entity registry spec '{spec_path}': {e}")
+
+
+def registry_path(spec_path, spec):
+    """Return the path of the registry file built from spec_path."""
+    return spec.get('path') or os.path.splitext(spec_path)[0] + REGISTRY_SUFFIX
+
+
+def spec_fingerprint(spec):
+    """Return a digest of everything in spec that decides the registry's contents."""
+    content = {key: spec.get(key) for key in ('count', 'seed', 'attributes')}
+    content['version'] = REGISTRY_VERSION
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def validate_spec(spec, context):
+    """Validate a registry spec without building anything. Logs errors and returns True if valid."""
+    from ieg.dimensions import validate_dimension_desc
+    if not isinstance(spec, dict):
+        logger.error("%s: registry spec must be a JSON object", context)
+        return False
+    valid = True
+    count = spec.get('count')
+    if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+        logger.error("%s: 'count' must be an integer >= 1, got %r", context, count)
+        valid = False
+    elif count >= 1 << 32:
+        logger.error("%s: 'count' must be below 2^32, got %d", context, count)
+        valid = False
+    if 'seed' in spec and (not isinstance(spec['seed'], int) or isinstance(spec['seed'], bool)):
+        logger.error("%s: 'seed' must be an integer, got %r", context, spec['seed'])
+        valid = False
+    attributes = spec.get('attributes')
+    if not attributes or not isinstance(attributes, list):
+        logger.error("%s: 'attributes' required and must be a non-empty list", context)
+        return False
+    names = []
+    for i, attribute in enumerate(attributes):
+        actx = f"{context}, attribute '{attribute.get('name', f'[{i}]') if isinstance(attribute, dict) else i}'"
+        if not isinstance(attribute, dict) or 'name' not in attribute:
+            logger.error("%s: attribute must be a JSON object with a 'name'", actx)
+            valid = False
+            continue
+        if attribute['name'] in names:
+            logger.error("%s: duplicate attribute name", actx)
+            valid = False
+        if 'by' in attribute:
+            if attribute['by'] not in names:
+                logger.error("%s: 'by' must name an earlier attribute, got %r", actx, attribute['by'])
+                valid = False
+            cases = attribute.get('cases')
+            if not cases or not isinstance(cases, dict):
+                logger.error("%s: 'cases' required with 'by' and must be a non-empty object", actx)
+                valid = False
+                cases = {}
+            generators = [(f"{actx}, case '{key}'", desc) for key, desc in cases.items()]
+            if 'default' in attribute:
+                generators.append((f"{actx}, default", attribute['default']))
+        else:
+            generators = [(actx, attribute)]
+        for gctx, desc in generators:
+            if not isinstance(desc, dict):
+                logger.error("%s: must be a field generator object", gctx)
+                valid = False
+            elif str(desc.get('type', '')).lower() in EXCLUDED_TYPES:
+                logger.error("%s: type '%s' may not be used for an entity attribute", gctx, desc['type'])
+                valid = False
+            elif not validate_dimension_desc(dict(desc, name=attribute['name']), gctx):
+                valid = False
+        names.append(attribute['name'])
+    return valid
+
+
+def _kind(desc):
+    """Return the column kind of a single field generator desc, or 'pool' for one that picks from a list."""
+    dim_type = str(desc.get('type', '')).lower()
+    if dim_type in _INT_TYPES:
+        return 'int'
+    if dim_type == 'float':
+        return 'float'
+    if dim_type == 'enum' or desc.get('cardinality'):
+        return 'pool'
+    if dim_type == 'ipaddress':
+        return 'ipv4'
+    return 'text'
+
+
+def _column_kind(attribute):
+    """Return the kind a column is stored as: a by-attribute's cases must agree, or it is text."""
+    if 'by' not in attribute:
+        kind = _kind(attribute)
+        return 'code' if kind == 'pool' else kind
+    descs = list(attribute['cases'].values()) + ([attribute['default']] if 'default' in attribute else [])
+    kinds = {_kind(desc) for desc in descs}
+    if len(kinds) == 1 and next(iter(kinds)) in ('int', 'float', 'ipv4'):
+        return next(iter(kinds))
+    return 'text'
+
+
+def _sample(dimension, n):
+    """Return n values of dimension as a list, a column at a time if it can."""
+    if dimension.supports_columns():
+        return dimension.get_stochastic_values(n)
+    return [dimension.get_stochastic_value() for _ in range(n)]
+
+
+class _Column:
+    """One attribute's generators and the sections its values are written to while building."""
+
+    def __init__(self, attribute, directory):
+        from ieg.dimensions import parse_element
+        self.name = attribute['name']
+        self.kind = _column_kind(attribute)
+        self.by = attribute.get('by')
+        if self.by is None:
+            self.dimension = parse_element(dict(attribute, name=self.name), None)
+            self.cases = None
+        else:
+            self.dimension = None
+            self.cases = {key: parse_element(dict(desc, name=self.name), None)
+                          for key, desc in attribute['cases'].items()}
+            self.default = (parse_element(dict(attribute['default'], name=self.name), None)
+                            if 'default' in attribute else None)
+        self.pool = None
+        if self.kind == 'code':
+            self.pool = [_text(v) for v in self.dimension.cardinality]
+        self.files = {}
+        for section in self.sections():
+            self.files[section] = tempfile.TemporaryFile(dir=directory)
+        self.text_size = 0
+
+    def sections(self):
+        if self.kind == 'text':
+            return ('offsets', 'data')
+        if self.kind == 'code':
+            return ('codes',)
+        return ('values',)
+
+    def generate(self, n, columns):
+        """Draw n values; columns holds the chunk's values of the earlier attributes, by name."""
+        if self.cases is None:
+            values = self._draw(self.dimension, n)
+        else:
+            by = columns[self.by]
+            values = self._empty(n)
+            done = np.zeros(n, dtype=bool)
+            for key, dimension in self.cases.items():
+                mask = by == key
+                count = int(np.count_nonzero(mask))
+                if count:
+                    values[mask] = self._draw(dimension, count)
+                    done |= mask
+            rest = np.flatnonzero(~done)
+            if len(rest):
+                if self.default is None:
+                    raise ValueError(f"Entity attribute '{self.name}': no case for "
+                                     f"{by[rest[0]]!r} of '{self.by}' and no default")
+                values[rest] = self._draw(self.default, len(rest))
+        return values
+
+    def _empty(self, n):
+        return np.empty(n, dtype={'int': np.int64, 'float': np.float64, 'ipv4': np.uint32}.get(self.kind, object))
+
+    def _draw(self, dimension, n):
+        if self.kind == 'code':
+            dist = dimension.cardinality_distribution
+            if hasattr(dist, 'get_samples'):
+                codes = dist.get_samples(n).astype(np.int64)
+            else:
+                codes = np.array([dist.get_sample() for _ in range(n)], dtype=np.int64)
+            np.clip(codes, 0, len(self.pool) - 1, out=codes)
+            return codes.astype(np.uint32)
+        if self.kind == 'ipv4' and getattr(dimension, 'cardinality', None) is None \
+                and hasattr(dimension.value_distribution, 'get_samples'):
+            values = dimension.value_distribution.get_samples(n).astype(np.int64)
+            return np.clip(values, 0, 0xFFFFFFFF).astype(np.uint32)
+        values = _sample(dimension, n)
+        if self.kind == 'ipv4':
+            return np.array([_ip_to_int(v) for v in values], dtype=np.uint32)
+        if self.kind == 'int':
+            return np.array(values, dtype=np.int64)
+        if self.kind == 'float':
+            return np.array(values, dtype=np.float64)
+        array = np.empty(n, dtype=object)
+        array[:] = [v if isinstance(v, str) else _text(v) for v in values]
+        return array
+
+    def comparable(self, values):
+        """Return the chunk's values as the strings a later attribute's cases are keyed by."""
+        if self.kind == 'code':
+            return np.array(self.pool, dtype=object)[values]
+        if self.kind == 'ipv4':
+            return np.array([_int_to_ip(v) for v in values.tolist()], dtype=object)
+        if self.kind == 'text':
+            return values
+        return values.astype(str).astype(object)
+
+    def write(self, values):
+        """Append a chunk of values to the column's sections."""
+        if self.kind == 'text':
+            values = values.tolist()
+            text = ''.join(values)
+            data = text.encode('utf-8')
+            if len(data) == len(text):
+                # All ASCII: each value's length in bytes is its length in characters
+                lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+            else:
+                lengths = np.fromiter((len(v.encode('utf-8')) for v in values), dtype=np.int64, count=len(values))
+            offsets = self.text_size + np.cumsum(lengths)
+            if self.text_size == 0 and not self.files['offsets'].tell():
+                self.files['offsets'].write(np.zeros(1, dtype='<i8').tobytes())
+            self.files['offsets'].write(offsets.astype('<i8').tobytes())
+            self.files['data'].write(data)
+            self.text_size = int(offsets[-1]) if len(offsets) else self.text_size
+        elif self.kind == 'code':
+            self.files['codes'].write(values.astype('<u4').tobytes())
+        else:
+            dtype = {'int': '<i8', 'float': '<f8', 'ipv4': '<u4'}[self.kind]
+            self.files['values'].write(values.astype(dtype).tobytes())
+
+
+def _text(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def _ip_to_int(ip):
+    a, b, c, d = (int(octet) for octet in ip.split('.'))
+    return (a << 24) | (b << 16) | (c << 8) | d
+
+
+def _int_to_ip(value, octets=_OCTETS):
+    return '.'.join((octets[value >> 24], octets[value >> 16 & 0xFF], octets[value >> 8 & 0xFF], octets[value & 0xFF]))
+
+
+def build_registry(spec, path):
+    """Draw a registry's attributes and write it to path, atomically. Returns the number of bytes written."""
+    started = time.perf_counter()
+    count = spec['count']
+    directory = os.path.dirname(os.path.abspath(path))
+    # The registry depends only on its spec: draw from generators of its own, and
+    # leave the run's untouched
+    saved = (rng.random, rng.numpy)
+    seed = spec.get('seed', 0)
+    rng.random = random.Random(seed)
+    rng.numpy = np.random.RandomState(np.random.MT19937(seed))
+    try:
+        columns = [_Column(attribute, directory) for attribute in spec['attributes']]
+        for first in range(0, count, BUILD_CHUNK):
+            n = min(BUILD_CHUNK, count - first)
+            comparable = {}
+            for column in columns:
+                values = column.generate(n, comparable)
+                column.write(values)
+                if any(other.by == column.name for other in columns):
+                    comparable[column.name] = column.comparable(values)
+    finally:
+        rng.random, rng.numpy = saved
+
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    footer = {'version': REGISTRY_VERSION, 'fingerprint': spec_fingerprint(spec), 'count': count, 'columns': {}}
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, 0))
+        position = _HEADER.size
+        for column in columns:
+            sections = {}
+            if column.kind == 'code':
+                pool = [v.encode('utf-8') for v in column.pool]
+                pool_offsets = np.concatenate(([0], np.cumsum([len(b) for b in pool]))).astype('<i8')
+                column.files['pool_offsets'] = tempfile.TemporaryFile(dir=directory)
+                column.files['pool_offsets'].write(pool_offsets.tobytes())
+                column.files['pool'] = tempfile.TemporaryFile(dir=directory)
+                column.files['pool'].write(b''.join(pool))
+            for section, data in column.files.items():
+                padding = -position % 8
+                f.write(b'\0' * padding)
+                position += padding
+                data.seek(0)
+                shutil.copyfileobj(data, f, 1 << 20)
+                size = data.tell()
+                data.close()
+                sections[section] = [position, size]
+                position += size
+            footer['columns'][column.name] = {'kind': column.kind, 'sections': sections}
+        f.write(json.dumps(footer).encode('utf-8'))
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, position))
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.seek(0, os.SEEK_END)
+    os.replace(temp_path, path)
+    logger.info("Built entity registry %s: %d entities, %d attributes, %.1f MB in %.1fs",
+                path, count, len(columns), size / 1e6, time.perf_counter() - started)
+    return size
+
+
+class EntityRegistry:
+    """A registry file, memory-mapped read-only. Entity IDs run from 0 to count - 1.
+
+    Use EntityRegistry.open(), which builds the file when needed and shares one
+    instance per spec file and process.
+    """
+
+    _open = {}
+    _open_lock = threading.Lock()
+
+    def __init__(self, path, fingerprint=None):
+        self.path = path
+        self.spec_path = None
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, footer_offset = _HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or footer_offset == 0:
+            self.map.close()
+            raise ValueError(f"'{path}' is not a complete entity registry")
+        footer = json.loads(self.map[footer_offset:])
+        if footer.get('version') != REGISTRY_VERSION or (fingerprint is not None
+                                                          and footer.get('fingerprint') != fingerprint):
+            self.map.close()
+            raise ValueError(f"Entity registry '{path}' was built from another spec")
+        self.count = footer['count']
+        self.columns = footer['columns']
+        view = memoryview(self.map)
+        self.readers = {name: self._reader(view, column) for name, column in self.columns.items()}
+
+    def __str__(self):
+        return 'EntityRegistry(path='+self.path+', count='+str(self.count)+', attributes='+str(list(self.columns))+')'
+
+    @classmethod
+    def open(cls, spec_path):
+        """Return the process's registry for spec_path, building its file if it is missing or out of date."""
+        key = os.path.abspath(spec_path)
+        with cls._open_lock:
+            registry = cls._open.get(key)
+            if registry is None:
+                spec = load_spec(spec_path)
+                path = registry_path(spec_path, spec)
+                fingerprint = spec_fingerprint(spec)
+                try:
+                    registry = cls(path, fingerprint)
+                except (OSError, ValueError) as e:
+                    if os.path.exists(path):
+                        logger.info("Rebuilding entity registry %s: %s", path, e)
+                    build_registry(spec, path)
+                    registry = cls(path, fingerprint)
+                registry.spec_path = spec_path
+                cls._open[key] = registry
+                logger.debug("Opened %s", registry)
+            return registry
+
+    def __reduce__(self):
+        # Pickled by spec, for a checkpoint; loading maps the file again
+        return (EntityRegistry.open, (self.spec_path,))
+
+    def _reader(self, view, column):
+        """Return a function of an entity ID that reads one value of the column."""
+        kind = column['kind']
+        sections = column['sections']
+
+        def section(name, fmt):
+            offset, size = sections[name]
+            return view[offset:offset + size].cast(fmt)
+
+        if kind in ('int', 'float'):
+            values = section('values', 'q' if kind == 'int' else 'd')
+            return values.__getitem__
+        if kind == 'ipv4':
+            values = section('values', 'I')
+            return lambda entity: _int_to_ip(values[entity])
+        if kind == 'code':
+            codes = section('codes', 'I')
+            pool_offsets = section('pool_offsets', 'q')
+            offset, size = sections['pool']
+            pool = [bytes(view[offset + pool_offsets[i]:offset + pool_offsets[i + 1]]).decode('utf-8')
+                    for i in range(len(pool_offsets) - 1)]
+            return lambda entity: pool[codes[entity]]
+        offsets = section('offsets', 'q')
+        base = sections['data'][0]
+        data = self.map
+        return lambda entity: data[base + offsets[entity]:base + offsets[entity + 1]].decode('utf-8')
+
+    def reader(self, attribute):
+        """Return the function that reads attribute for an entity ID."""
+        return self.readers[attribute]
+
+    def get(self, entity):
+        """Return all of an entity's attributes as a dict."""
+        return {name: read(entity) for name, read in self.readers.items()}
@@ -0,0 +1,108 @@
+"""Closed-form Actor lifecycles for the simulated-time fast path.
+
+An Actor whose intermediate timers all draw from iid distributions never consults
+the clock or any other Actor while it runs: its route through the state graph and
+the time of every step depend only on its own draws. ClosedFormLifecycle detects
+such state graphs at load time. The driver then steps each Actor from one activity
+to the next as its records fall due, with no worker thread or Clock.sleep handoff
+per step, and keeps only each Actor's current position (see ActorTable).
+
+Graphs that use gmm_temporal on an intermediate timer, or that contain a state
+with no path to event:end, are not eligible and run on worker threads as before.
+"""
+
+import logging
+from datetime import timedelta
+
+from ieg.distributions import DistGMMTemporal, SampleBuffer
+
+logger = logging.getLogger('ieg')
+
+
+class ClosedFormLifecycle:
+    """Walks Actor lifecycles over a clock-independent state graph, one activity at a time."""
+
+    def __init__(self, states, initial_state):
+        self.states = states
+        self.initial_state = initial_state
+        self.on_visit = None  # optional callback taking each visited state's name, for --profile
+        # One block-sampled delay stream per intermediate timer; every other state
+        # type has a constant zero delay
+        self.delay_buffers = {}
+        for name, state in states.items():
+            if state.type == 'event:intermediate:timer':
+                self.delay_buffers[name] = SampleBuffer(state.delay)
+
+    def __str__(self):
+        return 'ClosedFormLifecycle(initial_state='+self.initial_state.name+', timers='+str(list(self.delay_buffers.keys()))+')'
+
+    @staticmethod
+    def is_eligible(states, initial_state):
+        """Return True if every Actor lifecycle over this graph can be stepped without the clock."""
+        reachable = set()
+        frontier = [initial_state.name]
+        while frontier:
+            name = frontier.pop()
+            if name in reachable or name not in states:
+                continue
+            reachable.add(name)
+            frontier.extend(states[name].transition_states)
+
+        for name in reachable:
+            if isinstance(states[name].delay, DistGMMTemporal):
+                logger.debug("Closed-form lifecycle disabled: state '%s' uses a clock-dependent delay", name)
+                return False
+
+        # Every reachable state must be able to reach event:end, otherwise walking
+        # to the next activity might never terminate.
+        can_escape = {name for name in reachable if states[name].type == 'event:end'}
+        changed = True
+        while changed:
+            changed = False
+            for name in reachable - can_escape:
+                if any(n in can_escape or n not in states for n in states[name].transition_states):
+                    can_escape.add(name)
+                    changed = True
+        if reachable - can_escape:
+            logger.debug("Closed-form lifecycle disabled: states %s have no path to event:end", sorted(reachable - can_escape))
+            return False
+        return True
+
+    def walk(self, state, t, horizon=None, leaving=False):
+        """Enter state at time t and walk on to the next activity.
+
+        Returns (t, activity) for the next activity the Actor will process, or
+        (end_time, None) once the lifecycle is over. A walk that passes horizon
+        ends there, since nothing after it will ever be emitted. With leaving,
+        state is an activity just processed at t, and the walk starts from the
+        state after it.
+        """
+        on_visit = self.on_visit
+        while True:
+            if not leaving:
+                buffer = self.delay_buffers.get(state.name)
+                if buffer is not None:
+                    delta = float(buffer.next())
+                    if delta > 0:
+                        t = t + timedelta(seconds=delta)
+                if horizon is not None and t > horizon:
+                    return t, None
+                if on_visit is not None:
+                    on_visit(state.name)
+                if state.type == 'activity':
+                    return t, state
+            leaving = False
+            next_state_name = state.get_next_state_name()
+            if next_state_name is None:
+                return t, None
+            state = self.states.get(next_state_name)
+            if state is None or state.type == 'event:end':
+                return t, None
+
+    def first_step(self, start_time, horizon=None):
+        """Return (t, activity) for a new Actor's first activity, or (end_time, None)."""
+        return self.walk(self.initial_state, start_time, horizon)
+
+    def next_step(self, activity, t, horizon=None):
+        """Return (t, activity) for the activity after one processed at t, or (end_time, None)."""
+        return self.walk(activity, t, horizon, leaving=True)
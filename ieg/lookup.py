@@ -0,0 +1,196 @@
+"""Value files: large lists of values, memory-mapped, for the "enum:file" field generator.
+
+A value file is a UTF-8 text file with one value per line. In a weighted file
+each line ends with a tab and the value's weight, a non-negative number, and
+values are picked in proportion to it. Blank lines are skipped.
+
+The file is never parsed into Python objects. ValueFile maps it into memory and
+reads a value with one slice of the map, between the byte offsets of its line in
+an index. Building the index takes one pass over the file with NumPy (and, for a
+weighted file, one float() per line), so the index is saved beside the file, as
+<path>.idx, and used again by every later run and process while the file's size
+and modification time are unchanged. The index is memory-mapped too: the
+processes of a run (see --processes and --partitions) share both files through
+the page cache instead of each holding its own copy.
+
+ValueFile.open() keeps one ValueFile per file in a process, however many
+dimensions use it.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+
+import numpy as np
+
+logger = logging.getLogger('ieg')
+
+INDEX_MAGIC = b'IEGIDX01'
+# Index header: magic, source file size, source modification time (ns), values, weighted
+_INDEX_HEADER = struct.Struct('<8sQQQQ')
+# Suffix of the index file saved beside a value file
+INDEX_SUFFIX = '.idx'
+
+_NEWLINE = ord('\n')
+_TAB = ord('\t')
+_CR = ord('\r')
+
+
+def build_index(data, weighted=False, path='<data>'):
+    """Return (starts, ends, cumulative) for the values in data, a bytes-like object.
+
+    Value i is data[starts[i]:ends[i]]. cumulative holds the running total of the
+    weights of a weighted file, and is None for an unweighted one.
+    """
+    data = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(data == _NEWLINE)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(data)]))
+    # Drop a \r before each newline, then blank lines
+    crlf = (ends > starts) & (data[np.maximum(ends - 1, 0)] == _CR)
+    ends = ends - crlf
+    keep = ends > starts
+    starts = starts[keep].astype(np.int64)
+    ends = ends[keep].astype(np.int64)
+    if not weighted:
+        return starts, ends, None
+    # The weight follows the last tab on the line
+    tabs = np.flatnonzero(data == _TAB)
+    tab = np.full(len(starts), -1, dtype=np.int64)
+    if len(tabs):
+        last_tab = np.searchsorted(tabs, ends) - 1
+        tab = np.where(last_tab >= 0, tabs[np.maximum(last_tab, 0)], -1)
+    missing = np.flatnonzero(tab < starts)
+    if len(missing):
+        raise ValueError(f"Weighted value file '{path}': line {_line_number(data, starts[missing[0]])} "
+                         "has no tab-separated weight")
+    weights = np.empty(len(starts), dtype=np.float64)
+    for i, (t, end) in enumerate(zip(tab.tolist(), ends.tolist())):
+        try:
+            weights[i] = float(data[t + 1:end].tobytes())
+        except ValueError:
+            raise ValueError(f"Weighted value file '{path}': line {_line_number(data, starts[i])} "
+                             "has a weight that is not a number") from None
+    if len(weights) and (weights.min() < 0 or not np.isfinite(weights).all()):
+        raise ValueError(f"Weighted value file '{path}': weights must be finite and non-negative")
+    cumulative = np.cumsum(weights)
+    if len(cumulative) and cumulative[-1] <= 0:
+        raise ValueError(f"Weighted value file '{path}': the weights add up to 0")
+    return starts, tab.astype(np.int64), cumulative
+
+
+def _line_number(data, position):
+    return int(np.count_nonzero(data[:position] == _NEWLINE)) + 1
+
+
+class ValueFile:
+    """The values of one value file, memory-mapped, with an index of their offsets.
+
+    Use ValueFile.open(), which shares one instance per file and process.
+    """
+
+    _open = {}
+    _open_lock = threading.Lock()
+
+    def __init__(self, path, weighted=False):
+        self.path = path
+        self.weighted = weighted
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size == 0:
+                raise ValueError(f"Value file '{path}' has no values")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index_map = None
+        index = self._load_index(stat)
+        if index is None:
+            index = build_index(self.map, weighted, path)
+            self._save_index(stat, index)
+        self.starts, self.ends, self.cumulative = index
+        self.count = len(self.starts)
+        if self.count == 0:
+            raise ValueError(f"Value file '{path}' has no values")
+        self.total = float(self.cumulative[-1]) if weighted else None
+
+    def __str__(self):
+        return 'ValueFile(path='+self.path+', count='+str(self.count)+', weighted='+str(self.weighted)+')'
+
+    def __reduce__(self):
+        # Pickled by path, for a checkpoint; loading maps the file again
+        return (ValueFile.open, (self.path, self.weighted))
+
+    @classmethod
+    def open(cls, path, weighted=False):
+        """Return the process's ValueFile for path, opening it the first time."""
+        key = (os.path.abspath(path), weighted)
+        with cls._open_lock:
+            value_file = cls._open.get(key)
+            if value_file is None:
+                value_file = cls._open[key] = cls(path, weighted)
+                logger.debug("Opened %s", value_file)
+            return value_file
+
+    def _index_path(self):
+        return self.path + INDEX_SUFFIX
+
+    def _load_index(self, stat):
+        """Map the saved index, if it was built from this version of the file."""
+        try:
+            with open(self._index_path(), 'rb') as f:
+                index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(index_map) < _INDEX_HEADER.size:
+            index_map.close()
+            return None
+        magic, size, mtime, count, weighted = _INDEX_HEADER.unpack_from(index_map, 0)
+        expected = _INDEX_HEADER.size + count * 8 * (3 if weighted else 2)
+        if (magic != INDEX_MAGIC or size != stat.st_size or mtime != stat.st_mtime_ns
+                or bool(weighted) != self.weighted or len(index_map) != expected):
+            index_map.close()
+            return None
+        offset = _INDEX_HEADER.size
+        starts = np.frombuffer(index_map, dtype='<i8', count=count, offset=offset)
+        ends = np.frombuffer(index_map, dtype='<i8', count=count, offset=offset + count * 8)
+        cumulative = None
+        if weighted:
+            cumulative = np.frombuffer(index_map, dtype='<f8', count=count, offset=offset + count * 16)
+        self.index_map = index_map
+        return starts, ends, cumulative
+
+    def _save_index(self, stat, index):
+        """Write the index beside the file, atomically, so that other processes can map it."""
+        starts, ends, cumulative = index
+        path = self._index_path()
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(_INDEX_HEADER.pack(INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, len(starts),
+                                           int(self.weighted)))
+                f.write(starts.astype('<i8').tobytes())
+                f.write(ends.astype('<i8').tobytes())
+                if cumulative is not None:
+                    f.write(cumulative.astype('<f8').tobytes())
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning("Could not save the index of '%s' (%s); it will be built again next time", self.path, e)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        logger.info("Indexed %d values of '%s' in %s", len(starts), self.path, path)
+
+    def value(self, i):
+        """Return value i."""
+        return self.map[self.starts[i]:self.ends[i]].decode('utf-8')
+
+    def values(self, index):
+        """Return the values at index, an array of value numbers, as a list."""
+        data = self.map
+        return [data[start:end].decode('utf-8')
+                for start, end in zip(self.starts[index].tolist(), self.ends[index].tolist())]
+
+    def weighted_index(self, u):
+        """Return the value numbers that the uniform [0, 1) draws u pick, in proportion to the weights."""
+        index = np.searchsorted(self.cumulative, u * self.total, side='right')
+        return np.minimum(index, self.count - 1)
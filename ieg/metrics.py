@@ -0,0 +1,197 @@
+"""Live metrics for long-running generators: a Prometheus endpoint and a JSON status line.
+
+Metrics reads the driver's counters on demand. The only hot-path cost is a timer
+around the stdout write, for flush latency, and that is only added when metrics are
+enabled. Rates and latencies are averaged over the window since the oldest snapshot
+taken within the last WINDOW seconds, so every consumer sees a recent figure
+however often it polls. The largest lag is kept per consumer, so each sees the
+worst lag since its own previous snapshot.
+
+Two surfaces expose the same snapshot:
+  serve_prometheus(port) — text exposition format at http://127.0.0.1:<port>/metrics
+  start_status_line(interval) — one JSON object per line on stderr every interval seconds
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger('ieg')
+
+WINDOW = 60.0  # seconds of history used for rates and averages
+
+# Snapshot fields exported to Prometheus: (field, metric type, help text)
+PROMETHEUS_METRICS = (
+    ('records_total', 'counter', 'Records written to the output.'),
+    ('records_per_second', 'gauge', 'Records written per second over the recent window.'),
+    ('active_actors', 'gauge', 'Actors currently running a lifecycle.'),
+    ('max_actors', 'gauge', 'Current Actor limit: -m times the schedule multiplier, capped by --memory-budget.'),
+    ('bytes_per_actor', 'gauge', 'Estimated memory per in-flight Actor (closed-form fast path only).'),
+    ('actor_state_bytes', 'gauge', 'Estimated memory held by in-flight Actors (closed-form fast path only).'),
+    ('schedule_multiplier', 'gauge', 'Capacity multiplier from the --schedule file (1 without one).'),
+    ('output_queue_depth', 'gauge', 'Records generated but not yet written (waiting for a --batch to fill).'),
+    ('flush_latency_seconds', 'gauge', 'Mean time of one write and flush (a record, or a batch with --batch) over the recent window.'),
+    ('lag_seconds', 'gauge', 'How far behind schedule the most recent real-time step ran.'),
+    ('lag_max_seconds', 'gauge', 'Largest real-time lag since the previous scrape.'),
+    ('events_dropped_total', 'counter', 'Records not emitted because they were too late (--lag-policy drop).'),
+    ('actors_shed_total', 'counter', 'Actors ended early because they fell too far behind (--lag-policy shed).'),
+    ('run_time_seconds', 'gauge', 'Clock seconds since the run started.'),
+)
+
+
+class Metrics:
+    """Collects live metrics for one DataDriver."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.lock = threading.Lock()
+        self.flush_count = 0
+        self.flush_seconds = 0.0
+        self.started = time.monotonic()
+        self.history = deque()  # (monotonic time, records, flush_count, flush_seconds)
+        self.max_lags = {}  # consumer: largest lag the clock reported since the consumer's last snapshot
+        self.instrument()
+
+    def __str__(self):
+        return 'Metrics(driver='+self.driver.name+')'
+
+    def instrument(self):
+        """Time every write to the output, single records and batches, for the flush latency metric."""
+        printer = self.driver.target_printer
+        perf_counter = time.perf_counter
+
+        def timed(write):
+            def timed_write(data):
+                t0 = perf_counter()
+                write(data)
+                elapsed = perf_counter() - t0
+                with self.lock:
+                    self.flush_seconds += elapsed
+                    self.flush_count += 1
+            return timed_write
+        printer.print = timed(printer.print)
+        printer.write = timed(printer.write)
+
+    def add_consumer(self, consumer):
+        """Start tracking the largest lag for consumer now, before its first snapshot."""
+        with self.lock:
+            self.max_lags.setdefault(consumer, 0.0)
+
+    def max_lag(self, consumer):
+        """Return the largest real-time lag since consumer's previous call.
+
+        The clock's maximum is read and reset here only, and folded into every
+        consumer's, so that polling by one consumer does not hide lag from another.
+        """
+        with self.lock:
+            lag = self.driver.global_clock.reset_max_lag()
+            max_lags = self.max_lags
+            for name, max_lag in max_lags.items():
+                if lag > max_lag:
+                    max_lags[name] = lag
+            max_lag = max(max_lags.get(consumer, 0.0), lag)
+            max_lags[consumer] = 0.0
+        return max_lag
+
+    def snapshot(self, consumer='snapshot'):
+        """Return the driver's report() plus rates, latency and lag, as a dict.
+
+        lag_max_seconds covers the time since consumer's previous snapshot.
+        """
+        driver = self.driver
+        report = driver.report()
+        now = time.monotonic()
+        records = report['total_records']
+        with self.lock:
+            sample = (now, records, self.flush_count, self.flush_seconds)
+            while self.history and now - self.history[0][0] > WINDOW:
+                self.history.popleft()
+            base = self.history[0] if self.history else (self.started, 0, 0, 0.0)
+            self.history.append(sample)
+        elapsed = now - base[0]
+        flushes = sample[2] - base[2]
+
+        multiplier = driver.schedule.get_multiplier() if driver.schedule else 1.0
+        max_actors = max(1, int(driver.max_entities * multiplier))
+        if driver.actor_capacity is not None:
+            max_actors = min(max_actors, driver.actor_capacity)
+        table = driver.actor_table
+        real = driver.time_type == 'REAL'
+        report.update({
+            'records_total': records,
+            'records_per_second': (records - base[1]) / elapsed if elapsed > 0 else 0.0,
+            'active_actors': report['active_sessions'],
+            'max_actors': max_actors,
+            'bytes_per_actor': driver.actor_bytes,
+            'actor_state_bytes': driver.actor_bytes * table.in_use if driver.actor_bytes is not None else None,
+            'schedule_multiplier': multiplier,
+            'output_queue_depth': driver.unwritten_records(),
+            'flush_latency_seconds': (sample[3] - base[3]) / flushes if flushes else 0.0,
+            'lag_seconds': driver.global_clock.lag() if real else None,
+            'lag_max_seconds': self.max_lag(consumer) if real else None,
+            'lag_policy': driver.lag_policy,
+            'events_dropped_total': driver.dropped_events,
+            'actors_shed_total': driver.shed_actors,
+            'run_time_seconds': report['run_time'],
+        })
+        return report
+
+    def prometheus_text(self):
+        """Render the current snapshot in the Prometheus text exposition format."""
+        snapshot = self.snapshot('prometheus')
+        label = '{generator="' + str(self.driver.name).replace('\\', '\\\\').replace('"', '\\"') + '"}'
+        lines = []
+        for field, metric_type, help_text in PROMETHEUS_METRICS:
+            value = snapshot.get(field)
+            if value is None:
+                continue
+            name = 'ieg_' + field
+            lines.append('# HELP ' + name + ' ' + help_text)
+            lines.append('# TYPE ' + name + ' ' + metric_type)
+            lines.append(name + label + ' ' + repr(float(value)))
+        return '\n'.join(lines) + '\n'
+
+    def serve_prometheus(self, port, host='127.0.0.1'):
+        """Serve /metrics on host:port from a daemon thread. Returns the server."""
+        metrics = self
+        self.add_consumer('prometheus')
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("metrics: " + format, *args)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='Metrics', daemon=True).start()
+        logger.info("Serving Prometheus metrics at http://%s:%d/metrics", host, server.server_address[1])
+        return server
+
+    def start_status_line(self, interval, stream=None):
+        """Write the snapshot as a JSON line to stream (stderr) every interval seconds."""
+        stream = stream if stream is not None else sys.stderr
+        self.add_consumer('status')
+
+        def status_line():
+            while True:
+                time.sleep(interval)
+                snapshot = self.snapshot('status')
+                snapshot['time'] = datetime.now().isoformat()
+                stream.write(json.dumps(snapshot, default=str) + '\n')
+                stream.flush()
+        threading.Thread(target=status_line, name='Status', daemon=True).start()
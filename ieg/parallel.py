@@ -0,0 +1,221 @@
+"""Generation split across processes.
+
+run_real_time() runs a real-time generator as several processes, so that record
+generation is not limited to the one core a single process can use. Each process
+is an independent DataDriver with its share of the Actors (-m) and records (-n).
+The event:start:timer spawns Actors N times less often in each of N processes, so
+together they start Actors at the config's rate; process i's first arrival is
+held back by i/N of a gap, so that with a constant timer the processes take turns. Their output goes through one
+shared-memory RingBuffer (see ieg/ring.py) to the calling process, whose
+StdoutPrinter is the only writer.
+
+run_partitions() splits a simulated-time backfill (-s with -r) into windows of
+equal length and generates them concurrently, one file per window. A run that
+starts at a window's start would open with no Actors in flight and ramp up, so
+every window but the first has its clock started a warm-up period early. Records
+from the warm-up are not written (see DataDriver's emit_window): the window opens
+with the population of in-flight Actors, mid-lifecycle, that a run from -s would
+have by then. The warm-up lasts WARMUP_LIFETIMES mean Actor lifetimes, solved
+from the state graph (see ieg.predict.absorbing_chain).
+"""
+
+import copy
+import logging
+import multiprocessing
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import isodate
+import numpy as np
+
+from ieg.core import DataDriver, FilePrinter, StdoutPrinter
+from ieg.distributions import scale_distribution_desc
+from ieg.predict import absorbing_chain
+from ieg.ring import DEFAULT_RING_SIZE, RingBuffer, RingPrinter
+from ieg.validate import validate_config
+
+logger = logging.getLogger('ieg')
+
+# Log format of the generator processes, as generator.py's
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(name)s - %(message)s'
+# A partition's warm-up lasts this many mean Actor lifetimes. After k lifetimes
+# about e^-k of the population a run from -s would have is still missing, for
+# exponential lifetimes.
+WARMUP_LIFETIMES = 10
+
+
+def split_evenly(total, parts):
+    """Split total into parts integers that differ by at most one, largest first."""
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def thin_arrivals(config, factor):
+    """Return a copy of config whose event:start:timer starts Actors factor times less often."""
+    config = copy.deepcopy(config)
+    for state in config['states']:
+        if state.get('type') == 'event:start:timer':
+            state['cardinality_distribution'] = scale_distribution_desc(state['cardinality_distribution'], factor)
+    return config
+
+
+def _generate(ring, driver_args, seed, log_level):
+    """Run one generator process, putting its output into ring."""
+    logging.basicConfig(format=LOG_FORMAT, stream=sys.stderr)
+    logger.setLevel(log_level)
+    printer = RingPrinter(ring)
+    try:
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+        # The clock starts when this process does, so that -r counts from here
+        driver = DataDriver(start_time=datetime.now(), **driver_args)
+        driver.header = None  # written once, by the writer
+        driver.target_printer = printer
+        driver.simulate()
+    finally:
+        # Worker threads may still be finishing a step; none may be in the ring when the process exits
+        printer.close()
+        ring.close_producer()
+        ring.close()
+
+
+def run_real_time(processes, config, max_entities, total_recs=None, runtime=None, seed=None,
+                  ring_size=DEFAULT_RING_SIZE, printer=None, **driver_options):
+    """Generate in real time with processes generator processes, writing their output from this one.
+
+    max_entities and total_recs are split between the processes; runtime applies to
+    each. With a seed, process i is seeded with seed + i. driver_options are passed
+    to every DataDriver (template_name, schedule_config, batch_size and so on).
+    printer receives every record or batch with write(); it defaults to a
+    StdoutPrinter. Returns the ring's stats().
+    """
+    if processes > max_entities:
+        raise ValueError(f"--processes {processes} needs -m of at least {processes}, got {max_entities}")
+    if not validate_config(config, template_name=driver_options.get('template_name')):
+        raise ValueError("Configuration is invalid — see log output for details.")
+    printer = printer if printer is not None else StdoutPrinter()
+    template_name = driver_options.get('template_name')
+    header = config.get('templates', {}).get(template_name, {}).get('header') if template_name else None
+    if header:
+        printer.print(header)
+
+    context = multiprocessing.get_context('spawn')
+    ring = RingBuffer(ring_size, producers=processes, context=context)
+    shares = split_evenly(max_entities, processes)
+    record_shares = split_evenly(total_recs, processes) if total_recs is not None else [None] * processes
+    process_config = thin_arrivals(config, processes)
+    workers = []
+    try:
+        for i in range(processes):
+            driver_args = dict(driver_options, name=f'cli-{i}', config=process_config, runtime=runtime,
+                               total_recs=record_shares[i], time_type='REAL', max_entities=shares[i],
+                               arrival_phase=i / processes)
+            worker = context.Process(target=_generate, name=f'generator-{i}',
+                                     args=(ring, driver_args, None if seed is None else seed + i,
+                                           logger.getEffectiveLevel()))
+            worker.start()
+            workers.append(worker)
+        logger.info("Started %d generator processes (-m %s)", processes, '/'.join(str(m) for m in shares))
+        ring.drain(printer.write, producers_alive=lambda: any(w.is_alive() for w in workers))
+        for worker in workers:
+            worker.join()
+        stats = ring.stats()
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        ring.close()
+    failed = [w.name for w in workers if w.exitcode != 0]
+    if failed:
+        raise RuntimeError(f"Generator process(es) failed: {', '.join(failed)}")
+    return stats
+
+
+def warmup_seconds(config):
+    """Return how long a partition simulates before its window: WARMUP_LIFETIMES mean Actor lifetimes."""
+    return WARMUP_LIFETIMES * absorbing_chain(config)[1]
+
+
+def partition_windows(start_time, seconds, partitions):
+    """Split seconds from start_time into partitions (start, end) windows of equal length."""
+    bounds = [start_time + timedelta(seconds=seconds * i / partitions) for i in range(partitions + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _generate_partition(path, driver_args, clock_start, window, seed, log_level):
+    """Generate one partition into path and return the number of records written."""
+    logging.basicConfig(format=LOG_FORMAT, stream=sys.stderr)
+    logger.setLevel(log_level)
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    runtime = isodate.duration_isoformat(window[1] - clock_start)
+    printer = FilePrinter(path)
+    try:
+        driver = DataDriver(start_time=clock_start, runtime=runtime, emit_window=window, **driver_args)
+        driver.target_printer = printer
+        driver.simulate()
+    finally:
+        printer.close()
+    return driver.sim_control.get_record_count()
+
+
+def run_partitions(partitions, config, start_time, runtime, output_dir, processes=None, seed=None,
+                   warmup=None, **driver_options):
+    """Generate a simulated-time backfill as partitions windows, each in its own process and file.
+
+    runtime is the ISO 8601 duration of the whole backfill from start_time. Window
+    i is written to output_dir/part-<i>.jsonl (part-<i>.txt with a template), with
+    the template's header, if any, at the top of each file. processes is how many
+    windows are generated at once (default: one per CPU). warmup is the warm-up in
+    seconds (default: warmup_seconds()). With a seed, window i is seeded with
+    seed + i, so a run is repeatable for the same number of partitions.
+    driver_options are passed to every DataDriver. Returns a list of (path, records)
+    in window order.
+    """
+    if not validate_config(config, template_name=driver_options.get('template_name')):
+        raise ValueError("Configuration is invalid — see log output for details.")
+    try:
+        seconds = isodate.parse_duration(runtime).total_seconds()
+    except Exception as e:
+        raise ValueError(f"Error parsing runtime '{runtime}': {e}")
+    if warmup is None:
+        warmup = warmup_seconds(config)
+    windows = partition_windows(start_time, seconds, partitions)
+    processes = min(partitions, processes or os.cpu_count() or 1)
+    os.makedirs(output_dir, exist_ok=True)
+    suffix = '.txt' if driver_options.get('template_name') else '.jsonl'
+    width = len(str(partitions - 1))
+    paths = [os.path.join(output_dir, f'part-{i:0{width}d}{suffix}') for i in range(partitions)]
+    logger.info("Generating %d partitions of %s in %d processes, with %.1fs of warm-up each",
+                partitions, windows[0][1] - windows[0][0], processes, warmup)
+
+    context = multiprocessing.get_context('spawn')
+    records = [None] * partitions
+    with ProcessPoolExecutor(processes, mp_context=context, max_tasks_per_child=1) as pool:
+        futures = {}
+        for i, window in enumerate(windows):
+            # The first window starts cold at start_time, as a run without partitions does
+            clock_start = window[0] - timedelta(seconds=warmup) if i > 0 else window[0]
+            driver_args = dict(driver_options, name=f'cli-{i}', config=config, total_recs=None,
+                               time_type='SIM')
+            future = pool.submit(_generate_partition, paths[i], driver_args, clock_start, window,
+                                 None if seed is None else seed + i, logger.getEffectiveLevel())
+            futures[future] = i
+        for future in as_completed(futures):
+            i = futures[future]
+            records[i] = future.result()
+            logger.info("Partition %d (%s to %s): %d records in %s",
+                        i, windows[i][0].isoformat(), windows[i][1].isoformat(), records[i], paths[i])
+    return list(zip(paths, records))
+
+
+def format_ring_stats(stats):
+    """Return the ring's stats() as one log line."""
+    return (f"{stats['messages']:,} messages, {stats['bytes'] / 1e6:,.1f} MB through the ring; "
+            f"high water {stats['high_water'] / stats['capacity']:.0%} of {stats['capacity'] / 2**20:g} MB; "
+            f"producers waited {stats['producer_waits']:,} times ({stats['producer_wait_seconds']:.2f}s), "
+            f"writer {stats['writer_waits']:,} times")
@@ -0,0 +1,306 @@
+"""Analytical throughput prediction for --predict: expected rates from the config alone.
+
+An Actor's walk through the state graph is an absorbing Markov chain: the
+transient states are everything reachable from the event:start:timer, event:end
+(or a missing state) absorbs, and each gateway:exclusive row holds its normalised
+transition probabilities. The fundamental matrix N = (I - Q)^-1 gives the expected
+number of visits to every state, which weighted by emitters gives the expected
+records per Actor, and weighted by the mean intermediate timer delays gives the
+expected Actor lifetime.
+
+Actors arrive at the rate of the event:start:timer. Little's law turns arrival
+rate times lifetime into the mean number of Actors in flight, the load a. The -m
+cap is modelled as a birth-death system with m slots plus the one arrival the
+spawner holds while waiting for a free slot: the blocking probability follows from
+Erlang B, and the concurrency ceiling is the smallest -m at which no more than
+CEILING_BLOCKING of arrivals wait. gmm_temporal start timers and --schedule files
+are evaluated per SLOT_SECONDS of the week and averaged.
+
+Mean record size is measured by rendering SIZE_SAMPLE records, the one step that
+runs the engine; everything else is closed-form and takes milliseconds.
+"""
+
+import logging
+import math
+import random
+
+import numpy as np
+
+from ieg.distributions import WeeklyCurve
+
+logger = logging.getLogger('ieg')
+
+CEILING_BLOCKING = 0.01  # arrival blocking probability that defines the -m ceiling
+SLOT_SECONDS = 900  # resolution at which time-varying rates are averaged over the week
+EXACT_ERLANG_LIMIT = 10_000  # above this many slots, Erlang B uses its large-load approximation
+SIZE_SAMPLE = 500  # records rendered to measure the mean record size
+SIZE_SAMPLE_SEED = 0
+SIZE_SAMPLE_START = '2024-01-01T00:00:00'
+
+
+def _normal_cdf(z):
+    return 0.5 * math.erfc(-z / math.sqrt(2.0))
+
+
+def delay_mean(desc):
+    """Return the mean delay in seconds of a distribution config dict.
+
+    Delays are drawn as the engine draws them and non-positive draws do not advance
+    the clock, so the mean is of max(0, sample). gmm_temporal returns its long-run
+    mean over the week.
+    """
+    dist_type = desc['type'].lower()
+    if dist_type == 'constant':
+        return max(0.0, float(desc['value']))
+    if dist_type == 'uniform':
+        # DistUniform samples from [min, max + 1)
+        lo, hi = float(desc['min']), float(desc['max']) + 1.0
+        if lo >= 0:
+            return (lo + hi) / 2.0
+        return hi * hi / (2.0 * (hi - lo)) if hi > 0 else 0.0
+    if dist_type == 'exponential':
+        return float(desc['mean'])
+    if dist_type == 'normal':
+        mu, sigma = float(desc['mean']), float(desc['stddev'])
+        if sigma <= 0:
+            return max(0.0, mu)
+        z = mu / sigma
+        return mu * _normal_cdf(z) + sigma * math.exp(-0.5 * z * z) / math.sqrt(2.0 * math.pi)
+    if dist_type == 'gmm_temporal':
+        curve = WeeklyCurve.for_days(desc['days'])
+        if curve.total <= 0:
+            return float(desc['mean']) / 0.001
+        return float(desc['mean']) / (curve.total / 604800.0)
+    raise ValueError(f"Unknown distribution '{dist_type}'")
+
+
+def weekly_rates(desc, slot_seconds=SLOT_SECONDS):
+    """Return the arrival rate per second in each slot of the week for a start timer, or None if constant."""
+    if desc['type'].lower() != 'gmm_temporal':
+        return None
+    curve = WeeklyCurve.for_days(desc['days'])
+    if curve.total <= 0:
+        return None
+    edges = np.arange(0, 604800 + slot_seconds, slot_seconds) / WeeklyCurve.RESOLUTION
+    area = np.interp(edges, np.arange(len(curve.cumulative_array)), curve.cumulative_array)
+    return np.diff(area) / slot_seconds / float(desc['mean'])
+
+
+def weekly_multipliers(schedule, slot_seconds=SLOT_SECONDS):
+    """Return the --schedule multiplier in each slot of the week, or a float for a constant schedule."""
+    if schedule is None:
+        return 1.0
+    if schedule['type'].lower() == 'constant':
+        return float(schedule['value'])
+    curve = WeeklyCurve.for_days(schedule['days'])
+    offsets = np.arange(0, 604800, slot_seconds) + slot_seconds / 2.0
+    return np.maximum(0.0, np.array([curve.multiplier_at_offset(s) for s in offsets]))
+
+
+def absorbing_chain(config):
+    """Solve the state graph as an absorbing Markov chain.
+
+    Returns (visits, lifetime): the expected visits per Actor to each transient
+    state, by name, and the expected Actor lifetime in seconds. Raises ValueError
+    if some reachable state cannot reach event:end.
+    """
+    descs = {s['name']: s for s in config['states']}
+    start = next(s for s in config['states'] if s.get('type') == 'event:start:timer')
+
+    def successors(desc):
+        state_type = desc.get('type')
+        if state_type == 'event:end':
+            return []
+        if state_type == 'gateway:exclusive':
+            transitions = desc.get('transitions', [])
+            total = sum(float(t['probability']) for t in transitions)
+            return [(t['next'], float(t['probability']) / total) for t in transitions] if total > 0 else []
+        return [(desc['next'], 1.0)]
+
+    # Transient states: reachable from the start timer, other than event:end
+    order = []
+    frontier = [start['name']]
+    while frontier:
+        name = frontier.pop()
+        if name in order or name not in descs or descs[name].get('type') == 'event:end':
+            continue
+        order.append(name)
+        frontier.extend(n for n, _ in successors(descs[name]))
+    index = {name: i for i, name in enumerate(order)}
+
+    q = np.zeros((len(order), len(order)))
+    for name in order:
+        for next_name, p in successors(descs[name]):
+            if next_name in index:
+                q[index[name], index[next_name]] += p
+    try:
+        # Row of N = (I - Q)^-1 for the start state: solve (I - Q)^T x = e_start
+        visits = np.linalg.solve((np.eye(len(order)) - q).T, np.eye(len(order))[index[start['name']]])
+    except np.linalg.LinAlgError:
+        visits = None
+    if visits is None or not np.all(np.isfinite(visits)) or np.any(visits < -1e-9):
+        raise ValueError("Some states have no path to event:end, so Actor lifetimes are unbounded")
+
+    visits = {name: float(visits[i]) for i, name in enumerate(order)}
+    lifetime = sum(visits[name] * delay_mean(descs[name]['cardinality_distribution'])
+                   for name in order if descs[name].get('type') == 'event:intermediate:timer')
+    return visits, lifetime
+
+
+def erlang_b(servers, load):
+    """Erlang B blocking probability for integer servers and offered load, elementwise on arrays."""
+    servers = np.asarray(servers, dtype=float)
+    load = np.asarray(load, dtype=float)
+    result = np.zeros(np.broadcast(servers, load).shape)
+    servers, load = np.broadcast_to(servers, result.shape), np.broadcast_to(load, result.shape)
+    peak = float(load.max()) if load.size else 0.0
+    limit = int(min(servers.max() if servers.size else 0, peak + 10 * math.sqrt(peak) + 10))
+    if limit <= EXACT_ERLANG_LIMIT:
+        # B(k) = a B(k-1) / (k + a B(k-1)); servers beyond limit block with negligible probability
+        b = np.ones(result.shape)
+        for k in range(1, limit + 1):
+            b = load * b / (k + load * b)
+            hit = servers == k
+            result[hit] = b[hit]
+        return result
+    # Large loads: B ~ phi(z) / (sqrt(a) Phi(z)) with z = (c - a) / sqrt(a), or 1 - c/a deep in overload
+    for i in np.ndindex(result.shape):
+        a, c = load[i], servers[i]
+        if a <= 0:
+            continue
+        z = (c - a) / math.sqrt(a)
+        if z < -8:
+            result[i] = max(0.0, 1.0 - c / a)
+        else:
+            result[i] = min(1.0, math.exp(-0.5 * z * z) / math.sqrt(2.0 * math.pi) / (math.sqrt(a) * _normal_cdf(z)))
+    return result
+
+
+def blocking(servers, load):
+    """Fraction of arrivals the spawner holds back with servers Actor slots at offered load.
+
+    The spawner keeps one arrival waiting while every slot is busy, so this is the
+    probability of m + 1 in a birth-death chain whose first m + 1 states follow
+    Erlang B: B r / (1 + B r) with r = a / m.
+    """
+    servers = np.asarray(servers, dtype=float)
+    b = erlang_b(servers, load) * np.asarray(load, dtype=float) / servers
+    return b / (1.0 + b)
+
+
+def concurrency_ceiling(load, target=CEILING_BLOCKING):
+    """Smallest -m at which no more than target of arrivals are held back at the given load."""
+    lo, hi = 1, 1
+    while blocking(hi, load) > target:
+        lo, hi = hi, hi * 2
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if blocking(mid, load) > target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return hi
+
+
+def record_size(config, max_entities, template=None):
+    """Mean bytes per output line, including the newline, over SIZE_SAMPLE rendered records.
+
+    The process-wide RNG states are restored afterwards.
+    """
+    from ieg.api import generate
+
+    states = random.getstate(), np.random.get_state()
+    try:
+        records = generate(config, seed=SIZE_SAMPLE_SEED, start=SIZE_SAMPLE_START, n=SIZE_SAMPLE,
+                           max_entities=max_entities, output='text', template=template)
+        lines = list(records)
+    finally:
+        random.setstate(states[0])
+        np.random.set_state(states[1])
+    if template is not None and config.get('templates', {}).get(template, {}).get('header'):
+        lines = lines[1:]
+    if not lines:
+        return None
+    return sum(len(line.encode('utf-8')) + 1 for line in lines) / len(lines)
+
+
+def predict(config, schedule=None, max_entities=100, template=None, measure_size=True):
+    """Return the expected steady-state behaviour of config as a dict.
+
+    Rates are long-run averages; with a gmm_temporal start timer or schedule, the
+    peak is over the slots of the week. The config should already have passed
+    validate_config.
+    """
+    start = next(s for s in config['states'] if s.get('type') == 'event:start:timer')
+    descs = {s['name']: s for s in config['states']}
+    visits, lifetime = absorbing_chain(config)
+
+    records_by_emitter = {}
+    for name, n in visits.items():
+        emitter = descs[name].get('emitter')
+        if descs[name].get('type') == 'activity' and emitter is not None:
+            records_by_emitter[emitter] = records_by_emitter.get(emitter, 0.0) + n
+    records_per_actor = sum(records_by_emitter.values())
+
+    timer = start['cardinality_distribution']
+    rates = weekly_rates(timer)
+    if rates is None:
+        mean_gap = delay_mean(timer)
+        rates = np.array([1.0 / mean_gap if mean_gap > 0 else math.inf])
+    multipliers = weekly_multipliers(schedule)
+    caps = np.maximum(1, np.floor(max_entities * np.asarray(multipliers))).astype(int)
+    loads = rates * lifetime
+    if np.isinf(rates).any():
+        raise ValueError("event:start:timer has a zero mean interarrival time")
+
+    held = blocking(caps, loads) if lifetime > 0 else np.zeros(np.broadcast(caps, loads).shape)
+    actor_rates = np.broadcast_to(rates, held.shape) * (1.0 - held)
+    peak_load = float(np.max(loads))
+    size = record_size(config, max_entities, template) if measure_size else None
+    events_per_second = float(np.mean(actor_rates)) * records_per_actor
+    return {
+        'arrival_rate': float(np.mean(rates)),
+        'arrival_rate_peak': float(np.max(rates)),
+        'state_visits': visits,
+        'records_per_actor': records_per_actor,
+        'records_per_actor_by_emitter': records_by_emitter,
+        'actor_lifetime': lifetime,
+        'mean_concurrency': float(np.mean(loads)),
+        'concurrency_ceiling': concurrency_ceiling(peak_load) if lifetime > 0 else 1,
+        'max_entities': max_entities,
+        'blocking': float(1.0 - np.mean(actor_rates) / np.mean(rates)),
+        'actors_in_flight': float(np.mean(actor_rates)) * lifetime,
+        'actors_per_second': float(np.mean(actor_rates)),
+        'events_per_second': events_per_second,
+        'events_per_second_peak': float(np.max(actor_rates)) * records_per_actor,
+        'bytes_per_record': size,
+        'bytes_per_hour': events_per_second * 3600 * size if size is not None else None,
+    }
+
+
+def _format_bytes(n):
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if n < 1024 or unit == 'TB':
+            return f'{n:,.1f} {unit}'
+        n /= 1024.0
+
+
+def format_prediction(prediction):
+    """Render a predict() result as lines of text."""
+    p = prediction
+    by_emitter = ', '.join(f'{name}: {n:.2f}' for name, n in p['records_per_actor_by_emitter'].items())
+    lines = [
+        f"Actor arrivals:       {p['arrival_rate']:,.4g} /s" +
+        (f" mean, {p['arrival_rate_peak']:,.4g} /s peak" if p['arrival_rate_peak'] != p['arrival_rate'] else ''),
+        f"Records per Actor:    {p['records_per_actor']:,.2f}" + (f"  ({by_emitter})" if by_emitter else ''),
+        f"Actor lifetime:       {p['actor_lifetime']:,.1f} s",
+        f"Actors in flight:     {p['mean_concurrency']:,.1f} without a limit (Little's law)",
+        f"Concurrency ceiling:  -m {p['concurrency_ceiling']:,}  ({CEILING_BLOCKING:.0%} of arrivals held back at peak)",
+        f"At -m {p['max_entities']:,}:" + ' ' * max(1, 15 - len(f"{p['max_entities']:,}")) +
+        f"{p['actors_in_flight']:,.1f} Actors in flight, {p['blocking']:.1%} of arrivals held back",
+        f"Events:               {p['events_per_second']:,.4g} /s mean, {p['events_per_second_peak']:,.4g} /s peak",
+    ]
+    if p['bytes_per_record'] is not None:
+        lines.append(f"Output:               {p['bytes_per_record']:,.0f} bytes/record, "
+                     f"{_format_bytes(p['bytes_per_hour'])}/hour")
+    return lines
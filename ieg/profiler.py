@@ -0,0 +1,156 @@
+"""Run profiling for --profile: per-stage timings, per-dimension costs and state visits.
+
+Profiler wraps the driver's stage methods (state variable sampling, lifecycle
+planning, create_record, render_record, Clock.sleep and the stdout write) with
+perf_counter timers. With profiling off nothing is wrapped, so the normal path
+pays nothing. Counters are kept per thread and summed when a report is written,
+so worker threads never contend on a lock.
+
+Times are wall-clock per call. Clock.sleep includes the time a thread spends
+waiting for its turn while other threads run, so in threaded runs the stage
+totals can add up to more than the run time.
+
+Optionally, every generator thread also runs under cProfile, and the merged
+statistics are written to a file that pstats or snakeviz can read.
+"""
+
+import cProfile
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# Stages in pipeline order, for the report
+STAGES = ('sampling', 'plan', 'create_record', 'render_record', 'Clock.sleep', 'stdout')
+
+
+class Profiler:
+    """Collects timings for one generator run and writes breakdowns to stderr."""
+
+    def __init__(self, dump_path=None, stream=None):
+        self.dump_path = dump_path
+        self.stream = stream if stream is not None else sys.stderr
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.thread_stats = []  # (stages, dimensions, visits) for every thread that recorded anything
+        self.profiles = []  # one cProfile.Profile per profiled thread
+        self.start = time.perf_counter()
+
+    def __str__(self):
+        return 'Profiler(threads='+str(len(self.thread_stats))+', dump_path='+str(self.dump_path)+')'
+
+    def _stats(self):
+        """Return this thread's counters, registering them on first use."""
+        stats = getattr(self.local, 'stats', None)
+        if stats is None:
+            stats = ({}, {}, Counter())
+            self.local.stats = stats
+            with self.lock:
+                self.thread_stats.append(stats)
+        return stats
+
+    def _timed(self, index, key, fn):
+        perf_counter = time.perf_counter
+        stats = self._stats
+
+        def timed(*args, **kwargs):
+            t0 = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - t0
+                table = stats()[index]
+                entry = table.get(key)
+                if entry is None:
+                    table[key] = [1, elapsed]
+                else:
+                    entry[0] += 1
+                    entry[1] += elapsed
+        return timed
+
+    def timed(self, stage, fn):
+        """Return fn wrapped to add its calls and time to stage."""
+        return self._timed(0, stage, fn)
+
+    def timed_dimension(self, name, fn):
+        """Return a dimension's sampling function wrapped to record its cost under name."""
+        return self._timed(1, name, fn)
+
+    def count_visit(self, state_name):
+        """Count one Actor visit to a state."""
+        self._stats()[2][state_name] += 1
+
+    def thread_target(self, fn):
+        """Return fn wrapped to run under cProfile if a dump was requested, else fn itself."""
+        if self.dump_path is None:
+            return fn
+
+        def profiled(*args, **kwargs):
+            profile = cProfile.Profile()
+            with self.lock:
+                self.profiles.append(profile)
+            profile.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+        return profiled
+
+    def totals(self):
+        """Sum the per-thread counters into (stages, dimensions, visits)."""
+        stages, dimensions, visits = {}, {}, Counter()
+        with self.lock:
+            thread_stats = list(self.thread_stats)
+        for thread_stages, thread_dimensions, thread_visits in thread_stats:
+            for total, table in ((stages, thread_stages), (dimensions, thread_dimensions)):
+                for key, (calls, seconds) in list(table.items()):
+                    entry = total.setdefault(key, [0, 0.0])
+                    entry[0] += calls
+                    entry[1] += seconds
+            visits.update(thread_visits)
+        return stages, dimensions, visits
+
+    def report(self, record_count, top=15):
+        """Write the current breakdown to the stream."""
+        wall = time.perf_counter() - self.start
+        stages, dimensions, visits = self.totals()
+        rate = record_count / wall if wall > 0 else 0.0
+        lines = [f'--- profile: {wall:.2f}s wall, {record_count:,} records, {rate:,.0f} records/s ---',
+                 f'{"stage":<16} {"calls":>12} {"total s":>10} {"us/call":>10} {"% wall":>7}']
+        for stage in STAGES:
+            if stage in stages:
+                calls, seconds = stages[stage]
+                lines.append(f'{stage:<16} {calls:>12,} {seconds:>10.3f} {seconds / calls * 1e6:>10.2f} {seconds / wall * 100 if wall else 0:>6.1f}%')
+        if dimensions:
+            width = max(len(name) for name in dimensions)
+            lines.append(f'{"dimension":<{width}} {"calls":>12} {"total s":>10} {"us/call":>10}')
+            for name, (calls, seconds) in sorted(dimensions.items(), key=lambda item: -item[1][1])[:top]:
+                lines.append(f'{name:<{width}} {calls:>12,} {seconds:>10.3f} {seconds / calls * 1e6:>10.2f}')
+        if visits:
+            width = max(len(name) for name in visits)
+            lines.append(f'{"state":<{width}} {"visits":>12}')
+            for name, count in visits.most_common():
+                lines.append(f'{name:<{width}} {count:>12,}')
+        self.stream.write('\n'.join(lines) + '\n')
+        self.stream.flush()
+
+    def start_periodic(self, interval, record_count):
+        """Write a report every interval seconds of wall time. record_count is a callable."""
+        def periodic():
+            while True:
+                time.sleep(interval)
+                self.report(record_count())
+        threading.Thread(target=periodic, name='Profiler', daemon=True).start()
+
+    def finish(self, record_count):
+        """Write the final report and, if requested, the merged cProfile statistics."""
+        self.report(record_count)
+        if self.dump_path is not None and self.profiles:
+            with self.lock:
+                profiles = list(self.profiles)
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(self.dump_path)
+            self.stream.write(f'cProfile statistics for {len(profiles)} threads written to {self.dump_path}\n')
@@ -0,0 +1,283 @@
+"""Shared-memory ring buffer that carries rendered output from generator processes to one writer.
+
+The writer process creates a RingBuffer and passes it to each producer process as
+the process starts. A producer puts byte strings into it: one rendered record with
+its newline, or a batch of records as DataDriver.render_batch() encodes them
+(RingPrinter does this for a DataDriver). Each message is stored as a 4-byte
+length followed by its bytes in a multiprocessing.shared_memory block, so nothing
+is pickled on the way. The writer's drain() hands each message to a write function
+as a memoryview of the block, without copying it out.
+
+A message never wraps around the end of the block: if it does not fit in the
+space left before the end, that space is skipped. When the ring is full, put()
+blocks until the writer has caught up. This is the backpressure: producers never
+run more than the ring's capacity ahead of the output.
+
+The positions of the writer (head) and of the producers (tail), and the counters
+stats() reports, are kept in a header at the start of the block and are only
+read or changed under the ring's lock.
+
+Only the writer, which creates the block, frees it. Producers attach without
+registering the block with multiprocessing's resource tracker, which would
+otherwise free it, or warn that it leaked, when a producer ends.
+"""
+
+import multiprocessing
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+# Default ring capacity in bytes
+DEFAULT_RING_SIZE = 16 * 1024 * 1024
+
+# Header fields, each an unsigned 64-bit integer, by index. head and tail
+# are byte positions that only ever increase; a position's offset in the data
+# area is position % capacity.
+HEAD = 0
+TAIL = 1
+OPEN_PRODUCERS = 2  # producers that have not called close_producer()
+MESSAGES = 3  # messages put
+BYTES = 4  # message bytes put, without the length prefixes
+PRODUCER_WAITS = 5  # times a producer found the ring full
+PRODUCER_WAIT_NS = 6  # nanoseconds producers spent waiting for space
+WRITER_WAITS = 7  # times the writer found the ring empty
+HIGH_WATER = 8  # most bytes in use at once
+HEADER_FIELDS = 9
+
+_FIELD_SIZE = 8
+_LENGTH = struct.Struct('<I')
+_SKIP = 0xFFFFFFFF  # length that marks the rest of the data area as unused
+
+# drain() frees the space it has written out at least this often, as a fraction of capacity
+FREE_FRACTION = 4
+# How often, in seconds, a waiting writer checks whether the producers are still alive
+WRITER_POLL_INTERVAL = 1.0
+
+
+def _attach_untracked(name):
+    """Attach to the shared memory block name without registering it with the resource tracker.
+
+    Unregistering after attaching is not enough: a producer started by spawn or
+    fork shares the writer's tracker, and would remove the writer's own entry.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass  # before Python 3.13, attaching always registers the block
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class RingBuffer:
+    """A shared-memory ring of length-prefixed messages from any number of producers to one writer.
+
+    capacity is the size of the data area in bytes; a message may take at most half
+    of it. producers is how many close_producer() calls end the stream. context is
+    the multiprocessing context the producer processes are started from.
+    """
+
+    def __init__(self, capacity=DEFAULT_RING_SIZE, producers=1, context=None):
+        if capacity < 1024:
+            raise ValueError(f"Ring capacity must be at least 1024 bytes, got {capacity}")
+        if producers < 1:
+            raise ValueError(f"A ring needs at least one producer, got {producers}")
+        context = context or multiprocessing.get_context()
+        self.capacity = capacity
+        self.max_message = capacity // 2 - _LENGTH.size
+        self.condition = context.Condition()
+        self.shm = shared_memory.SharedMemory(create=True, size=HEADER_FIELDS * _FIELD_SIZE + capacity)
+        self.owner = True
+        self._attach()
+        for field in range(HEADER_FIELDS):
+            self.header[field] = 0
+        self.header[OPEN_PRODUCERS] = producers
+
+    def __str__(self):
+        return 'RingBuffer(name='+self.shm.name+', capacity='+str(self.capacity)+')'
+
+    def __getstate__(self):
+        # Producer processes attach to the same block by name
+        return {'name': self.shm.name, 'capacity': self.capacity, 'condition': self.condition}
+
+    def __setstate__(self, state):
+        self.capacity = state['capacity']
+        self.max_message = self.capacity // 2 - _LENGTH.size
+        self.condition = state['condition']
+        self.shm = _attach_untracked(state['name'])
+        self.owner = False
+        self._attach()
+
+    def _attach(self):
+        self.closed = False
+        self.header = self.shm.buf[:HEADER_FIELDS * _FIELD_SIZE].cast('Q')  # indexed by field
+        self.data = self.shm.buf[HEADER_FIELDS * _FIELD_SIZE:]
+
+    def put(self, data):
+        """Append one message, a bytes-like object, waiting while the ring is full.
+
+        After close() the message is dropped: a producer's remaining threads may
+        still finish a record after the producer has closed its end.
+        """
+        size = len(data)
+        if size > self.max_message:
+            raise ValueError(f"Message of {size} bytes does not fit a {self.capacity}-byte ring "
+                             f"(at most {self.max_message}); use a larger ring or smaller batches")
+        capacity = self.capacity
+        header = self.header
+        need = _LENGTH.size + size
+        with self.condition:
+            if self.closed:
+                return
+            waited_since = None
+            while True:
+                head = header[HEAD]
+                tail = header[TAIL]
+                offset = tail % capacity
+                skip = capacity - offset if need > capacity - offset else 0
+                if capacity - (tail - head) >= skip + need:
+                    break
+                if waited_since is None:
+                    waited_since = time.perf_counter_ns()
+                    header[PRODUCER_WAITS] += 1
+                self.condition.wait()
+            if waited_since is not None:
+                header[PRODUCER_WAIT_NS] += time.perf_counter_ns() - waited_since
+            if skip:
+                if skip >= _LENGTH.size:
+                    _LENGTH.pack_into(self.data, offset, _SKIP)
+                tail += skip
+                offset = 0
+            _LENGTH.pack_into(self.data, offset, size)
+            self.data[offset + _LENGTH.size:offset + need] = data
+            tail += need
+            header[TAIL] = tail
+            header[MESSAGES] += 1
+            header[BYTES] += size
+            if tail - head > header[HIGH_WATER]:
+                header[HIGH_WATER] = tail - head
+            self.condition.notify_all()
+
+    def close_producer(self):
+        """Record that one producer has put its last message."""
+        with self.condition:
+            self.header[OPEN_PRODUCERS] -= 1
+            self.condition.notify_all()
+
+    def _free(self, position):
+        with self.condition:
+            self.header[HEAD] = position
+            self.condition.notify_all()
+
+    def drain(self, write, producers_alive=None):
+        """Pass every message to write, as a memoryview valid only during the call,
+        until all producers have closed and the ring is empty.
+
+        producers_alive, if given, is called while the writer waits; once it returns
+        False the ring is drained and drain() returns even though not every producer
+        closed, so that a producer process that dies cannot hang the writer.
+        """
+        capacity = self.capacity
+        header = self.header
+        free_every = capacity // FREE_FRACTION
+        while True:
+            with self.condition:
+                while True:
+                    head = header[HEAD]
+                    tail = header[TAIL]
+                    if tail > head or header[OPEN_PRODUCERS] == 0:
+                        break
+                    header[WRITER_WAITS] += 1
+                    if not self.condition.wait(WRITER_POLL_INTERVAL) and producers_alive is not None \
+                            and not producers_alive():
+                        tail = header[TAIL]
+                        break
+            if tail == head:
+                return
+            # Messages between head and tail are complete and no producer writes
+            # there until the space is freed, so they are read without the lock
+            position = head
+            freed = head
+            while position < tail:
+                offset = position % capacity
+                if capacity - offset < _LENGTH.size:
+                    position += capacity - offset
+                    continue
+                size = _LENGTH.unpack_from(self.data, offset)[0]
+                if size == _SKIP:
+                    position += capacity - offset
+                    continue
+                view = self.data[offset + _LENGTH.size:offset + _LENGTH.size + size]
+                try:
+                    write(view)
+                finally:
+                    view.release()
+                position += _LENGTH.size + size
+                if position - freed >= free_every:
+                    self._free(position)
+                    freed = position
+            self._free(position)
+
+    def stats(self):
+        """Return the ring's counters as a dict."""
+        header = self.header
+        with self.condition:
+            head = header[HEAD]
+            tail = header[TAIL]
+            return {
+                'capacity': self.capacity,
+                'used': tail - head,
+                'high_water': header[HIGH_WATER],
+                'messages': header[MESSAGES],
+                'bytes': header[BYTES],
+                'producer_waits': header[PRODUCER_WAITS],
+                'producer_wait_seconds': header[PRODUCER_WAIT_NS] / 1e9,
+                'writer_waits': header[WRITER_WAITS],
+                'open_producers': header[OPEN_PRODUCERS],
+            }
+
+    def close(self):
+        """Detach from the shared block; the process that created the ring also frees it."""
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.header.release()
+            self.data.release()
+        try:
+            self.shm.close()
+        finally:
+            if self.owner:
+                self.shm.unlink()
+
+
+class RingPrinter:
+    """A DataDriver output target that puts each record or encoded batch into a RingBuffer.
+
+    close() stops it for good. The ring's lock is shared between processes and
+    nothing releases it if its holder dies, so a producer process must not exit
+    while one of its threads is inside put(); close() waits for any put() in
+    progress and makes later records from Actors still running a no-op.
+    """
+
+    def __init__(self, ring):
+        self.ring = ring
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def print(self, record):
+        self.write((str(record) + '\n').encode('utf-8'))
+
+    def write(self, data):
+        # A batch of rendered records, already encoded
+        with self.lock:
+            if not self.closed:
+                self.ring.put(data)
+
+    def close(self):
+        with self.lock:
+            self.closed = True
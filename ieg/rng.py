@@ -0,0 +1,66 @@
+"""Random number generators behind every draw the engine makes.
+
+The engine draws through rng.random, which has the random module's API, and
+rng.numpy, which has numpy.random's. By default they are those two modules, so
+random.seed() and np.random.seed() (--seed) make a run repeatable. Simulated time
+depends on this: its threads take turns in clock order and so always draw in the
+same sequence from the shared generators, and reach them with a plain attribute
+lookup.
+
+Real-time threads run side by side. The global generators are thread-safe, but
+each draw takes the generator's lock, so on a free-threaded build the threads
+would queue on it. A real-time thread calls use_thread_generators() once, and
+from then on draws from a pair of generators of its own, seeded from the global
+ones. The first call switches rng to per-thread lookups; threads that have not
+called it still draw from the shared generators.
+"""
+
+import random
+import threading
+
+import numpy as np
+
+
+class _Generators:
+    """The generators draws go through: the shared ones, until use_thread_generators() is first called."""
+
+    def __init__(self):
+        self.random = random
+        self.numpy = np.random
+
+
+class _ThreadLocalGenerators(threading.local):
+    """Each thread's generators. The class attributes are the shared defaults."""
+    random = random
+    numpy = np.random
+
+
+_thread_generators = _ThreadLocalGenerators()
+
+
+def _set_random(self, value):
+    _thread_generators.random = value
+
+
+def _set_numpy(self, value):
+    _thread_generators.numpy = value
+
+
+class _PerThreadGenerators(_Generators):
+    """_Generators once real-time threads have generators of their own: the calling thread's."""
+    random = property(lambda self: _thread_generators.random, _set_random)
+    numpy = property(lambda self: _thread_generators.numpy, _set_numpy)
+
+
+rng = _Generators()
+_switch_lock = threading.Lock()
+
+
+def use_thread_generators():
+    """Give the calling thread its own random.Random and numpy RandomState."""
+    with _switch_lock:
+        if type(rng) is _Generators:
+            rng.__class__ = _PerThreadGenerators
+    seed = random.getrandbits(64)
+    rng.random = random.Random(seed)
+    rng.numpy = np.random.RandomState(np.random.MT19937(seed))
@@ -1,22 +1,30 @@
-"""State machine classes: Transition, State, and Controller.
+"""State machine classes: Transition, State, Actor, and Controller.
 
-State models one node in the Actor lifecycle graph. Controller tracks simulation
-end conditions (record count or elapsed duration). Transition encodes a single
-weighted edge in a gateway:exclusive state's transitions list.
+State models one node in the Actor lifecycle graph. Actor holds the mutable
+per-lifecycle state a worker thread carries through that graph; ActorTable holds
+the same state for every Actor of a closed-form run at once. Controller tracks
+simulation end conditions (record count or elapsed duration). Transition encodes
+a single weighted edge in a gateway:exclusive state's transitions list.
 
 See docs/states.md for the config-level reference.
 """
 
 import logging
+import sys
 import threading
-import random
 import time
+from itertools import accumulate
 import isodate
 
+from ieg.dimensions import DimensionTimestampClock
+from ieg.rng import rng
+
 logger = logging.getLogger('ieg')
 
 class Transition:
     """A single weighted edge in a gateway:exclusive state's transitions list."""
+    __slots__ = ('next_state', 'probability')
+
     def __init__(self, next_state, probability):
         self.next_state = next_state
         self.probability = probability
@@ -69,18 +77,23 @@ class State:
       gateway:exclusive        — routes to one of several next states by probability
       event:end                — terminates the worker thread
     """
-    def __init__(self, name, state_type, dimensions, delay, transitions, variables):
+    __slots__ = ('name', 'type', 'emitter', 'delay', 'transitions', 'transition_states',
+                 'transition_probabilities', 'transition_cum_weights', 'variables')
+
+    def __init__(self, name, state_type, emitter, delay, transitions, variables):
         self.name = name
         self.type = state_type
-        self.dimensions = dimensions
+        self.emitter = emitter  # Emitter, or None for states that emit nothing
         self.delay = delay
         self.transitions = transitions
         self.transition_states = [t.next_state for t in transitions]
         self.transition_probabilities = [t.probability for t in transitions]
+        # Precomputed so routing does not re-accumulate the weights on every visit
+        self.transition_cum_weights = list(accumulate(self.transition_probabilities))
         self.variables = variables
 
     def __str__(self):
-        return 'State(name='+self.name+', type='+self.type+', dimensions='+str([str(d) for d in self.dimensions])+', delay='+str(self.delay)+', transition_states='+str(self.transition_states)+', transition_probabilities='+str(self.transition_probabilities)+'variables='+str([str(v) for v in self.variables])+')'
+        return 'State(name='+self.name+', type='+self.type+', emitter='+(self.emitter.name if self.emitter is not None else 'None')+', delay='+str(self.delay)+', transition_states='+str(self.transition_states)+', transition_probabilities='+str(self.transition_probabilities)+'variables='+str([str(v) for v in self.variables])+')'
 
     @staticmethod
     def validate_desc(desc, emitter_names, context):
@@ -211,7 +224,120 @@ class State:
     def get_next_state_name(self):
         if not self.transition_states:
             return None
-        return random.choices(self.transition_states, weights=self.transition_probabilities, k=1)[0]
+        if len(self.transition_states) == 1:
+            # Timers, activities and one-way gateways: no need to draw
+            return self.transition_states[0]
+        return rng.random.choices(self.transition_states, cum_weights=self.transition_cum_weights, k=1)[0]
+
+class Actor:
+    """Mutable state for one Actor lifecycle, owned by a pooled worker thread.
+
+    The same object (and its variables dict and wakeup Event) is reused for every
+    lifecycle its worker runs; reset() prepares it for the next one.
+    """
+    __slots__ = ('name', 'state', 'variables', 'wakeup')
+
+    def __init__(self, name):
+        self.name = name
+        self.state = None
+        self.variables = {}
+        self.wakeup = threading.Event()
+
+    def __str__(self):
+        return 'Actor(name='+self.name+', state='+(self.state.name if self.state is not None else 'None')+')'
+
+    def reset(self, initial_state):
+        """Position the Actor at the start of a fresh lifecycle."""
+        self.state = initial_state
+        self.variables.clear()
+
+class _Unset:
+    """Type of UNSET. Pickles by name, so that a restored ActorTable's columns hold the same object."""
+
+    def __repr__(self):
+        return 'UNSET'
+
+    def __reduce__(self):
+        return 'UNSET'
+
+
+UNSET = _Unset()
+
+class ActorTable:
+    """Compact state for all in-flight Actors of a closed-form run, as struct-of-arrays.
+
+    Each Actor is a slot: an index into one list holding its current activity and
+    one list per variable name. A slot costs a pointer per column; there is no
+    per-Actor dict or object. Variables the Actor has not set hold UNSET. Slots are
+    reused as Actors end, and the lists grow only when more Actors are in flight
+    than ever before.
+    """
+    __slots__ = ('states', 'columns', 'free', 'size', 'in_use', 'peak')
+
+    UNSET = UNSET
+
+    def __init__(self, variable_names, capacity=0):
+        self.states = [None] * capacity  # current activity State per slot
+        self.columns = {name: [self.UNSET] * capacity for name in variable_names}
+        self.free = []  # released slots below size, reused first
+        self.size = 0  # slots handed out so far
+        self.in_use = 0
+        self.peak = 0
+
+    def __str__(self):
+        return 'ActorTable(in_use='+str(self.in_use)+', peak='+str(self.peak)+', columns='+str(list(self.columns))+')'
+
+    def acquire(self):
+        """Return a free slot for a new Actor."""
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = self.size
+            self.size += 1
+            if slot >= len(self.states):
+                self.states.append(None)
+                for column in self.columns.values():
+                    column.append(self.UNSET)
+        self.in_use += 1
+        if self.in_use > self.peak:
+            self.peak = self.in_use
+        return slot
+
+    def release(self, slot):
+        """Free an ended Actor's slot, dropping its variable values."""
+        self.states[slot] = None
+        for column in self.columns.values():
+            column[slot] = self.UNSET
+        self.free.append(slot)
+        self.in_use -= 1
+
+    def set_variables(self, slot, dimensions, now):
+        """Sample dimensions into one slot's variables, with clock values taken at now."""
+        columns = self.columns
+        for d in dimensions:
+            if isinstance(d, DimensionTimestampClock):
+                columns[d.name][slot] = d.get_value_at(now)
+            else:
+                columns[d.name][slot] = d.get_stochastic_value()
+
+    def bytes_per_actor(self, queue_entry=None, sample=256):
+        """Estimate the memory one in-flight Actor costs, in bytes.
+
+        Counts the slot's pointer in every list, the Actor's entry in the driver's
+        record queue (queue_entry, an example entry) and the mean size of the values
+        held in each variable column, from up to sample occupied slots. Values
+        shared between Actors, such as enum strings, are counted in full, so this
+        errs high.
+        """
+        size = 8 * (1 + len(self.columns))
+        if queue_entry is not None:
+            size += 8 + sys.getsizeof(queue_entry) + sum(sys.getsizeof(item) for item in queue_entry)
+        for column in self.columns.values():
+            values = [v for v in column[:sample * 4] if v is not self.UNSET][:sample]
+            if values:
+                size += sum(sys.getsizeof(v) for v in values) // len(values)
+        return size
+
 
 class Controller:
     # Manages the simulation end conditions.
@@ -231,8 +357,24 @@ class Controller:
             except Exception as e:
                 raise ValueError(f"Error parsing runtime '{runtime}': {e}")
 
+    def __getstate__(self):
+        # For a checkpoint (see ieg/checkpoint.py): the lock and event are recreated on load
+        state = self.__dict__.copy()
+        del state['lock']
+        state['thread_end_event'] = self.thread_end_event.is_set()
+        return state
+
+    def __setstate__(self, state):
+        ended = state.pop('thread_end_event')
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+        self.thread_end_event = threading.Event()
+        if ended:
+            self.thread_end_event.set()
+
     def get_entity_count(self):
-        return self.entity_count
+        with self.lock:
+            return self.entity_count
 
     def add_entity(self):
         self.lock.acquire()
@@ -247,13 +389,32 @@ class Controller:
     def inc_rec_count(self):
         self.lock.acquire()
         self.record_count += 1
+        record_count = self.record_count
         self.lock.release()
-        if (self.total_recs is not None) and (self.record_count >= self.total_recs):
+        if (self.total_recs is not None) and (record_count >= self.total_recs):
             self.thread_end_event.set()
 
+    def reserve_record(self):
+        # Count a record before it is emitted; False once the record limit has been
+        # reached, so that threads emitting at the same time cannot overshoot it
+        with self.lock:
+            if (self.total_recs is not None) and (self.record_count >= self.total_recs):
+                return False
+            self.record_count += 1
+            record_count = self.record_count
+        if (self.total_recs is not None) and (record_count >= self.total_recs):
+            self.thread_end_event.set()
+        return True
+
     def is_done(self):
         return ((self.total_recs is not None) and (self.record_count >= self.total_recs)) \
-                or ((self.t is not None) and ((self.get_duration() > self.t) or self.thread_end_event.is_set()))
+                or self.thread_end_event.is_set() \
+                or ((self.t is not None) and (self.get_duration() >= self.t))
+
+    def is_stopped(self):
+        # Ended by the record limit or terminate(), rather than by the runtime
+        return ((self.total_recs is not None) and (self.record_count >= self.total_recs)) \
+                or self.thread_end_event.is_set()
 
     def wait_for_end(self):
         if self.t is not None:
@@ -275,7 +436,8 @@ class Controller:
         return self.global_clock.get_start_time()
 
     def get_record_count(self):
-        return self.record_count
+        with self.lock:
+            return self.record_count
 
     def terminate(self):
         if self.total_recs is not None:
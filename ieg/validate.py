@@ -99,8 +99,8 @@ def validate_config(config, template_name=None):
                     valid = False
             for var in state.get('variables', []):
                 vctx = f"{ctx}, variable '{var.get('name', '?')}'"
-                if var.get('type', '').lower() == 'variable':
-                    logger.error("%s: type 'variable' is not valid in a state's 'variables' block — it can only be used in emitter dimensions", vctx)
+                if var.get('type', '').lower() in ('variable', 'entity:attribute'):
+                    logger.error("%s: type '%s' is not valid in a state's 'variables' block — it can only be used in emitter dimensions", vctx, var['type'])
                     valid = False
                 elif not validate_dimension_desc(var, vctx):
                     valid = False
@@ -123,7 +123,7 @@ def validate_config(config, template_name=None):
         for emitter in config.get('emitters', []):
             ename = emitter.get('name', '?')
             for dim in emitter.get('dimensions', []):
-                if dim.get('type', '').lower() == 'variable':
+                if dim.get('type', '').lower() in ('variable', 'entity:attribute'):
                     ref = dim.get('variable', '')
                     if ref and ref not in all_set_variables:
                         logger.error(
@@ -0,0 +1,73 @@
+"""RingBuffer: a producer process that dies part-way through a run."""
+
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing import shared_memory
+
+import pytest
+
+from ieg.ring import RingBuffer
+
+MESSAGES = 200
+
+
+def _produce(ring, tag, started, finish):
+    for i in range(MESSAGES):
+        ring.put(f'{tag} {i}\n'.encode())
+    started.set()
+    if finish:
+        ring.close_producer()
+        ring.close()
+    else:
+        # Killed here, without closing its end of the ring
+        time.sleep(60)
+
+
+def test_killed_producer():
+    context = multiprocessing.get_context('spawn')
+    ring = RingBuffer(64 * 1024, producers=2, context=context)
+    name = ring.shm.name
+    events = [context.Event(), context.Event()]
+    producers = [context.Process(target=_produce, args=(ring, tag, event, finish))
+                 for tag, event, finish in (('a', events[0], True), ('b', events[1], False))]
+    lines = []
+    try:
+        for producer in producers:
+            producer.start()
+        assert all(event.wait(30) for event in events)
+        os.kill(producers[1].pid, signal.SIGKILL)
+        producers[1].join(10)
+        ring.drain(lambda view: lines.append(bytes(view)),
+                   producers_alive=lambda: any(p.is_alive() for p in producers))
+        producers[0].join(10)
+        # The dead producer's end is still open, but everything it put is written
+        assert ring.stats()['open_producers'] == 1
+    finally:
+        for producer in producers:
+            if producer.is_alive():
+                producer.kill()
+        ring.close()
+    assert producers[0].exitcode == 0
+    for tag in 'ab':
+        assert [line for line in lines if line.startswith(tag.encode())] == \
+            [f'{tag} {i}\n'.encode() for i in range(MESSAGES)]
+    # Neither producer's exit freed the block; the writer's close() did
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_producer_does_not_track_block(monkeypatch):
+    ring = RingBuffer(4096)
+    registered = []
+    monkeypatch.setattr('multiprocessing.resource_tracker.register',
+                        lambda name, rtype: registered.append((name, rtype)))
+    try:
+        producer = RingBuffer.__new__(RingBuffer)
+        producer.__setstate__(ring.__getstate__())
+        producer.put(b'x')
+        producer.close()
+        assert registered == []
+    finally:
+        ring.close()
@@ -3,40 +3,52 @@
 
 Three-phase approach:
   1. Discovery: geometrically doubles -m from --start-m until row count plateaus.
-  2. Refinement: binary-searches between the last non-plateau and first plateau value
+  2. Refinement: searches between the last non-plateau and first plateau value
      to pinpoint the ceiling precisely (within ~5%).
   3. Sampling: selects up to --samples evenly log-spaced -m values across
      [start_m, 2 × ceiling] and runs those for the final table.
 
-Within each run the simulated clock is tracked by reading the clock field from output
-lines, giving a real progress bar (% of simulated window elapsed) rather than a spinner.
+Each run drives a DataDriver in a fresh worker process: records are rendered as
+usual but discarded, and the row count comes from the driver's record counter, so
+no output is written or parsed. Independent -m points run in parallel across --jobs
+processes: discovery runs the next --jobs doublings at once, refinement splits the
+interval into --jobs + 1 parts per round, and sampling runs every point at once.
+Progress bars follow each run's simulated clock.
 
-If the config has an ambiguous clock field, pass --clock-field explicitly.
+Every run also reports the CPU time and peak RSS of its worker process. Results are
+cached in --cache-dir, keyed by a hash of the config plus seed, start and duration,
+so rerunning with more samples or a different threshold only runs the new points.
+Pass --no-cache after changing the engine.
 
-Outputs CSV to stdout and an empirical summary (ceiling, regenerate command) to stderr.
+Outputs a markdown block (or CSV with --csv) to stdout and an empirical summary
+(ceiling, the analytical ceiling from --predict, regenerate command) to stderr.
 
 Usage:
-    python tools/bench_config.py -c presets/configs/vpc_flow_logs.json --clock-field start
+    python tools/bench_config.py -c presets/configs/vpc_flow_logs.json
     python tools/bench_config.py -c presets/configs/ecommerce.json --duration P1D
-    python tools/bench_config.py -c presets/configs/ssh_auth.json --samples 6
+    python tools/bench_config.py -c presets/configs/ssh_auth.json --samples 6 --jobs 4
 """
 
 import argparse
 import csv
+import hashlib
 import json
+import logging
 import math
+import multiprocessing
 import os
-import subprocess
+import random
 import sys
+import threading
 import time
-from datetime import datetime, timezone
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 import dateutil.parser
 import isodate
+import numpy as np
 from rich.console import Console
 from rich.progress import (
     BarColumn,
-    MofNCompleteColumn,
     Progress,
     SpinnerColumn,
     TaskProgressColumn,
@@ -44,6 +56,16 @@ from rich.progress import (
     TimeElapsedColumn,
 )
 
+try:
+    import resource
+except ImportError:  # not available on Windows; peak RSS is then not reported
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ieg.core import DataDriver  # noqa: E402
+from ieg.predict import predict  # noqa: E402
+
 err = Console(stderr=True)
 
 DEFAULT_SEED = 42
@@ -52,110 +74,161 @@ DEFAULT_DURATION = "PT6H"
 PLATEAU_THRESHOLD = 0.10
 DEFAULT_MAX_M = 100_000
 DEFAULT_SAMPLES = 10
+DEFAULT_CACHE_DIR = ".bench_cache"
+PROGRESS_INTERVAL = 0.5  # seconds between a worker's progress reports
+POLL_INTERVAL = 0.2  # seconds between progress bar refreshes in the parent
 
 
 # ---------------------------------------------------------------------------
-# Clock field detection
+# Worker — one generator run per process, measured through its counters
 # ---------------------------------------------------------------------------
 
-def find_clock_field(config):
-    """Locate the emitter output field that carries the simulated clock timestamp.
+class _NullPrinter:
+    """Output target that discards rendered records and batches."""
+
+    def print(self, record):
+        pass
 
-    Checks emitter dimensions for type='clock' first, then falls back to tracing
-    state variables of type='clock' through to their emitter dimension references.
+    def write(self, data):
+        pass
 
-    Returns (field_name, candidates):
-      - (name, [])           — unique match
-      - (None, [c1, c2, …])  — ambiguous; caller should require --clock-field
-      - (None, [])           — not found; caller should require --clock-field
+
+def measure(config_path, m, duration_str, start_str, seed, progress=None):
+    """Run the generator in this process for one -m value and return its measurements.
+
+    The config is rendered to JSON as on the command line, but nothing is written.
+    If progress is a shared dict, the fraction of the simulated window elapsed is
+    stored under m every PROGRESS_INTERVAL seconds.
     """
-    # Method 1: direct clock dimension on emitter
-    direct = []
-    for emitter in config.get("emitters", []):
-        for dim in emitter.get("dimensions", []):
-            if dim.get("type") == "clock" and dim["name"] not in direct:
-                direct.append(dim["name"])
-    if direct:
-        return (direct[0], []) if len(direct) == 1 else (None, direct)
-
-    # Method 2: variable of type='clock' referenced by an emitter dimension
-    clock_vars = {
-        var["name"]
-        for state in config.get("states", [])
-        for var in state.get("variables", [])
-        if var.get("type") == "clock"
+    logging.getLogger('ieg').setLevel(logging.WARNING)
+    with open(config_path) as f:
+        config = json.load(f)
+    random.seed(seed)
+    np.random.seed(seed)
+    window = isodate.parse_duration(duration_str).total_seconds()
+    driver = DataDriver(
+        name='bench', config=config, runtime=duration_str, total_recs=None, time_type='SIM',
+        start_time=dateutil.parser.isoparse(start_str), max_entities=m, config_file=config_path,
+    )
+    driver.target_printer = _NullPrinter()
+
+    finished = threading.Event()
+    if progress is not None and window > 0:
+        def report_progress():
+            while not finished.wait(PROGRESS_INTERVAL):
+                progress[m] = min(1.0, driver.sim_control.get_duration() / window)
+        threading.Thread(target=report_progress, name='Progress', daemon=True).start()
+
+    cpu0 = time.process_time()
+    t0 = time.perf_counter()
+    try:
+        driver.simulate()
+    finally:
+        finished.set()
+    elapsed = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+
+    peak_rss_mb = None
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss_mb = maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return {
+        "m": m,
+        "rows": driver.sim_control.get_record_count(),
+        "elapsed_s": elapsed,
+        "cpu_s": cpu,
+        "peak_rss_mb": peak_rss_mb,
     }
-    if clock_vars:
-        via_var = []
-        for emitter in config.get("emitters", []):
-            for dim in emitter.get("dimensions", []):
-                if dim.get("type") == "variable" and dim.get("variable") in clock_vars:
-                    if dim["name"] not in via_var:
-                        via_var.append(dim["name"])
-        if via_var:
-            return (via_var[0], []) if len(via_var) == 1 else (None, via_var)
 
-    return (None, [])
+
+# ---------------------------------------------------------------------------
+# Result cache — one JSON file per (config, seed, start, duration)
+# ---------------------------------------------------------------------------
+
+def cache_key(config, seed, start_str, duration_str):
+    """Hash of the config contents and run parameters that determine a run's rows."""
+    h = hashlib.sha256()
+    h.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+    h.update(json.dumps([seed, start_str, duration_str]).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+class ResultCache:
+    """Measurements by -m, persisted to a JSON file after every new result."""
+
+    def __init__(self, path, params, load=True):
+        self.path = path
+        self.params = params
+        self.results = {}
+        if load and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    stored = json.load(f)
+                self.results = {int(m): r for m, r in stored.get("results", {}).items()}
+            except (OSError, ValueError):
+                err.print(f"[yellow]Ignoring unreadable cache file {path}[/yellow]")
+
+    def __contains__(self, m):
+        return m in self.results
+
+    def __getitem__(self, m):
+        return self.results[m]
+
+    def add(self, result):
+        self.results[result["m"]] = result
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(dict(self.params, results={str(m): r for m, r in sorted(self.results.items())}), f, indent=2)
+        os.replace(tmp, self.path)
 
 
 # ---------------------------------------------------------------------------
-# Subprocess runner — streams stdout, updates Rich progress from sim timestamps
+# Parallel runner — submits uncached points and follows them on progress bars
 # ---------------------------------------------------------------------------
 
-def run_one(config_path, m, duration_str, start_str, seed,
-            clock_field, start_dt, end_dt,
-            progress, run_task):
-    """Run one generator invocation, streaming output for live progress."""
-    cmd = [
-        sys.executable, "generator.py",
-        "-c", config_path,
-        "-r", duration_str,
-        "-s", start_str,
-        f"--seed={seed}",
-        f"-m={m}",
-    ]
-    t0 = time.perf_counter()
-    row_count = 0
-    duration_secs = (end_dt - start_dt).total_seconds()
-
-    with subprocess.Popen(
-        cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
-        text=True, bufsize=1,
-    ) as proc:
-        assert proc.stdout is not None
-        for raw in proc.stdout:
-            raw = raw.rstrip("\n")
-            if not raw:
+class Runner:
+    """Runs -m points on a process pool, one fresh process per run, through the cache."""
+
+    def __init__(self, pool, progress, shared, cache, run_kwargs):
+        self.pool = pool
+        self.progress = progress
+        self.shared = shared
+        self.cache = cache
+        self.run_kwargs = run_kwargs
+
+    def run(self, ms, label):
+        """Measure every m in ms (cached points are not rerun) and return {m: result}."""
+        pending = {}
+        tasks = {}
+        for m in ms:
+            if m in self.cache or m in tasks:
                 continue
-            row_count += 1
-
-            # Parse clock field → update per-run progress bar
-            if clock_field and duration_secs > 0:
-                try:
-                    obj = json.loads(raw)
-                    val = obj.get(clock_field)
-                    if val is not None:
-                        if isinstance(val, str):
-                            sim_ts = dateutil.parser.isoparse(val)
-                        elif isinstance(val, (int, float)):
-                            sim_ts = datetime.fromtimestamp(val, tz=timezone.utc)
-                        else:
-                            sim_ts = None
-                        if sim_ts is not None:
-                            if sim_ts.tzinfo is None:
-                                sim_ts = sim_ts.replace(tzinfo=timezone.utc)
-                            elapsed_sim = (sim_ts - start_dt).total_seconds()
-                            pct = max(0.0, min(100.0, elapsed_sim / duration_secs * 100))
-                            progress.update(run_task, completed=pct)
-                except Exception:
-                    pass
-
-        if proc.wait() != 0:
-            raise RuntimeError(f"generator.py exited non-zero for -m {m}")
-
-    elapsed_wall = time.perf_counter() - t0
-    progress.update(run_task, completed=100.0)
-    return row_count, elapsed_wall
+            self.shared[m] = 0.0
+            tasks[m] = self.progress.add_task(f"[dim]{label:<6} -m {m:>8,}", total=100.0)
+            pending[self.pool.submit(measure, m=m, progress=self.shared, **self.run_kwargs)] = m
+        while pending:
+            done, _ = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                m = pending.pop(future)
+                self.cache.add(future.result())
+                r = self.cache[m]
+                self.progress.update(tasks[m], completed=100.0,
+                                     description=f"{label:<6} -m {m:>8,}  {describe(r)}")
+            for future, m in pending.items():
+                self.progress.update(tasks[m], completed=self.shared.get(m, 0.0) * 100)
+        for m in ms:
+            if m not in tasks:
+                task = self.progress.add_task("", total=100.0, completed=100.0)
+                self.progress.update(task, description=f"{label:<6} -m {m:>8,}  {describe(self.cache[m])}  (cached)")
+        return {m: self.cache[m] for m in ms}
+
+
+def describe(r):
+    """One-line summary of a run for the progress display."""
+    rss = f"  {r['peak_rss_mb']:,.0f} MB" if r.get("peak_rss_mb") is not None else ""
+    return f"{r['rows']:>10,} rows  {r['elapsed_s']:.1f}s  cpu {r['cpu_s']:.1f}s{rss}"
 
 
 # ---------------------------------------------------------------------------
@@ -168,6 +241,10 @@ def is_plateau(prev_rows, curr_rows, threshold):
     return (curr_rows - prev_rows) / prev_rows < threshold
 
 
+def split_points(lo, hi, parts):
+    """Up to parts - 1 distinct integers strictly between lo and hi, evenly spaced."""
+    return sorted({lo + (hi - lo) * i // parts for i in range(1, parts)} - {lo, hi})
+
 
 def nice_ceil(value, headroom=0.15):
     """Round value × (1 + headroom) up to 2 significant figures."""
@@ -191,6 +268,10 @@ def log_spaced_integers(lo, hi, n):
     return sorted(pts)
 
 
+def format_rss(r):
+    return f"{r['peak_rss_mb']:.0f}" if r.get("peak_rss_mb") is not None else ""
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
@@ -216,145 +297,119 @@ def main():
 
     parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES,
                         help=f"Points in the final table. Default: {DEFAULT_SAMPLES}")
-    parser.add_argument("--clock-field", default=None,
-                        help="JSON field name carrying the simulated clock timestamp "
-                             "(required if the config has multiple clock fields)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Runs to execute in parallel. Default: number of CPUs")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Directory for cached results. Default: {DEFAULT_CACHE_DIR}")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Rerun every point, ignoring (and replacing) cached results")
     parser.add_argument("--csv", action="store_true",
                         help="Output raw CSV instead of the default markdown block")
     args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
 
-    # --- Load config and resolve clock field ---
     with open(args.config) as f:
         config = json.load(f)
+    isodate.parse_duration(args.duration)
+    dateutil.parser.isoparse(args.start)
 
-    if args.clock_field:
-        clock_field = args.clock_field
-    else:
-        clock_field, candidates = find_clock_field(config)
-        if clock_field is None:
-            if candidates:
-                parser.error(
-                    f"Config has multiple clock fields: {candidates}. "
-                    f"Specify one with --clock-field."
-                )
-            else:
-                parser.error(
-                    "Could not find a clock field in the config. "
-                    "Specify one with --clock-field."
-                )
-
-    # --- Compute simulated time window ---
-    start_dt = dateutil.parser.isoparse(args.start)
-    if start_dt.tzinfo is None:
-        start_dt = start_dt.replace(tzinfo=timezone.utc)
-    end_dt = start_dt + isodate.parse_duration(args.duration)
+    config_name = os.path.splitext(os.path.basename(args.config))[0]
+    key = cache_key(config, args.seed, args.start, args.duration)
+    cache_path = os.path.join(args.cache_dir, f"{config_name}-{key}.json")
+    params = dict(config=args.config, seed=args.seed, start=args.start, duration=args.duration)
+    cache = ResultCache(cache_path, params, load=not args.no_cache)
 
     run_kwargs = dict(
-        config_path=args.config,
+        config_path=os.path.abspath(args.config),
         duration_str=args.duration,
         start_str=args.start,
         seed=args.seed,
-        clock_field=clock_field,
-        start_dt=start_dt,
-        end_dt=end_dt,
     )
 
-    results = []
-
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[bold]{task.description}"),
-        BarColumn(bar_width=30),
-        TaskProgressColumn(),
-        TextColumn("•"),
-        TimeElapsedColumn(),
-        console=Console(stderr=True),
-        transient=False,
-    ) as progress:
+    # A fresh process per run keeps each run's RNG, CPU time and peak RSS its own
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager, \
+            ProcessPoolExecutor(args.jobs, mp_context=context, max_tasks_per_child=1) as pool, \
+            Progress(
+                SpinnerColumn(),
+                TextColumn("[bold]{task.description}"),
+                BarColumn(bar_width=30),
+                TaskProgressColumn(),
+                TextColumn("•"),
+                TimeElapsedColumn(),
+                console=Console(stderr=True),
+                transient=False,
+            ) as progress:
+        runner = Runner(pool, progress, manager.dict(), cache, run_kwargs)
 
         # ----------------------------------------------------------------
-        # Phase 1: discovery (geometric doubling)
+        # Phase 1: discovery (geometric doubling, --jobs steps at a time)
         # ----------------------------------------------------------------
         disc_task = progress.add_task("[cyan]Phase 1 — discovery", total=None)
 
-        cache = {}  # m -> (rows, elapsed) — reused in sampling phase
-        plateau_m = None
-        prev_rows = None
-        last_non_plateau_m = args.start_m
+        ladder = []
         m = args.start_m
-
         while m <= args.max_m:
-            progress.update(disc_task, description=f"[cyan]Phase 1 — discovery  -m {m:,}")
-            run_task = progress.add_task(f"[dim]disc  -m {m:>8,}", total=100.0)
-
-            rows, elapsed = run_one(m=m, **run_kwargs,
-                                    progress=progress, run_task=run_task)
-            cache[m] = (rows, elapsed)
+            ladder.append(m)
+            m *= 2
 
-            plat = is_plateau(prev_rows, rows, args.plateau_threshold)
-            suffix = "  [yellow]← plateau[/yellow]" if plat else ""
-            progress.update(
-                run_task, completed=100.0,
-                description=f"disc  -m {m:>8,}  {rows:>10,} rows  {elapsed:.1f}s{suffix}",
-            )
-
-            if plat:
-                plateau_m = m
-                break
-            else:
+        plateau_m = None
+        prev_rows = None
+        last_non_plateau_m = args.start_m
+        for i in range(0, len(ladder), args.jobs):
+            step = ladder[i:i + args.jobs]
+            progress.update(disc_task, description=f"[cyan]Phase 1 — discovery  -m {step[0]:,} … {step[-1]:,}")
+            results = runner.run(step, "disc")
+            for m in step:
+                rows = results[m]["rows"]
+                if is_plateau(prev_rows, rows, args.plateau_threshold):
+                    plateau_m = m
+                    break
                 last_non_plateau_m = m
-
-            prev_rows = rows
-            next_m = m * 2
-            if next_m > args.max_m:
+                prev_rows = rows
+            if plateau_m is not None:
                 break
-            m = next_m
 
         if plateau_m is None:
-            plateau_m = m
+            plateau_m = ladder[-1] if ladder else args.start_m
+            runner.run([plateau_m], "disc")
 
-        progress.update(disc_task, description="[cyan]Phase 1 — complete")
+        progress.update(disc_task, description=f"[cyan]Phase 1 — complete  (plateau at -m {plateau_m:,})")
 
         # ----------------------------------------------------------------
-        # Phase 1b: binary-search refinement — narrows the plateau boundary
+        # Phase 1b: refinement — narrows the plateau boundary
         # ----------------------------------------------------------------
-        # Doubling leaves up to a 2× gap. We bisect [last_non_plateau_m, plateau_m]
-        # anchoring each comparison to the known-non-plateau rows so the
-        # is_plateau check stays consistent.
+        # Doubling leaves up to a 2× gap. Each round runs --jobs points spread across
+        # [last_non_plateau_m, plateau_m] and scans them in order, anchoring each
+        # comparison to the latest non-plateau rows so the is_plateau check stays
+        # consistent. With --jobs 1 this is a binary search.
         lo, hi = last_non_plateau_m, plateau_m
-        lo_rows = cache[lo][0]
+        lo_rows = cache[lo]["rows"] if lo in cache else None
 
-        if hi > lo + 1:
+        if lo_rows is not None and hi > lo + 1:
             refine_task = progress.add_task(
                 f"[cyan]Phase 1b — refining  [{lo:,} … {hi:,}]", total=None
             )
             while hi > lo + 1 and hi / lo > 1.05:
-                mid = (lo + hi) // 2
-                if mid == lo or mid == hi:
+                points = split_points(lo, hi, args.jobs + 1)
+                if not points:
                     break
                 progress.update(
                     refine_task,
-                    description=f"[cyan]Phase 1b — refining  [{lo:,} … {hi:,}]  trying {mid:,}",
+                    description=f"[cyan]Phase 1b — refining  [{lo:,} … {hi:,}]  trying {', '.join(f'{p:,}' for p in points)}",
                 )
-                run_task = progress.add_task(f"[dim]refine -m {mid:>8,}", total=100.0)
-                mid_rows, mid_elapsed = run_one(m=mid, **run_kwargs,
-                                                progress=progress, run_task=run_task)
-                cache[mid] = (mid_rows, mid_elapsed)
-
-                if is_plateau(lo_rows, mid_rows, args.plateau_threshold):
-                    # ceiling is at or before mid
-                    hi = mid
-                    plateau_m = mid
-                    suffix = "  [yellow]← plateau[/yellow]"
-                else:
+                results = runner.run(points, "refine")
+                for mid in points:
+                    mid_rows = results[mid]["rows"]
+                    if is_plateau(lo_rows, mid_rows, args.plateau_threshold):
+                        # ceiling is at or before mid
+                        hi = mid
+                        plateau_m = mid
+                        break
                     # ceiling is above mid
                     lo = mid
                     lo_rows = mid_rows
-                    suffix = ""
-                progress.update(
-                    run_task, completed=100.0,
-                    description=f"refine -m {mid:>8,}  {mid_rows:>10,} rows  {mid_elapsed:.1f}s{suffix}",
-                )
 
             progress.update(
                 refine_task,
@@ -362,53 +417,30 @@ def main():
             )
 
         # ----------------------------------------------------------------
-        # Phase 2: sampling across discovered range
+        # Phase 2: sampling across discovered range, all points in parallel
         # ----------------------------------------------------------------
         max_sample = min(plateau_m * 2, args.max_m)
         sample_points = log_spaced_integers(args.start_m, max_sample, args.samples)
 
         sample_task = progress.add_task(
-            f"[green]Phase 2 — sampling  (plateau ~{plateau_m:,})",
-            total=len(sample_points),
+            f"[green]Phase 2 — sampling  (plateau ~{plateau_m:,})", total=None,
         )
-
-        prev_rows = None
-        for m in sample_points:
-            if m in cache:
-                rows, elapsed = cache[m]
-                run_task = progress.add_task(f"[dim]sample-m {m:>8,}", total=100.0)
-                progress.update(
-                    run_task, completed=100.0,
-                    description=f"sample -m {m:>8,}  {rows:>10,} rows  (cached)",
-                )
-            else:
-                run_task = progress.add_task(f"[dim]sample -m {m:>8,}", total=100.0)
-                rows, elapsed = run_one(m=m, **run_kwargs,
-                                        progress=progress, run_task=run_task)
-                progress.update(
-                    run_task, completed=100.0,
-                    description=f"sample -m {m:>8,}  {rows:>10,} rows  {elapsed:.1f}s",
-                )
-
-            results.append({"m": m, "rows": rows, "elapsed_s": elapsed})
-            progress.advance(sample_task, 1)
-            prev_rows = rows
-
+        sampled = runner.run(sample_points, "sample")
+        results = [sampled[m] for m in sample_points]
         progress.update(sample_task, description="[green]Phase 2 — complete")
 
     # ----------------------------------------------------------------
     # Output
     # ----------------------------------------------------------------
-    plateau_rows = cache[plateau_m][0] if plateau_m in cache else None
-    clock_arg = f" --clock-field {args.clock_field}" if args.clock_field else ""
-    regen_cmd = f"python tools/bench_config.py -c {args.config}{clock_arg}"
+    plateau_rows = cache[plateau_m]["rows"] if plateau_m in cache else None
+    regen_cmd = f"python tools/bench_config.py -c {args.config}"
 
     print()
 
     if args.csv:
         writer = csv.DictWriter(
             sys.stdout,
-            fieldnames=["m", "rows", "elapsed_s"],
+            fieldnames=["m", "rows", "elapsed_s", "cpu_s", "peak_rss_mb"],
             lineterminator="\n",
         )
         writer.writeheader()
@@ -417,23 +449,29 @@ def main():
                 "m": r["m"],
                 "rows": r["rows"],
                 "elapsed_s": f"{r['elapsed_s']:.1f}",
+                "cpu_s": f"{r['cpu_s']:.1f}",
+                "peak_rss_mb": format_rss(r),
             })
         plateau_rows_str = f"{plateau_rows:,} rows at plateau" if plateau_rows is not None else "rows unknown"
         err.print()
         err.print("[bold]── Empirical summary ──────────────────────────────────────[/bold]")
         err.print(f"  Empirical ceiling:  -m = [bold]{plateau_m:,}[/bold]  ({plateau_rows_str})")
+        try:
+            err.print(f"  Predicted ceiling:  -m = {predict(config, measure_size=False)['concurrency_ceiling']:,}  (generator.py --predict)")
+        except ValueError as e:
+            err.print(f"  Predicted ceiling:  unavailable ({e})")
         err.print(f"  Duration used:      {args.duration}  (seed={args.seed})")
+        err.print(f"  Cached results:     {cache_path}")
         err.print(f"  To regenerate:      {regen_cmd}")
         err.print("[bold]────────────────────────────────────────────────────────────[/bold]")
     else:
-        config_name = os.path.splitext(os.path.basename(args.config))[0]
         y_max = nice_ceil(plateau_rows) if plateau_rows else 1000
 
         x_vals = [str(r["m"]) for r in results]
         y_vals = [str(r["rows"]) for r in results]
 
         table_rows = "\n".join(
-            f"| {r['m']:,} | {r['rows']:,} | {r['elapsed_s']:.1f} |"
+            f"| {r['m']:,} | {r['rows']:,} | {r['elapsed_s']:.1f} | {r['cpu_s']:.1f} | {format_rss(r)} |"
             for r in results
         )
 
@@ -445,8 +483,8 @@ def main():
             f" no schedule, {args.duration} simulated window)."
             f" To regenerate: `{regen_cmd}`.\n"
             f"\n"
-            f"| `-m` | Rows ({args.duration}) | Wall-clock (s) |\n"
-            f"| ---: | ---: | ---: |\n"
+            f"| `-m` | Rows ({args.duration}) | Wall-clock (s) | CPU (s) | Peak RSS (MB) |\n"
+            f"| ---: | ---: | ---: | ---: | ---: |\n"
             f"{table_rows}\n"
             f"\n"
             f"```mermaid\n"
@@ -459,9 +497,5 @@ def main():
         )
 
 
-
-
-
-
 if __name__ == "__main__":
     main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the per-record hot path.
+
+Builds the emitters and state machine of a generator config in-process (no output,
+no threads) and times the operations every record goes through: attribute reads
+for percent_nulls/percent_missing, is_missing(), value sampling per dimension type,
+create_record() and render_record() per emitter, as JSON and through each of the
+config's templates, and State.get_next_state_name(). It also reports the memory
+held by the Dimension*, Dist*, State and Transition objects the config builds.
+
+Independently of the config, it times every Dist* (one sample, and per value
+of a block from get_samples()) and every Dimension* from a built-in catalogue of
+field generators, and Clock.sleep() in simulated time, both for a lone thread and
+for the handoff between two threads that take turns.
+
+Run it on two revisions to compare object layouts or hot-path changes, or use
+tools/bench_suite.py to record the results as JSON and compare against a baseline.
+
+Usage:
+    python tools/bench_micro.py -c presets/configs/ecommerce.json
+    python tools/bench_micro.py -c presets/configs/ssh_auth.json --number 200000
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import timeit
+from collections import defaultdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ieg.core import Clock, DataDriver  # noqa: E402
+from ieg.dimensions import DimensionTimestampClock, DimensionVariable, parse_element  # noqa: E402
+from ieg.distributions import parse_distribution  # noqa: E402
+
+DEFAULT_NUMBER = 100_000
+DEFAULT_REPEAT = 5
+SAMPLES_BLOCK = 1024  # values per get_samples() call in the Dist* block benchmarks
+HANDOFF_DIVISOR = 20  # Clock.sleep handoffs are thread switches: run number // this of them
+
+# One config per distribution type, for the Dist* benchmarks
+DISTRIBUTIONS = {
+    'constant': {'type': 'constant', 'value': 5},
+    'uniform': {'type': 'uniform', 'min': 0, 'max': 100},
+    'exponential': {'type': 'exponential', 'mean': 10},
+    'normal': {'type': 'normal', 'mean': 50, 'stddev': 10},
+    'gmm_temporal': {'type': 'gmm_temporal', 'mean': 1.0,
+                     'days': {'1': [{'utc_hour': 9, 'sigma': 2.0, 'weight': 0.8},
+                                    {'utc_hour': 17, 'sigma': 1.5, 'weight': 0.6}]}},
+}
+
+# Field generators covering every Dimension* class, for the Dimension* benchmarks.
+# Types with a value pool appear twice: unconstrained and with cardinality > 0.
+_ENUM = {'name': 'method', 'type': 'enum', 'values': ['GET', 'POST', 'PUT', 'DELETE'],
+         'cardinality_distribution': {'type': 'uniform', 'min': 0, 'max': 3}}
+DIMENSIONS = [
+    {'name': 'n', 'type': 'int', 'distribution': {'type': 'normal', 'mean': 0, 'stddev': 4}, 'cardinality': 0},
+    {'name': 'n', 'type': 'int', 'distribution': {'type': 'uniform', 'min': 0, 'max': 10_000}, 'cardinality': 100,
+     'cardinality_distribution': {'type': 'exponential', 'mean': 10}},
+    {'name': 'x', 'type': 'float', 'distribution': {'type': 'exponential', 'mean': 50}, 'cardinality': 0,
+     'precision': 2},
+    {'name': 'id', 'type': 'counter', 'start': 100, 'increment': 5},
+    {'name': 'status', 'type': 'int:static', 'value': 200},
+    {'name': 'host', 'type': 'string:static', 'value': 'web-01'},
+    {'name': 's', 'type': 'string', 'length_distribution': {'type': 'constant', 'value': 16}, 'cardinality': 0},
+    {'name': 's', 'type': 'string', 'length_distribution': {'type': 'uniform', 'min': 4, 'max': 12},
+     'cardinality': 100, 'cardinality_distribution': {'type': 'uniform', 'min': 0, 'max': 99},
+     'chars': 'abcdefghijklmnopqrstuvwxyz'},
+    {'name': 'ts', 'type': 'timestamp', 'cardinality': 0,
+     'distribution': {'type': 'uniform', 'min': '2024-01-01T00:00:00', 'max': '2024-02-01T00:00:00'}},
+    {'name': 'ip', 'type': 'ipaddress', 'cardinality': 0,
+     'distribution': {'type': 'uniform', 'min': 167772160, 'max': 184549375}},
+    _ENUM,
+    {'name': 'location', 'type': 'object', 'cardinality': 0, 'dimensions': [
+        _ENUM, {'name': 'lat', 'type': 'float', 'distribution': {'type': 'uniform', 'min': 48.0, 'max': 52.0},
+                'cardinality': 0, 'precision': 4}]},
+    {'name': 'tags', 'type': 'list', 'cardinality': 0,
+     'length_distribution': {'type': 'uniform', 'min': 1, 'max': 3},
+     'selection_distribution': {'type': 'uniform', 'min': 0, 'max': 0},
+     'elements': [_ENUM]},
+    {'name': 'time', 'type': 'clock'},
+]
+
+
+def build_driver(config, template_name=None):
+    """Construct a DataDriver for config without starting it."""
+    return DataDriver(
+        name='bench', config=config, runtime=None, total_recs=None, time_type='SIM',
+        start_time=datetime(2024, 1, 1), max_entities=1, template_name=template_name,
+    )
+
+
+def object_size(obj):
+    """Shallow size of obj plus its instance __dict__, if it has one."""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def walk_objects(driver):
+    """Yield every Dimension*/Dist*/State/Transition object reachable from driver."""
+    seen = set()
+
+    def visit(obj):
+        if obj is None or id(obj) in seen:
+            return
+        name = type(obj).__name__
+        if not name.startswith(('Dimension', 'Dist', 'State', 'Transition')):
+            return
+        seen.add(id(obj))
+        yield obj
+        for attr in ('value_distribution', 'cardinality_distribution', 'length_distribution',
+                     'selection_distribution', 'delay'):
+            yield from visit(getattr(obj, attr, None))
+        for attr in ('dimensions', 'elements', 'variables', 'transitions'):
+            children = getattr(obj, attr, None)
+            if isinstance(children, list):
+                for child in children:
+                    yield from visit(child)
+
+    for emitter in driver.emitters.values():
+        for d in emitter.dimensions:
+            yield from visit(d)
+    for state in driver.states.values():
+        yield from visit(state)
+
+
+def best_ns(stmt, number, repeat):
+    """Best-of-repeat time per call of stmt, in nanoseconds."""
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1e9
+
+
+def dimension_label(desc, dimension):
+    """Benchmark name for a catalogue dimension: its class, and the cardinality if pooled."""
+    label = type(dimension).__name__
+    if desc.get('cardinality'):
+        label += f"[cardinality={desc['cardinality']}]"
+    return label
+
+
+def clock_sleep_ns(threads, sleeps):
+    """Wall time per Clock.sleep() in simulated time with threads taking turns, in nanoseconds.
+
+    With one thread every sleep returns straight away; with two, every sleep hands
+    the clock to the other thread and waits for it to hand back.
+    """
+    clock = Clock('SIM', datetime(2024, 1, 1))
+    for _ in range(threads):
+        clock.activate_thread()
+    ready = threading.Barrier(threads + 1)
+
+    def sleeper():
+        ready.wait()
+        for _ in range(sleeps):
+            clock.sleep(1.0)
+        clock.end_thread()
+    workers = [threading.Thread(target=sleeper, daemon=True) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    t0 = time.perf_counter()
+    ready.wait()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - t0) / (threads * sleeps) * 1e9
+
+
+def run_catalogue(number, repeat):
+    """Benchmark every Dist* and catalogue Dimension*, and Clock.sleep(), independently of any config."""
+    results = []
+    clock = Clock('SIM', datetime(2024, 1, 1))
+    for dist_type, desc in DISTRIBUTIONS.items():
+        dist = parse_distribution(desc, clock=clock)
+        name = type(dist).__name__
+        results.append(('dist', name + '.get_sample()', 1, best_ns(dist.get_sample, number, repeat), 'ns/value'))
+        if hasattr(dist, 'get_samples'):
+            results.append(('dist', name + '.get_samples()', SAMPLES_BLOCK,
+                            best_ns(lambda: dist.get_samples(SAMPLES_BLOCK), number // SAMPLES_BLOCK or 1, repeat)
+                            / SAMPLES_BLOCK, 'ns/value'))
+
+    for desc in DIMENSIONS:
+        dimension = parse_element(desc, clock)
+        # object and list only build their JSON text
+        method = 'get_stochastic_value' if hasattr(dimension, 'get_stochastic_value') else 'get_json_field_string'
+        results.append(('dim', f'{dimension_label(desc, dimension)}.{method}()', 1,
+                        best_ns(getattr(dimension, method), number, repeat), 'ns/value'))
+
+    sleeps = number // HANDOFF_DIVISOR or 1
+    results.append(('clock', 'Clock.sleep()', 1, min(clock_sleep_ns(1, sleeps) for _ in range(repeat)), 'ns/sleep'))
+    results.append(('clock', 'Clock.sleep() handoff', 2, min(clock_sleep_ns(2, sleeps) for _ in range(repeat)),
+                    'ns/sleep'))
+    return results
+
+
+def run(config, number, repeat):
+    driver = build_driver(config)
+    results = []
+
+    # Memory per object type
+    sizes = defaultdict(list)
+    for obj in walk_objects(driver):
+        sizes[type(obj).__name__].append(object_size(obj))
+    for cls_name in sorted(sizes):
+        values = sizes[cls_name]
+        results.append(('memory', cls_name, len(values), sum(values) / len(values), 'bytes/object'))
+
+    # Emitter dimensions that create_record samples directly
+    sampled = [d for emitter in driver.emitters.values() for d in emitter.dimensions
+               if not isinstance(d, (DimensionVariable, DimensionTimestampClock))]
+    if sampled:
+        def read_percents():
+            for d in sampled:
+                d.percent_nulls
+                d.percent_missing
+        results.append(('attr', 'percent_nulls+percent_missing', len(sampled),
+                        best_ns(read_percents, number // len(sampled) or 1, repeat) / len(sampled), 'ns/dimension'))
+
+        def missing():
+            for d in sampled:
+                d.is_missing()
+        results.append(('call', 'is_missing()', len(sampled),
+                        best_ns(missing, number // len(sampled) or 1, repeat) / len(sampled), 'ns/dimension'))
+
+    by_type = defaultdict(list)
+    for d in sampled:
+        by_type[type(d).__name__].append(d)
+    for cls_name in sorted(by_type):
+        dims = by_type[cls_name]
+
+        def sample():
+            for d in dims:
+                d.get_stochastic_value()
+        results.append(('call', cls_name + '.get_stochastic_value()', len(dims),
+                        best_ns(sample, number // len(dims) or 1, repeat) / len(dims), 'ns/dimension'))
+
+    # create_record per emitter, with every variable the states can set populated
+    variables = {}
+    for state in driver.states.values():
+        driver.set_variable_values(variables, state.variables)
+    for name, emitter in driver.emitters.items():
+        results.append(('call', f'create_record({name})', len(emitter.dimensions),
+                        best_ns(lambda: emitter.create_record(variables), number // 10 or 1, repeat),
+                        'ns/record'))
+
+    # render_record per emitter: JSON, then each template, on a record built for that output
+    renderers = [('json', driver)]
+    renderers += [(name, build_driver(config, name)) for name in config.get('templates', {})]
+    for output, renderer in renderers:
+        template_variables = {}
+        for state in renderer.states.values():
+            renderer.set_variable_values(template_variables, state.variables)
+        for name, emitter in renderer.emitters.items():
+            record = emitter.create_record(template_variables)
+            results.append(('render', f'render_record({name}, {output})', len(emitter.dimensions),
+                            best_ns(lambda: renderer.render_record(record), number // 10 or 1, repeat),
+                            'ns/record'))
+
+    gateways = [s for s in driver.states.values() if len(s.transition_states) > 1]
+    if gateways:
+        def route():
+            for s in gateways:
+                s.get_next_state_name()
+        results.append(('call', 'State.get_next_state_name()', len(gateways),
+                        best_ns(route, number // len(gateways) or 1, repeat) / len(gateways), 'ns/state'))
+    single = [s for s in driver.states.values() if len(s.transition_states) == 1]
+    if single:
+        def follow():
+            for s in single:
+                s.get_next_state_name()
+        results.append(('call', 'State.get_next_state_name() single', len(single),
+                        best_ns(follow, number // len(single) or 1, repeat) / len(single), 'ns/state'))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-c", "--config", required=True, help="Path to generator config JSON")
+    parser.add_argument("--number", type=int, default=DEFAULT_NUMBER,
+                        help=f"Operations per timing run. Default: {DEFAULT_NUMBER:,}")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Timing runs per benchmark; the best is reported. Default: {DEFAULT_REPEAT}")
+    parser.add_argument("--no-catalogue", action="store_true",
+                        help="Only benchmark the config, not the built-in Dist*/Dimension*/Clock catalogue")
+    parser.add_argument("--json", action="store_true", help="Output JSON instead of a table")
+    args = parser.parse_args()
+
+    logging.getLogger('ieg').setLevel(logging.WARNING)
+    with open(args.config) as f:
+        config = json.load(f)
+
+    results = run(config, args.number, args.repeat)
+    if not args.no_catalogue:
+        results += run_catalogue(args.number, args.repeat)
+
+    if args.json:
+        print(json.dumps([
+            {"kind": kind, "name": name, "count": count, "value": round(value, 1), "unit": unit}
+            for kind, name, count, value, unit in results
+        ], indent=2))
+        return
+    width = max(len(r[1]) for r in results)
+    for kind, name, count, value, unit in results:
+        print(f"{kind:<7} {name:<{width}}  n={count:<4} {value:>10.1f} {unit}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Multi-core scaling of real-time generation as the number of worker threads grows.
+
+Runs a generator config in real time at each worker count in --workers, with -m
+set to that count, and reports records/sec, the speedup over the first count
+and the parallel efficiency (speedup divided by the growth in workers). Every
+timer delay, including the event:start:timer's interarrival gap, is replaced by
+zero, so each worker thread generates records as fast as it can and the run
+measures CPU throughput rather than the config's pacing. Records are rendered
+as JSON but not written.
+
+Each run happens in a fresh process. On a standard CPython build the GIL lets
+only one worker run Python code at a time, so the speedup stays near 1; on a
+free-threaded build (python3.13t and later, with the GIL disabled) the workers
+run on separate cores. The header line says which kind of interpreter ran.
+
+Usage:
+    python tools/bench_scaling.py -c presets/configs/ssh_auth.json
+    python3.13t tools/bench_scaling.py -c presets/configs/ecommerce.json --workers 1,2,4,8,16
+"""
+
+import argparse
+import copy
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import sysconfig
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ieg.core import DataDriver  # noqa: E402
+
+DEFAULT_RECORDS = 100_000
+DEFAULT_REPEAT = 3
+TIMER_TYPES = ('event:start:timer', 'event:intermediate:timer')
+
+
+class _NullPrinter:
+    """Output target that discards rendered records and batches."""
+
+    def print(self, record):
+        pass
+
+    def write(self, data):
+        pass
+
+
+def default_workers():
+    """Powers of two up to the number of CPUs, plus the CPU count itself."""
+    cpus = os.cpu_count() or 1
+    workers = []
+    n = 1
+    while n < cpus:
+        workers.append(n)
+        n *= 2
+    workers.append(cpus)
+    return workers
+
+
+def gil_enabled():
+    """Return True if the running interpreter holds a GIL."""
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def saturate(config):
+    """Return a copy of config with every timer delay set to zero."""
+    config = copy.deepcopy(config)
+    for state in config['states']:
+        if state.get('type') in TIMER_TYPES:
+            state['cardinality_distribution'] = {'type': 'constant', 'value': 0}
+    return config
+
+
+def run_point(config, workers, records):
+    """Generate records records in real time with workers threads.
+
+    Returns (records generated, wall seconds, CPU seconds).
+    """
+    logging.getLogger('ieg').setLevel(logging.WARNING)
+    driver = DataDriver(
+        name='scaling', config=config, runtime=None, total_recs=records, time_type='REAL',
+        start_time=datetime.now(), max_entities=workers,
+    )
+    driver.target_printer = _NullPrinter()
+    cpu0 = time.process_time()
+    t0 = time.perf_counter()
+    driver.simulate()
+    elapsed = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    return driver.sim_control.get_record_count(), elapsed, cpu
+
+
+def run(config, workers_list, records, repeat):
+    """Return one row per worker count, keeping the fastest of repeat runs.
+
+    speedup is relative to the first worker count, and efficiency is speedup
+    divided by the growth in workers: 100% is perfect scaling.
+    """
+    config = saturate(config)
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    base_rate = None
+    with ProcessPoolExecutor(1, mp_context=context, max_tasks_per_child=1) as pool:
+        for workers in workers_list:
+            runs = [pool.submit(run_point, config, workers, records).result() for _ in range(repeat)]
+            count, elapsed, cpu = min(runs, key=lambda r: r[1])
+            rate = count / elapsed if elapsed > 0 else 0.0
+            if base_rate is None:
+                base_rate = rate
+            speedup = rate / base_rate if base_rate else 0.0
+            efficiency = speedup * workers_list[0] / workers
+            rows.append({'workers': workers, 'records': count, 'seconds': elapsed, 'cpu_seconds': cpu,
+                         'records_per_second': rate, 'speedup': speedup, 'efficiency': efficiency})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('-c', '--config', required=True, help='Path to generator config JSON')
+    parser.add_argument('--workers', help='Comma-separated worker counts. '
+                        'Default: powers of two up to the CPU count')
+    parser.add_argument('--records', type=int, default=DEFAULT_RECORDS,
+                        help=f'Records per run. Default: {DEFAULT_RECORDS:,}')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'Runs per worker count; the fastest is kept. Default: {DEFAULT_REPEAT}')
+    parser.add_argument('--json', action='store_true', help='Output JSON instead of a table')
+    args = parser.parse_args()
+    if args.workers:
+        try:
+            workers_list = [int(w) for w in args.workers.split(',')]
+        except ValueError:
+            parser.error(f'--workers must be comma-separated integers, got {args.workers!r}')
+        if any(w < 1 for w in workers_list):
+            parser.error('--workers counts must be at least 1')
+    else:
+        workers_list = default_workers()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    interpreter = (f"Python {sys.version.split()[0]}"
+                   f"{' free-threaded' if sysconfig.get_config_var('Py_GIL_DISABLED') else ''}, "
+                   f"GIL {'enabled' if gil_enabled() else 'disabled'}, {os.cpu_count()} CPUs")
+    rows = run(config, workers_list, args.records, args.repeat)
+
+    if args.json:
+        json.dump({'config': args.config, 'interpreter': interpreter, 'gil_enabled': gil_enabled(),
+                   'rows': rows}, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{args.config}: {interpreter}")
+    print(f"{'Workers':>8} {'Records/s':>12} {'Speedup':>8} {'Efficiency':>10} {'CPU (s)':>8}")
+    for row in rows:
+        print(f"{row['workers']:>8} {row['records_per_second']:>12,.0f} {row['speedup']:>7.2f}x "
+              f"{row['efficiency']:>9.0%} {row['cpu_seconds']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Benchmark suite: micro and macro benchmarks, saved as JSON and compared against a baseline.
+
+Two levels:
+  micro  tools/bench_micro.py for every preset (create_record, render_record as JSON
+         and per template, routing, object sizes) plus its built-in catalogue of
+         every Dist*, every Dimension* and the Clock.sleep handoff. Nanoseconds per
+         operation, or bytes per object.
+  macro  simulated-time records/sec for each preset in presets/configs: --records
+         JSON records at the default -m, rendered but not written, best of --repeat
+         runs, each in a fresh process. CPU time and peak RSS are recorded alongside.
+
+Results are written to --output as JSON, keyed by benchmark name, with the unit and
+whether lower or higher is better. --compare BASELINE checks the results against
+an earlier file and flags every benchmark that is worse by more than --threshold
+(a fraction, default 0.10); the exit status is 1 if any regressed. Use --results
+to compare an existing results file without running anything.
+
+Micro timings are noisy on shared machines: keep the baseline and the comparison on
+the same host, and raise --threshold for single-run comparisons.
+
+Usage:
+    python tools/bench_suite.py -o baseline.json
+    python tools/bench_suite.py -o current.json --compare baseline.json
+    python tools/bench_suite.py --results current.json --compare baseline.json --threshold 0.2
+    python tools/bench_suite.py --macro-only --presets ssh_auth,vpc_flow_logs -o quick.json
+"""
+
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows; peak RSS is then not reported
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bench_micro  # noqa: E402
+from ieg.core import DataDriver  # noqa: E402
+
+RESULTS_VERSION = 1
+PRESETS_DIR = os.path.join(ROOT, "presets", "configs")
+DEFAULT_RECORDS = 50_000
+DEFAULT_REPEAT = bench_micro.DEFAULT_REPEAT
+DEFAULT_MICRO_NUMBER = bench_micro.DEFAULT_NUMBER
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_MAX_ENTITIES = 100  # generator.py's default -m
+MACRO_SEED = 42
+MACRO_START = datetime(2024, 1, 1)
+
+# Micro result units where a larger number is better; everything else is a cost
+HIGHER_IS_BETTER = {"records/s"}
+
+
+# ---------------------------------------------------------------------------
+# Macro — one preset run per process
+# ---------------------------------------------------------------------------
+
+class _NullPrinter:
+    """Output target that discards rendered records and batches."""
+
+    def print(self, record):
+        pass
+
+    def write(self, data):
+        pass
+
+
+def macro_run(config_path, records, max_entities, seed):
+    """Generate records JSON records from a preset in simulated time, without writing them.
+
+    Returns (records generated, wall seconds, CPU seconds, peak RSS in MB or None).
+    """
+    logging.getLogger("ieg").setLevel(logging.WARNING)
+    with open(config_path) as f:
+        config = json.load(f)
+    random.seed(seed)
+    np.random.seed(seed)
+    driver = DataDriver(
+        name="bench", config=config, runtime=None, total_recs=records, time_type="SIM",
+        start_time=MACRO_START, max_entities=max_entities, config_file=config_path,
+    )
+    driver.target_printer = _NullPrinter()
+    cpu0 = time.process_time()
+    t0 = time.perf_counter()
+    driver.simulate()
+    elapsed = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    peak_rss_mb = None
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss_mb = maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return driver.sim_control.get_record_count(), elapsed, cpu, peak_rss_mb
+
+
+def run_macro(presets, records, repeat, log):
+    """Return macro results for each preset path: records/s (best run), CPU s and peak RSS."""
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(1, mp_context=context, max_tasks_per_child=1) as pool:
+        for path in presets:
+            name = os.path.splitext(os.path.basename(path))[0]
+            runs = [pool.submit(macro_run, path, records, DEFAULT_MAX_ENTITIES, MACRO_SEED).result()
+                    for _ in range(repeat)]
+            count, elapsed, cpu, rss = min(runs, key=lambda run: run[1])
+            rate = count / elapsed if elapsed > 0 else 0.0
+            log(f"macro  {name:<24} {rate:>12,.0f} records/s  ({count:,} records, cpu {cpu:.2f}s)")
+            results[f"macro/{name}/records_per_second"] = {"value": rate, "unit": "records/s"}
+            results[f"macro/{name}/cpu_seconds"] = {"value": cpu, "unit": "s"}
+            if rss is not None:
+                results[f"macro/{name}/peak_rss"] = {"value": rss, "unit": "MB"}
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Micro — tools/bench_micro.py per preset, plus its catalogue
+# ---------------------------------------------------------------------------
+
+def run_micro(presets, number, repeat, log):
+    """Return micro results: bench_micro.run() per preset and bench_micro.run_catalogue() once."""
+    logging.getLogger("ieg").setLevel(logging.WARNING)
+    results = {}
+    for path in presets:
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path) as f:
+            config = json.load(f)
+        log(f"micro  {name}")
+        for kind, bench, count, value, unit in bench_micro.run(config, number, repeat):
+            results[f"micro/{name}/{kind}/{bench}"] = {"value": value, "unit": unit}
+    log("micro  catalogue")
+    for kind, bench, count, value, unit in bench_micro.run_catalogue(number, repeat):
+        results[f"micro/{kind}/{bench}"] = {"value": value, "unit": unit}
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Results files and comparison
+# ---------------------------------------------------------------------------
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_results(path):
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path}: unsupported results version {data.get('version')!r}")
+    return data
+
+
+def compare(baseline, current, threshold):
+    """Return rows of (name, unit, baseline, current, change, status) for benchmarks in both.
+
+    change is the relative difference, signed so that positive is worse. status is
+    'REGRESSION' beyond threshold, 'improved' beyond -threshold, else 'ok'.
+    """
+    rows = []
+    for name in sorted(set(baseline) & set(current)):
+        old, new = baseline[name]["value"], current[name]["value"]
+        unit = current[name]["unit"]
+        if not old:
+            continue
+        change = (new - old) / old
+        if current[name].get("better") == "higher":
+            change = -change
+        status = "REGRESSION" if change > threshold else "improved" if change < -threshold else "ok"
+        rows.append((name, unit, old, new, change, status))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    parser.add_argument("--results", help="Compare this existing results file instead of running the suite")
+    parser.add_argument("--compare", metavar="BASELINE", help="Results file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Relative slowdown that counts as a regression. Default: {DEFAULT_THRESHOLD}")
+    parser.add_argument("--presets", help="Comma-separated preset names. Default: every config in presets/configs")
+    parser.add_argument("--micro-only", action="store_true", help="Skip the macro benchmarks")
+    parser.add_argument("--macro-only", action="store_true", help="Skip the micro benchmarks")
+    parser.add_argument("--records", type=int, default=DEFAULT_RECORDS,
+                        help=f"Records per macro run. Default: {DEFAULT_RECORDS:,}")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Runs per benchmark; the best is kept. Default: {DEFAULT_REPEAT}")
+    parser.add_argument("--number", type=int, default=DEFAULT_MICRO_NUMBER,
+                        help=f"Operations per micro timing run. Default: {DEFAULT_MICRO_NUMBER:,}")
+    args = parser.parse_args()
+    if args.micro_only and args.macro_only:
+        parser.error("--micro-only and --macro-only exclude each other")
+    if args.results and not args.compare:
+        parser.error("--results needs --compare")
+
+    def log(message):
+        print(message, file=sys.stderr, flush=True)
+
+    if args.results:
+        data = load_results(args.results)
+    else:
+        if args.presets:
+            presets = [os.path.join(PRESETS_DIR, name.strip() + ".json") for name in args.presets.split(",")]
+            missing = [p for p in presets if not os.path.exists(p)]
+            if missing:
+                parser.error(f"unknown preset(s): {', '.join(missing)}")
+        else:
+            presets = sorted(glob.glob(os.path.join(PRESETS_DIR, "*.json")))
+        results = {}
+        if not args.macro_only:
+            results.update(run_micro(presets, args.number, args.repeat, log))
+        if not args.micro_only:
+            results.update(run_macro(presets, args.records, args.repeat, log))
+        for result in results.values():
+            result["better"] = "higher" if result["unit"] in HIGHER_IS_BETTER else "lower"
+        data = {
+            "version": RESULTS_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {"records": args.records, "repeat": args.repeat, "number": args.number,
+                         "max_entities": DEFAULT_MAX_ENTITIES, "seed": MACRO_SEED},
+            "results": results,
+        }
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(data, f, indent=2)
+            log(f"Results written to {args.output}")
+        elif not args.compare:
+            json.dump(data, sys.stdout, indent=2)
+            print()
+
+    if not args.compare:
+        return
+    baseline = load_results(args.compare)
+    rows = compare(baseline["results"], data["results"], args.threshold)
+    width = max((len(row[0]) for row in rows), default=10)
+    print(f"Baseline {args.compare} ({baseline.get('revision') or 'unknown revision'}) vs "
+          f"{args.results or args.output or 'this run'} ({data.get('revision') or 'unknown revision'}), "
+          f"threshold {args.threshold:.0%}")
+    for name, unit, old, new, change, status in rows:
+        print(f"{name:<{width}}  {old:>14,.1f} {new:>14,.1f} {unit:<12} {change:>+8.1%}  {status}")
+    regressions = [row for row in rows if row[5] == "REGRESSION"]
+    log(f"{len(rows)} benchmarks compared: {len(regressions)} regressed, "
+        f"{sum(row[5] == 'improved' for row in rows)} improved")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()